@@ -7,15 +7,20 @@ class MyFancyAI:
 
     def start(self, sid: SimulationID, vid: VehicleID) -> None:
         from aiExchangeMessages_pb2 import SimStateResponse, DataRequest, Control
+        request = DataRequest()
+        request.request_ids.extend([])  # Add all IDs of data this AI needs
+        control = None  # There is nothing to control before the first tick
         while True:
             print(sid.sid + ": Test status: " + service.get_status(sid))
-            # Wait for the simulation to request this AI
-            sim_state = self.service.wait_for_simulator_request(sid, vid)
-            if sim_state is SimStateResponse.SimState.RUNNING:  # Check whether simulation is still running
-                # Request data this AI needs
-                request = DataRequest()
-                request.request_ids.extend([])  # Add all IDs of data to be requested
-                data = service.request_data(sid, vid, request)  # Request the actual data
+            # Apply the last commands, wait for the simulation to request this AI and request the actual data
+            # NOTE This combines wait_for_simulator_request(...), request_data(...) and control(...)
+            step = self.service.step(sid, vid, request, control)
+            if step is None:
+                print(sid.sid + ": The step could not be performed.")
+                # Clean up everything you have to
+                break
+            elif step.state is SimStateResponse.SimState.RUNNING:  # Check whether simulation is still running
+                data = step.data
 
                 # Calculate commands controlling the car
                 control = Control()
@@ -23,10 +28,9 @@ class MyFancyAI:
                 # control.avCommand.accelerate = <Some value between 0.0 and 1.0>
                 # control.avCommand.steer = <Some value between -1.0 (left) and 1.0 (right)
                 # control.avCommand.brake = <Some value between 0.0 and 1.0>
-                service.control(sid, vid, control)
             else:
                 print(sid.sid + ": The simulation is not running anymore (Final state: "
-                      + SimStateResponse.SimState.Name(sim_state) + ").")
+                      + SimStateResponse.SimState.Name(step.state) + ").")
                 print(sid.sid + ": Final test result: " + service.get_result(sid))
                 # Clean up everything you have to
                 break
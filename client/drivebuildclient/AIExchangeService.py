@@ -1,26 +1,43 @@
-from http.client import HTTPResponse
 from logging import getLogger
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Any
 
 from drivebuildclient.aiExchangeMessages_pb2 import VehicleID, SimulationID, TestResult, SubmissionResult, User, \
     DataResponse, Void, \
-    SimStateResponse, Control, DataRequest
+    SimStateResponse, Control, DataRequest, StepResponse
+from drivebuildclient.httpUtil import BufferedResponse
 
 _logger = getLogger("DriveBuild.Client.AIExchangeService")
 
 
 class AIExchangeService:
-    def __init__(self, host: str, port: int):
+    def __init__(self, host: str, port: int, pool_size: Optional[int] = None, idle_timeout: Optional[float] = None):
+        """
+        :param pool_size: The maximum number of idle connections to the MainApp to keep alive. (Defaults to
+        httpUtil.POOL_SIZE)
+        :param idle_timeout: The number of seconds after which idle connections are closed. (Defaults to
+        httpUtil.POOL_IDLE_TIMEOUT)
+        """
+        from drivebuildclient.httpUtil import get_pool
         self.host = host
         self.port = port
+        # NOTE All services connecting to the same MainApp share their connections
+        get_pool(host, port, pool_size, idle_timeout)
+
+    def close(self) -> None:
+        """
+        Closes all idle connections to the MainApp.
+        """
+        from drivebuildclient.httpUtil import get_pool
+        get_pool(self.host, self.port).close()
 
     @staticmethod
-    def _print_error(response: HTTPResponse) -> None:
+    def _print_error(response: BufferedResponse) -> None:
+        from drivebuildclient.httpUtil import read_response
         _logger.warning("Response status: " + str(response.status) + "\n"
                         + "Reason: " + response.reason + "\n"
                         + "Messsage:\n"
-                        + str(b"\n".join(response.readlines())))
+                        + str(read_response(response)))
 
     def wait_for_simulator_request(self, sid: SimulationID, vid: VehicleID) -> SimStateResponse.SimState:
         """
@@ -32,13 +49,13 @@ class AIExchangeService:
         value should be used to check whether the simulation is still running. Another vehicle or the even user may have
         stopped the simulation.
         """
-        from drivebuildclient.httpUtil import do_get_request
+        from drivebuildclient.httpUtil import do_get_request, read_response
         response = do_get_request(self.host, self.port, "/ai/waitForSimulatorRequest", {
             "sid": sid.SerializeToString(),
             "vid": vid.SerializeToString()
         })
         if response.status == 200:
-            result = b"".join(response.readlines())
+            result = read_response(response)
             sim_state = SimStateResponse()
             sim_state.ParseFromString(result)
             return sim_state.state
@@ -60,14 +77,14 @@ class AIExchangeService:
         on the type of data you requested. To find out how to access the data properly you should set a break point and
         checkout the content of the returned value using a debugger.
         """
-        from drivebuildclient.httpUtil import do_get_request
+        from drivebuildclient.httpUtil import do_get_request, read_response
         response = do_get_request(self.host, self.port, "/ai/requestData", {
             "request": request.SerializeToString(),
             "sid": sid.SerializeToString(),
             "vid": vid.SerializeToString()
         })
         if response.status == 200:
-            result = b"".join(response.readlines())
+            result = read_response(response)
             data_response = DataResponse()
             data_response.ParseFromString(result)
             return data_response
@@ -93,18 +110,44 @@ class AIExchangeService:
         control.avCommand.brake = <Brake intensity having a value between 0.0 and 1.0>
         :return: A Void object possibly containing a info message.
         """
-        from drivebuildclient.httpUtil import do_mixed_request
+        from drivebuildclient.httpUtil import do_mixed_request, read_response
         response = do_mixed_request(self.host, self.port, "/ai/control", {
             "sid": sid.SerializeToString(),
             "vid": vid.SerializeToString()
         }, commands.SerializeToString())
         if response.status == 200:
             void = Void()
-            void.ParseFromString(b"".join(response.readlines()))
+            void.ParseFromString(read_response(response))
             return void
         else:
             AIExchangeService._print_error(response)
 
+    def step(self, sid: SimulationID, vid: VehicleID, request: DataRequest,
+             commands: Optional[Control] = None) -> Optional[StepResponse]:
+        """
+        Combines control(...), wait_for_simulator_request(...) and request_data(...) into a single request. First the
+        given commands are applied, then this call blocks until the simulation requests the vehicle again and finally
+        the requested data of this next tick is returned.
+        :param sid: The ID of the simulation the vehicle is included in.
+        :param vid: The ID of the vehicle to control and to get collected data from.
+        :param request: The types of data to be requested about the given vehicle. (See request_data(...))
+        :param commands: The commands controlling the vehicle or the simulation. (See control(...)) None if there is
+        nothing to control like before the first tick.
+        :return: The current state of the simulation and if it is still running the requested data.
+        """
+        from drivebuildclient.httpUtil import do_mixed_request, read_response
+        response = do_mixed_request(self.host, self.port, "/ai/step", {
+            "sid": sid.SerializeToString(),
+            "vid": vid.SerializeToString(),
+            "request": request.SerializeToString()
+        }, commands.SerializeToString() if commands else b"")
+        if response.status == 200:
+            step_response = StepResponse()
+            step_response.ParseFromString(read_response(response))
+            return step_response
+        else:
+            AIExchangeService._print_error(response)
+
     def control_sim(self, sid: SimulationID, result: TestResult) -> Optional[Void]:
         """
         Force a simulation to end having the given result.
@@ -112,14 +155,14 @@ class AIExchangeService:
         :param result: The test result to be set to the simulation.
         :return: A Void object possibly containing a info message.
         """
-        from drivebuildclient.httpUtil import do_get_request
+        from drivebuildclient.httpUtil import do_get_request, read_response
         response = do_get_request(self.host, self.port, "/sim/stop", {
             "sid": sid.SerializeToString(),
             "result": result.SerializeToString()
         })
         if response.status == 200:
             void = Void()
-            void.ParseFromString(b"".join(response.readlines()))
+            void.ParseFromString(read_response(response))
             return void
         else:
             AIExchangeService._print_error(response)
@@ -130,13 +173,13 @@ class AIExchangeService:
         :param sid: The simulation to get the status of.
         :return: A string representing the status of the simulation like RUNNING, FINISHED or ERRORED.
         """
-        from drivebuildclient.httpUtil import do_get_request
+        from drivebuildclient.httpUtil import do_get_request, read_response
         import dill as pickle
         response = do_get_request(self.host, self.port, "/stats/status", {
             "sid": sid.SerializeToString()
         })
         if response.status == 200:
-            return pickle.loads(b"".join(response.readlines()))
+            return pickle.loads(read_response(response))
         else:
             AIExchangeService._print_error(response)
             return "Status could not be determined."
@@ -147,7 +190,7 @@ class AIExchangeService:
         :param sid: The simulation to get the test result of.
         :return: The current test result of the given simulation like SUCCEEDED, FAILED or CANCELLED.
         """
-        from drivebuildclient.httpUtil import do_get_request
+        from drivebuildclient.httpUtil import do_get_request, read_response
         import dill as pickle
         from time import sleep
         while True:  # Pseudo do-while-loop
@@ -155,7 +198,7 @@ class AIExchangeService:
                 "sid": sid.SerializeToString()
             })
             if response.status == 200:
-                result = pickle.loads(b"".join(response.readlines()))
+                result = pickle.loads(read_response(response))
                 if result == "UNKNOWN":
                     sleep(1)
                 else:
@@ -164,16 +207,19 @@ class AIExchangeService:
                 AIExchangeService._print_error(response)
                 return "Result could not be determined."
 
-    def get_trace(self, sid: SimulationID, vid: Optional[VehicleID] = None) -> List[Tuple[str, str, int, DataResponse]]:
+    def get_trace(self, sid: SimulationID, vid: Optional[VehicleID] = None,
+                  with_timing: bool = False) -> List[Tuple[Any, ...]]:
         """
         Return all the collected data of a single or all participants in a simulation.
         :param sid: The simulation to request all the collected data from.
         :param vid: The vehicle whose collected data has to be returned. If None this method returns all the collected
         data.
+        :param with_timing: Whether to append the CycleTiming of the verification cycle to each entry. The timing is
+        None for cycles which were stored without it.
         :return: The JSON serialized object representing all the collected data of a simulation or a participant in a
         simulation.
         """
-        from drivebuildclient.httpUtil import do_get_request
+        from drivebuildclient.httpUtil import do_get_request, read_response
         import dill as pickle
         args = {
             "sid": sid.SerializeToString()
@@ -182,7 +228,7 @@ class AIExchangeService:
             args["vid"] = vid.SerializeToString()
         response = do_get_request(self.host, self.port, "/stats/trace", args)
         if response.status == 200:
-            response_content = b"".join(response.readlines())
+            response_content = read_response(response)
             trace_data = pickle.loads(response_content)
             trace = []
             for entry in trace_data:
@@ -192,25 +238,52 @@ class AIExchangeService:
                 vid.vid = entry[1]
                 data = DataResponse()
                 data.ParseFromString(entry[3])
-                trace.append((sid, vid, entry[2], data))
+                if with_timing:
+                    timing = None
+                    if len(entry) > 7 and entry[7] is not None:
+                        from drivebuildclient.aiExchangeMessages_pb2 import CycleTiming
+                        timing = CycleTiming()
+                        timing.ParseFromString(bytes(entry[7]))
+                    trace.append((sid, vid, entry[2], data, timing))
+                else:
+                    trace.append((sid, vid, entry[2], data))
             return trace
         else:
             AIExchangeService._print_error(response)
             return "The trace could not be retrieved."
 
+    def get_metrics(self, sid: Optional[SimulationID] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the latency histograms of the phases of simulations (e.g. pollSensors, verify, aiWait, steps).
+        :param sid: The simulation to get the histograms of. If None the histograms of all simulations are returned.
+        The histograms of a finished simulation are only contained in the histograms over all finished simulations.
+        :return: A dict containing the histograms per running simulation and phase ("simulations"), the histograms per
+        phase over all finished simulations ("finished") and the histograms per phase over all simulations ("total").
+        None if the metrics could not be retrieved.
+        """
+        from drivebuildclient.httpUtil import do_get_request, read_response
+        from json import loads
+        args = {"sid": sid.SerializeToString()} if sid else {}
+        response = do_get_request(self.host, self.port, "/stats/metrics", args)
+        if response.status == 200:
+            return loads(read_response(response).decode())
+        else:
+            AIExchangeService._print_error(response)
+            return None
+
     def get_running_tests(self, user: User) -> SubmissionResult.Submissions:
         """
         Return the currently running tests of the given user.
         :param user: The user to get a list of running simulation for.
         :return: The list of running simulations initiated by the given user.
         """
-        from drivebuildclient.httpUtil import do_get_request
+        from drivebuildclient.httpUtil import do_get_request, read_response
         response = do_get_request(self.host, self.port, "/stats/getRunningSids", {
             "user": user.SerializeToString()
         })
         if response.status == 200:
             submission_result = SubmissionResult()
-            submission_result.ParseFromString(b"".join(response.readlines()))
+            submission_result.ParseFromString(read_response(response))
             return submission_result.result
         else:
             AIExchangeService._print_error(response)
@@ -224,7 +297,7 @@ class AIExchangeService:
         :return: A sequence containing simulation IDs for all *valid* test cases uploaded. Returns None iff the upload
         of tests failed or the tests could not be run. Returns an empty list of none of the given test cases was valid.
         """
-        from drivebuildclient.httpUtil import do_mixed_request
+        from drivebuildclient.httpUtil import do_mixed_request, read_response
         from tempfile import NamedTemporaryFile
         from zipfile import ZipFile
         from os import remove
@@ -257,7 +330,7 @@ class AIExchangeService:
             }, b"".join(read_zip_file.readlines()))
         remove(temp_file.name)
         submission_result = SubmissionResult()
-        submission_result.ParseFromString(b"".join(response.readlines()))
+        submission_result.ParseFromString(read_response(response))
         if response.status == 200:
             return submission_result.result
         else:
@@ -1,18 +1,73 @@
 from collections import defaultdict
+from enum import Enum
 from logging import getLogger
 from math import floor, log10
+from queue import Queue
 from socket import socket
-from threading import Lock
-from typing import Tuple, List, Callable
+from struct import Struct
+from threading import Lock, Semaphore, Event
+from typing import Tuple, List, Callable, Dict, Optional, Union, Iterable, Iterator
 
 name = "DriveBuild client"
+# NOTE In the binary wire format this limits the size of a single frame. Larger payloads are split into chunks.
 CONTENT_LENGTH_LIMIT: int = 10000000  # 10 millions
 # The length of the message transferring the content length
 CONTENT_LENGTH_MESSAGE_LENGTH: int = floor(log10(CONTENT_LENGTH_LIMIT)) + 1
-MAX_RETRY: int = 100
+# The maximum number of requests received via a single socket that are handled concurrently
+MAX_IN_FLIGHT_REQUESTS: int = 256
+# The number of connections a server socket queues until they are accepted
+DEFAULT_BACKLOG: int = 16
+# The maximum number of accepted connections a server socket handles concurrently
+MAX_CONNECTIONS: int = 64
+# The number of seconds an accepting server waits before checking whether it has to shut down
+ACCEPT_TIMEOUT: float = 1
+# The maximum number of received chunks of a streamed response which are buffered until they are consumed
+STREAM_BUFFER_CHUNKS: int = 8
+# The number of seconds a streamed response may stall all other responses of a channel before it is aborted
+STREAM_STALL_TIMEOUT: float = 10
+# The number of seconds to wait for the peer of a channel to agree on a compression codec
+NEGOTIATION_TIMEOUT: float = 5
 _logger = getLogger("DriveBuild.Client")
 
 
+class RequestFailedError(Exception):
+    """
+    Raised if the peer failed to produce the whole result of a request after parts of it were already sent.
+    """
+    pass
+
+
+class WireFormat(Enum):
+    """
+    The formats requests and responses can be exchanged with via sockets.
+    """
+    # An ASCII length message followed by the content for the action, the number of arguments and each argument
+    LEGACY = "LEGACY"
+    # A single frame with a fixed width binary header per request or response
+    BINARY = "BINARY"
+
+
+DEFAULT_WIRE_FORMAT: WireFormat = WireFormat.BINARY
+# NOTE The magic byte is no ASCII digit which allows to distinguish binary frames from legacy length messages
+FRAME_MAGIC: int = 0xDB
+FRAME_VERSION: int = 1
+# Magic byte, version, kind, flags, correlation ID, payload length
+_FRAME_HEADER = Struct("!BBBBII")
+_FRAME_KIND_REQUEST: int = 0
+_FRAME_KIND_RESPONSE: int = 1
+_FRAME_FLAG_MORE: int = 0x01  # Further frames having the same correlation ID continue the payload
+# Producing the payload failed. The frame terminates the payload (which is incomplete) and contains the cause.
+_FRAME_FLAG_ERROR: int = 0x02
+_FRAME_CODEC_SHIFT: int = 4  # The upper 4 bits of the flags contain the ID of the codec compressing the payload
+# The internal action negotiating the compression of frames sent over a connection
+_NEGOTIATE_COMPRESSION_ACTION: bytes = b"_negotiateCompression"
+_ACTION_LENGTH = Struct("!H")
+_NUM_ARGS = Struct("!H")
+_ARG_LENGTH = Struct("!I")
+# The result of handling a request. Results given as iterable are streamed part by part.
+HandlerResult = Union[bytes, Iterable[bytes]]
+
+
 def static_vars(**kwargs):
     """
     Decorator hack for introducing local static variables.
@@ -33,20 +88,75 @@ def static_vars(**kwargs):
     return decorate
 
 
-def create_server(port: int) -> socket:
+def create_server(port: int, backlog: int = DEFAULT_BACKLOG) -> socket:
     from socket import AF_INET, SOCK_STREAM, SOL_SOCKET, SO_REUSEADDR
     server_socket = socket(AF_INET, SOCK_STREAM)
     server_socket.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
     server_socket.bind(("0.0.0.0", port))
-    server_socket.listen(1)  # FIXME Determine appropriate value
+    server_socket.listen(backlog)
     return server_socket
 
 
-def accept_at_server(server_socket: socket, on_accept: Callable[[socket, Tuple[str, int]], None]) -> None:
-    while True:
-        conn, addr = server_socket.accept()
-        _logger.debug(str(server_socket.getsockname()) + " accepted " + str(addr))
+def _serve_connection(conn: socket, addr: Tuple[str, int], on_accept: Callable[[socket, Tuple[str, int]], None],
+                      connection_slots: Semaphore) -> None:
+    try:
         on_accept(conn, addr)
+    except Exception:
+        _logger.exception("Handling the connection to " + str(addr) + " failed")
+    finally:
+        connection_slots.release()
+
+
+@static_vars(stop_events=defaultdict(lambda: Event()), connection_threads=defaultdict(lambda: []))
+def accept_at_server(server_socket: socket, on_accept: Callable[[socket, Tuple[str, int]], None],
+                     max_connections: int = MAX_CONNECTIONS) -> None:
+    """
+    Accepts connections until shutdown_server(...) is called for the given server socket. Every accepted connection is
+    handled by on_accept in a separate thread, so a long running handler does not block further connections.
+    :param server_socket: The socket to accept connections at.
+    :param on_accept: The handler of an accepted connection.
+    :param max_connections: The maximum number of connections to handle concurrently. Further connections wait in the
+    backlog of the server socket until another handler finishes.
+    """
+    from socket import timeout
+    from threading import BoundedSemaphore, Thread
+    stop_event = accept_at_server.stop_events[server_socket]
+    connection_threads = accept_at_server.connection_threads[server_socket]
+    connection_slots = BoundedSemaphore(max_connections)
+    server_socket.settimeout(ACCEPT_TIMEOUT)
+    while not stop_event.is_set():
+        if not connection_slots.acquire(timeout=ACCEPT_TIMEOUT):
+            continue
+        try:
+            conn, addr = server_socket.accept()
+        except timeout:
+            connection_slots.release()
+            continue
+        except OSError:
+            connection_slots.release()
+            if not stop_event.is_set():
+                _logger.exception("Accepting connections at " + str(server_socket) + " failed")
+            break
+        conn.settimeout(None)
+        _logger.debug(str(server_socket.getsockname()) + " accepted " + str(addr))
+        connection_threads[:] = [t for t in connection_threads if t.is_alive()]
+        connection_thread = Thread(target=_serve_connection, args=(conn, addr, on_accept, connection_slots))
+        connection_thread.daemon = True
+        connection_thread.start()
+        connection_threads.append(connection_thread)
+
+
+def shutdown_server(server_socket: socket, timeout: Optional[float] = None) -> None:
+    """
+    Stops accepting connections at the given server socket and waits for the handlers of accepted connections to finish.
+    :param server_socket: The server socket passed to accept_at_server(...).
+    :param timeout: The maximum number of seconds to wait for each handler. None means waiting forever.
+    """
+    accept_at_server.stop_events[server_socket].set()
+    server_socket.close()
+    for connection_thread in accept_at_server.connection_threads.pop(server_socket, []):
+        connection_thread.join(timeout)
+    accept_at_server.stop_events.pop(server_socket, None)
 
 
 def create_client(server_host: str, server_port: int) -> socket:
@@ -72,47 +182,176 @@ def _send_message(sock: socket, message: bytes) -> None:
         _send_message.send_locks[sock].release()
 
 
-# FIXME Introduce method receiving bytes until reaching a certain number
+def _recv_exactly(sock: socket, length: int) -> bytearray:
+    """
+    Blocks until exactly the given number of bytes is received. The bytes are received directly into a buffer which is
+    preallocated once, so receiving large messages does not create intermediate copies.
+    :param sock: The socket to receive from.
+    :param length: The number of bytes to receive.
+    :return: The received bytes.
+    """
+    received = bytearray(length)
+    view = memoryview(received)
+    num_received = 0
+    while num_received < length:
+        num_new = sock.recv_into(view[num_received:], length - num_received)
+        if num_new == 0:
+            raise ConnectionResetError("The socket " + str(sock.getsockname()) + " was closed while receiving.")
+        num_received += num_new
+    return received
+
+
 @static_vars(recv_locks=defaultdict(lambda: Lock()))
-def _recv_message(sock: socket) -> bytes:
-    from time import sleep
-    _recv_message.recv_locks[sock].acquire()
-    _logger.debug(str(sock.getsockname()) + " waiting for recv message length")
-    try:
-        tries = 0
-        while tries < MAX_RETRY:
-            content_length_message = sock.recv(CONTENT_LENGTH_MESSAGE_LENGTH).decode().strip()
-            _logger.debug(str(sock.getsockname()) + " got message length message: " + content_length_message)
-            if content_length_message:
-                content_length = int(content_length_message)
-                _logger.debug(
-                    str(sock.getsockname()) + " waits for receiving a message of length " + str(content_length))
-                break
-            else:
-                tries = tries + 1
-                sleep(1)
+def _recv_message(sock: socket) -> bytearray:
+    with _recv_message.recv_locks[sock]:
+        _logger.debug(str(sock.getsockname()) + " waiting for recv message length")
+        content_length_message = _recv_exactly(sock, CONTENT_LENGTH_MESSAGE_LENGTH).decode().strip()
+        _logger.debug(str(sock.getsockname()) + " got message length message: " + content_length_message)
+        try:
+            content_length = int(content_length_message)
+        except ValueError as ex:
+            _logger.warning("The socket stream of " + str(sock.getsockname())
+                            + " got corrupted. It is likely that any further message will also break. Cause: "
+                            + str(ex))
+            return bytearray()
+        _logger.debug(str(sock.getsockname()) + " waits for receiving a message of length " + str(content_length))
+        return _recv_exactly(sock, content_length)
+
+
+@static_vars(counter=0, lock=Lock())
+def _next_correlation_id() -> int:
+    with _next_correlation_id.lock:
+        _next_correlation_id.counter = (_next_correlation_id.counter + 1) % (1 << 32)
+        return _next_correlation_id.counter
+
+
+def _pack_request(action: bytes, data: List[bytes]) -> bytes:
+    """
+    Packs an action and all its arguments into the payload of a single binary frame.
+    """
+    parts = [_ACTION_LENGTH.pack(len(action)), action, _NUM_ARGS.pack(len(data))]
+    for d in data:
+        parts.append(_ARG_LENGTH.pack(len(d)))
+        parts.append(d)
+    return b"".join(parts)
+
+
+def _unpack_request(payload: bytearray) -> Tuple[bytes, List[memoryview]]:
+    """
+    Inverse of _pack_request(...).
+    :return: The action and its arguments. The arguments are views on the given payload and do not copy it.
+    """
+    view = memoryview(payload)
+    (action_length,) = _ACTION_LENGTH.unpack_from(payload, 0)
+    offset = _ACTION_LENGTH.size
+    action = bytes(view[offset:offset + action_length])
+    offset += action_length
+    (num_args,) = _NUM_ARGS.unpack_from(payload, offset)
+    offset += _NUM_ARGS.size
+    data = []
+    for _ in range(num_args):
+        (arg_length,) = _ARG_LENGTH.unpack_from(payload, offset)
+        offset += _ARG_LENGTH.size
+        data.append(view[offset:offset + arg_length])
+        offset += arg_length
+    return action, data
+
+
+@static_vars(codecs={})
+def _send_frame(sock: socket, kind: int, correlation_id: int, payload: bytes, more: bool = False,
+                error: bool = False) -> None:
+    """
+    Sends the given payload as binary frame. A payload exceeding CONTENT_LENGTH_LIMIT is split into multiple frames
+    which are sent one after another. Frames of other requests or responses may be interleaved. If a codec was
+    negotiated for the socket frames exceeding COMPRESSION_THRESHOLD are compressed.
+    :param more: Whether further frames continue the given payload.
+    :param error: Whether the payload describes why producing a result failed (see _FRAME_FLAG_ERROR).
+    """
+    from drivebuildclient.compression import COMPRESSION_THRESHOLD
+    codec = _send_frame.codecs.get(sock)
+    view = memoryview(payload)
+    payload_length = len(view)
+    _logger.debug(str(sock.getpeername()) + " sending " + str(payload_length) + " bytes")
+    offset = 0
+    while True:  # Pseudo "do-while"-loop
+        chunk = view[offset:offset + CONTENT_LENGTH_LIMIT]
+        offset += len(chunk)
+        if more or offset < payload_length:
+            flags = _FRAME_FLAG_MORE
         else:
-            _logger.warning("Did not receive content length message.")
-            return b""
-    except ConnectionResetError:
-        _logger.info("The socket " + str(sock.getsockname()) + " was closed.")
-        content_length = 0
-    except Exception as ex:
-        _logger.warning("The socket stream of " + str(sock.getsockname())
-                        + " got corrupted. It is likely that any further message will also break. Cause: " + str(ex))
-        content_length = 0
-    received_message = b""
-    while len(received_message) < content_length:
-        received_message = received_message + sock.recv(content_length - len(received_message))
-    _recv_message.recv_locks[sock].release()
-    return received_message
-
-
-@static_vars(process_locks=defaultdict(lambda: Lock()))
-def process_request(sock: socket, handle_message: Callable[[bytes, List[bytes]], bytes]) -> None:
+            flags = _FRAME_FLAG_ERROR if error else 0
+        if codec and len(chunk) >= COMPRESSION_THRESHOLD:
+            compressed = codec.compress(chunk)
+            if len(compressed) < len(chunk):
+                chunk = compressed
+                flags |= codec.codec_id << _FRAME_CODEC_SHIFT
+        header = _FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, kind, flags, correlation_id, len(chunk))
+        with _send_message.send_locks[sock]:
+            sock.sendall(header + chunk)
+        if offset >= payload_length:
+            break
+
+
+def _send_result(sock: socket, kind: int, correlation_id: int, result: HandlerResult) -> None:
+    """
+    Sends a result as binary frames. Iterable results are streamed part by part and terminated by an empty frame, so
+    only a single part has to be in memory at once. If producing a part fails the stream is terminated by an error frame
+    instead such that the requester does not mistake the parts sent so far for the whole result.
+    """
+    if isinstance(result, (bytes, bytearray, memoryview)):
+        _send_frame(sock, kind, correlation_id, result)
+    else:
+        try:
+            for part in result:
+                _send_frame(sock, kind, correlation_id, part, True)
+        except OSError:
+            raise
+        except Exception as ex:
+            _logger.exception("Streaming the result of request " + str(correlation_id) + " failed.")
+            _send_frame(sock, kind, correlation_id, repr(ex).encode(), error=True)
+        else:
+            _send_frame(sock, kind, correlation_id, b"")
+
+
+def _join_parts(parts: List[bytearray]) -> bytearray:
+    return parts[0] if len(parts) == 1 else bytearray().join(parts)
+
+
+def _recv_frame(sock: socket) -> Tuple[int, int, int, bytearray]:
+    """
+    Receives a single binary frame.
+    :return: The kind of the frame, its correlation ID, its flags and its payload.
+    """
+    magic, version, kind, flags, correlation_id, payload_length \
+        = _FRAME_HEADER.unpack(_recv_exactly(sock, _FRAME_HEADER.size))
+    if magic != FRAME_MAGIC:
+        raise ValueError("The socket " + str(sock.getsockname()) + " received a corrupted frame header.")
+    if version != FRAME_VERSION:
+        raise ValueError("Frames of version " + str(version) + " are not supported.")
+    if payload_length > CONTENT_LENGTH_LIMIT:
+        raise ValueError("The socket " + str(sock.getsockname()) + " received a frame exceeding "
+                         + str(CONTENT_LENGTH_LIMIT) + " bytes.")
+    payload = _recv_exactly(sock, payload_length)
+    codec_id = flags >> _FRAME_CODEC_SHIFT
+    if codec_id:
+        from drivebuildclient.compression import get_codec_by_id
+        codec = get_codec_by_id(codec_id)
+        if not codec:
+            raise ValueError("The socket " + str(sock.getsockname())
+                             + " received a frame compressed by the unknown codec " + str(codec_id) + ".")
+        payload = bytearray(codec.decompress(payload))
+    return kind, correlation_id, flags, payload
+
+
+def _is_binary_frame_pending(sock: socket) -> bool:
+    from socket import MSG_PEEK
+    first_byte = sock.recv(1, MSG_PEEK)
+    return bool(first_byte) and first_byte[0] == FRAME_MAGIC
+
+
+def _recv_legacy_request(sock: socket) -> Tuple[bytes, List[bytes]]:
     from drivebuildclient.aiExchangeMessages_pb2 import Num
     socket_name = str(sock.getsockname())
-    process_request.process_locks[socket_name].acquire()
     action = _recv_message(sock)
     _logger.debug(socket_name + " received action " + action.decode())
     num_data = Num()
@@ -122,35 +361,333 @@ def process_request(sock: socket, handle_message: Callable[[bytes, List[bytes]],
     for _ in range(num_data.num):
         data.append(_recv_message(sock))
         _logger.debug(socket_name + " received data " + str(data[-1]))
-    process_request.process_locks[socket_name].release()
-    # FIXME Include the send call to the blocked section?
-    result = handle_message(action, data)
-    _logger.debug(socket_name + " sends result")
-    _send_message(sock, result)
+    return action, data
+
+
+def _handle_binary_request(sock: socket, handle_message: Callable[[bytes, List[bytes]], HandlerResult],
+                           correlation_id: int, action: bytes, data: List[bytes],
+                           in_flight: Optional[Semaphore] = None) -> None:
+    try:
+        result = handle_message(action, data)
+    except Exception:
+        _logger.exception("Handling the action \"" + action.decode() + "\" failed")
+        result = b""
+    try:
+        _logger.debug(str(sock.getsockname()) + " sends result of request " + str(correlation_id))
+        _send_result(sock, _FRAME_KIND_RESPONSE, correlation_id, result)
+    except OSError:
+        _logger.info("The result of request " + str(correlation_id) + " could not be sent.")
+    finally:
+        if in_flight:
+            in_flight.release()
+
+
+def _accept_compression(sock: socket, correlation_id: int, offered_codecs: List[bytes]) -> None:
+    """
+    Chooses the codec for compressing frames sent over the given socket out of the codecs offered by its peer.
+    """
+    from drivebuildclient.compression import negotiate
+    codec = negotiate([bytes(name).decode() for name in offered_codecs])
+    if codec:
+        _send_frame.codecs[sock] = codec
+        _logger.debug(str(sock.getsockname()) + " compresses frames using " + codec.name)
+    _send_frame(sock, _FRAME_KIND_RESPONSE, correlation_id, codec.name.encode() if codec else b"")
 
 
+@static_vars(process_locks=defaultdict(lambda: Lock()), partial_requests=defaultdict(lambda: {}))
+def process_request(sock: socket, handle_message: Callable[[bytes, List[bytes]], HandlerResult],
+                    in_flight: Optional[Semaphore] = None) -> None:
+    """
+    Receives a single request, handles it and sends back its result. The wire format of the request is detected
+    automatically and the result is sent back using the same format.
+    :param in_flight: If given, requests in the binary format are handled in a separate thread which allows to handle
+    multiple requests concurrently. The semaphore limits the number of requests handled at the same time.
+    """
+    from threading import Thread
+    socket_name = str(sock.getsockname())
+    # NOTE All connections accepted at the same port share their socket name but must not block each other
+    with process_request.process_locks[sock]:
+        if _is_binary_frame_pending(sock):
+            wire_format = WireFormat.BINARY
+            # NOTE Chunks of requests that are larger than a single frame may be interleaved
+            partial_requests = process_request.partial_requests[sock]
+            while True:
+                _, correlation_id, flags, payload = _recv_frame(sock)
+                parts = partial_requests.pop(correlation_id, [])
+                parts.append(payload)
+                if flags & _FRAME_FLAG_MORE:
+                    partial_requests[correlation_id] = parts
+                else:
+                    break
+            action, data = _unpack_request(_join_parts(parts))
+            _logger.debug(socket_name + " received action " + action.decode() + " with " + str(len(data))
+                          + " arguments")
+        else:
+            wire_format = WireFormat.LEGACY
+            correlation_id = 0
+            action, data = _recv_legacy_request(sock)
+    if wire_format is WireFormat.BINARY:
+        if action == _NEGOTIATE_COMPRESSION_ACTION:
+            _accept_compression(sock, correlation_id, data)
+        elif in_flight:
+            in_flight.acquire()
+            handler_thread = Thread(target=_handle_binary_request,
+                                    args=(sock, handle_message, correlation_id, action, data, in_flight))
+            handler_thread.daemon = True
+            handler_thread.start()
+        else:
+            _handle_binary_request(sock, handle_message, correlation_id, action, data)
+    else:
+        # FIXME Include the send call to the blocked section?
+        result = handle_message(action, data)
+        _logger.debug(socket_name + " sends result")
+        if not isinstance(result, (bytes, bytearray, memoryview)):
+            result = b"".join(result)  # NOTE The legacy format does not support streaming
+        _send_message(sock, result)
 
-def process_requests(waiting_socket: socket, handle_message: Callable[[bytes, List[bytes]], bytes]) -> None:
+
+def process_requests(waiting_socket: socket, handle_message: Callable[[bytes, List[bytes]], HandlerResult],
+                     max_in_flight: int = MAX_IN_FLIGHT_REQUESTS) -> None:
+    """
+    Processes all requests received via the given socket. Requests in the binary format are handled concurrently so
+    their results may be sent back in a different order than the requests arrived. If handle_message returns an
+    iterable the parts of the result are streamed to the requester as soon as they are available.
+    NOTE Since handle_message may be called by multiple threads at once it has to synchronize any shared state itself.
+    :param max_in_flight: The maximum number of requests to handle concurrently.
+    """
+    from threading import BoundedSemaphore
+    in_flight = BoundedSemaphore(max_in_flight)
     # FIXME How to recover failures?
     try:
         while True:
-            process_request(waiting_socket, handle_message)
+            process_request(waiting_socket, handle_message, in_flight)
     except (ConnectionAbortedError, ConnectionResetError):
         _logger.info("The socket " + str(waiting_socket.getsockname()) + " was closed.")
+    finally:
+        process_request.process_locks.pop(waiting_socket, None)
+        process_request.partial_requests.pop(waiting_socket, None)
+        _send_frame.codecs.pop(waiting_socket, None)
+
+
+class RequestChannel:
+    """
+    Multiplexes requests over a single socket using the binary wire format. Any number of threads may have requests in
+    flight at the same time. Responses may arrive in any order and are matched to their requests by correlation IDs.
+    NOTE The peer has to process the requests using process_requests(...).
+    """
+
+    def __init__(self, sock: socket, compress: bool = True) -> None:
+        """
+        :param compress: Whether to negotiate a codec with the peer for compressing large requests and results. The
+        negotiation takes place when sending the first request.
+        """
+        from threading import Thread
+        self.sock = sock
+        self._pending: Dict[int, Queue] = {}
+        self._pending_lock = Lock()
+        self._closed = False
+        self._negotiate = compress
+        self._negotiation_lock = Lock()
+        self._receiver = Thread(target=self._receive_responses)
+        self._receiver.daemon = True
+        self._receiver.start()
+
+    def _negotiate_compression(self) -> None:
+        from drivebuildclient.compression import supported_codecs, get_codec
+        if not self._negotiate:
+            return
+        with self._negotiation_lock:
+            if not self._negotiate:
+                return
+            self._negotiate = False  # NOTE Concurrent requests are sent uncompressed until a codec is agreed on
+        offered_codecs = [name.encode() for name in supported_codecs()]
+        try:
+            result = self.send_request(_NEGOTIATE_COMPRESSION_ACTION, offered_codecs, timeout=NEGOTIATION_TIMEOUT)
+        except TimeoutError:
+            result = b""
+        # NOTE Peers not knowing the action answer with arbitrary results
+        codec = get_codec(bytes(result).decode(errors="ignore"))
+        if codec:
+            _send_frame.codecs[self.sock] = codec
+            _logger.info("The request channel over " + str(self.sock.getsockname()) + " compresses frames using "
+                         + codec.name + ".")
+        else:
+            _logger.info("The request channel over " + str(self.sock.getsockname()) + " does not compress frames.")
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def send_request(self, action: bytes, data: List[bytes], timeout: Optional[float] = None) -> bytes:
+        """
+        Sends a request and blocks until its result is received.
+        :param action: The action to request.
+        :param data: The arguments of the action.
+        :param timeout: The maximum number of seconds to wait for the result. None means waiting forever.
+        :return: The result of the request. Returns an empty result if the channel got closed.
+        :raises RequestFailedError: If the peer failed to produce the whole result.
+        :raises TimeoutError: If the result was not received within the given number of seconds. A late result is
+        dropped.
+        """
+        from queue import Empty
+        correlation_id, response = self._dispatch(action, data)
+        if not response:
+            return b""
+        try:
+            parts = list(self._receive_parts(correlation_id, response, timeout))
+            return _join_parts(parts) if parts else b""
+        except Empty:
+            message = "The request " + str(correlation_id) + " (" + action.decode() + ") timed out."
+            _logger.warning(message)
+            raise TimeoutError(message) from None
+        except ConnectionAbortedError:
+            return b""
+
+    def send_request_streamed(self, action: bytes, data: List[bytes],
+                              timeout: Optional[float] = None) -> Iterator[bytearray]:
+        """
+        Sends a request and returns its result part by part as soon as the parts are received. At most
+        STREAM_BUFFER_CHUNKS parts are buffered, further parts are only received once buffered ones are consumed.
+        :param action: The action to request.
+        :param data: The arguments of the action.
+        :param timeout: The maximum number of seconds to wait for the next part. None means waiting forever.
+        :return: The parts of the result. Stops early if the channel got closed. Iterating raises a RequestFailedError
+        if the peer failed to produce the whole result and a TimeoutError if the next part was not received in time.
+        """
+        correlation_id, response = self._dispatch(action, data)
+        if not response:
+            return iter([])
+
+        def _stream() -> Iterator[bytearray]:
+            from queue import Empty
+            try:
+                yield from self._receive_parts(correlation_id, response, timeout)
+            except Empty:
+                message = "The request " + str(correlation_id) + " (" + action.decode() + ") timed out."
+                _logger.warning(message)
+                raise TimeoutError(message) from None
+            except ConnectionAbortedError:
+                pass
+
+        return _stream()
+
+    def _dispatch(self, action: bytes, data: List[bytes]) -> Tuple[int, Optional[Queue]]:
+        self._negotiate_compression()
+        correlation_id = _next_correlation_id()
+        response = Queue(maxsize=STREAM_BUFFER_CHUNKS)
+        with self._pending_lock:
+            if self._closed:
+                _logger.warning("Can not send the action \"" + action.decode() + "\" over a closed channel.")
+                return correlation_id, None
+            self._pending[correlation_id] = response
+        try:
+            _send_frame(self.sock, _FRAME_KIND_REQUEST, correlation_id, _pack_request(action, data))
+        except BaseException:
+            with self._pending_lock:
+                self._pending.pop(correlation_id, None)
+            raise
+        return correlation_id, response
+
+    def _receive_parts(self, correlation_id: int, response: Queue,
+                       timeout: Optional[float]) -> Iterator[bytearray]:
+        try:
+            while True:
+                payload, flags = response.get(timeout=timeout)
+                if payload is None:
+                    raise ConnectionAbortedError("The channel was closed before receiving the whole result.")
+                if flags & _FRAME_FLAG_ERROR:
+                    raise RequestFailedError("The request " + str(correlation_id) + " failed: "
+                                             + bytes(payload).decode(errors="replace"))
+                if payload:
+                    yield payload
+                if not flags & _FRAME_FLAG_MORE:
+                    break
+        finally:
+            with self._pending_lock:
+                self._pending.pop(correlation_id, None)
+
+    def close(self) -> None:
+        from socket import SHUT_RDWR
+        try:
+            self.sock.shutdown(SHUT_RDWR)
+        except OSError:
+            pass  # The socket is already closed
+        self.sock.close()
+
+    def _receive_responses(self) -> None:
+        from queue import Full
+        try:
+            while True:
+                _, correlation_id, flags, payload = _recv_frame(self.sock)
+                with self._pending_lock:
+                    response = self._pending.get(correlation_id)
+                if not response:
+                    _logger.debug("Dropped a response to request " + str(correlation_id) + " nobody waits for.")
+                    continue
+                try:
+                    # NOTE Blocks further responses until the requester consumed buffered parts
+                    response.put((payload, flags), timeout=STREAM_STALL_TIMEOUT)
+                except Full:
+                    _logger.warning("Aborted the response to request " + str(correlation_id)
+                                    + " since its parts are not consumed.")
+                    with self._pending_lock:
+                        self._pending.pop(correlation_id, None)
+                    self._abort(response)
+        except (OSError, ValueError):
+            _logger.info("The request channel over " + str(self.sock) + " was closed.")
+        finally:
+            _send_frame.codecs.pop(self.sock, None)
+            with self._pending_lock:
+                self._closed = True
+                for response in self._pending.values():
+                    self._abort(response)
+
+    @staticmethod
+    def _abort(response: Queue) -> None:
+        with response.mutex:
+            response.queue.clear()
+        response.put((None, 0))
 
 
 @static_vars(request_locks=defaultdict(lambda: Lock()))
-def send_request(sock: socket, action: bytes, data: List[bytes]) -> bytes:
+def send_request(sock: socket, action: bytes, data: List[bytes],
+                 wire_format: WireFormat = DEFAULT_WIRE_FORMAT) -> bytes:
+    """
+    Sends a request and blocks until its result is received.
+    :param sock: The socket to send the request over.
+    :param action: The action to request.
+    :param data: The arguments of the action.
+    :param wire_format: The format to use for exchanging the request. Use WireFormat.LEGACY for communicating with
+    nodes not supporting binary frames.
+    :return: The result of the request.
+    :raises RequestFailedError: If the peer failed to produce the whole result.
+    """
     from drivebuildclient.aiExchangeMessages_pb2 import Num
-    send_request.request_locks[sock].acquire()
-    _send_message(sock, action)
-    num_data = Num()
-    num_data.num = len(data)
-    if num_data.num == 0:
-        num_data.num = -1
-    _send_message(sock, num_data.SerializeToString())
-    for d in data:
-        _send_message(sock, d)
-    result = _recv_message(sock)
-    send_request.request_locks[sock].release()
-    return result
+    if wire_format is WireFormat.BINARY:
+        parts = []
+        with send_request.request_locks[sock]:
+            correlation_id = _next_correlation_id()
+            _send_frame(sock, _FRAME_KIND_REQUEST, correlation_id, _pack_request(action, data))
+            while True:
+                _, response_id, flags, payload = _recv_frame(sock)
+                if response_id != correlation_id:
+                    # NOTE This is e.g. the late response to a request whose requester gave up waiting for it
+                    _logger.warning("Discarding a frame of the response to request " + str(response_id)
+                                    + " while waiting for the response to request " + str(correlation_id) + ".")
+                    continue
+                if flags & _FRAME_FLAG_ERROR:
+                    raise RequestFailedError("The request " + str(correlation_id) + " failed: "
+                                             + bytes(payload).decode(errors="replace"))
+                parts.append(payload)
+                if not flags & _FRAME_FLAG_MORE:
+                    break
+        return _join_parts(parts)
+    with send_request.request_locks[sock]:
+        _send_message(sock, action)
+        num_data = Num()
+        num_data.num = len(data)
+        if num_data.num == 0:
+            num_data.num = -1
+        _send_message(sock, num_data.SerializeToString())
+        for d in data:
+            _send_message(sock, d)
+        return _recv_message(sock)
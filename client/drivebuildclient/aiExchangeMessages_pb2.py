@@ -19,11 +19,37 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   package='',
   syntax='proto3',
   serialized_options=_b('\220\001\000'),
-  serialized_pb=_b('\n\x18\x61iExchangeMessages.proto\"\"\n\x0b\x44\x61taRequest\x12\x13\n\x0brequest_ids\x18\x01 \x03(\t\"\xfb\t\n\x0c\x44\x61taResponse\x12%\n\x04\x64\x61ta\x18\x01 \x03(\x0b\x32\x17.DataResponse.DataEntry\x1a\x82\t\n\x04\x44\x61ta\x12/\n\x08position\x18\x01 \x01(\x0b\x32\x1b.DataResponse.Data.PositionH\x00\x12)\n\x05speed\x18\x02 \x01(\x0b\x32\x18.DataResponse.Data.SpeedH\x00\x12\x31\n\x05\x61ngle\x18\x03 \x01(\x0b\x32 .DataResponse.Data.SteeringAngleH\x00\x12)\n\x05lidar\x18\x04 \x01(\x0b\x32\x18.DataResponse.Data.LidarH\x00\x12+\n\x06\x63\x61mera\x18\x05 \x01(\x0b\x32\x19.DataResponse.Data.CameraH\x00\x12+\n\x06\x64\x61mage\x18\x06 \x01(\x0b\x32\x19.DataResponse.Data.DamageH\x00\x12\x45\n\x14road_center_distance\x18\x07 \x01(\x0b\x32%.DataResponse.Data.RoadCenterDistanceH\x00\x12>\n\x11\x63\x61r_to_lane_angle\x18\x08 \x01(\x0b\x32!.DataResponse.Data.CarToLaneAngleH\x00\x12\x36\n\x0c\x62ounding_box\x18\t \x01(\x0b\x32\x1e.DataResponse.Data.BoundingBoxH\x00\x12\x32\n\nroad_edges\x18\n \x01(\x0b\x32\x1c.DataResponse.Data.RoadEdgesH\x00\x12)\n\x05\x65rror\x18\x0b \x01(\x0b\x32\x18.DataResponse.Data.ErrorH\x00\x1a \n\x08Position\x12\t\n\x01x\x18\x01 \x01(\x01\x12\t\n\x01y\x18\x02 \x01(\x01\x1a\x16\n\x05Speed\x12\r\n\x05speed\x18\x01 \x01(\x01\x1a\x1e\n\rSteeringAngle\x12\r\n\x05\x61ngle\x18\x01 \x01(\x01\x1a\x17\n\x05Lidar\x12\x0e\n\x06points\x18\x01 \x03(\x01\x1a\x39\n\x06\x43\x61mera\x12\r\n\x05\x63olor\x18\x01 \x01(\x0c\x12\x11\n\tannotated\x18\x02 \x01(\x0c\x12\r\n\x05\x64\x65pth\x18\x03 \x01(\x0c\x1a\x1c\n\x06\x44\x61mage\x12\x12\n\nis_damaged\x18\x01 \x01(\x08\x1a\x37\n\x12RoadCenterDistance\x12\x0f\n\x07road_id\x18\x01 \x01(\t\x12\x10\n\x08\x64istance\x18\x02 \x01(\x02\x1a\x30\n\x0e\x43\x61rToLaneAngle\x12\x0f\n\x07lane_id\x18\x01 \x01(\t\x12\r\n\x05\x61ngle\x18\x02 \x01(\x02\x1a\x1d\n\x0b\x42oundingBox\x12\x0e\n\x06points\x18\x01 \x03(\x02\x1a\xcf\x01\n\tRoadEdges\x12\x36\n\x05\x65\x64ges\x18\x01 \x03(\x0b\x32\'.DataResponse.Data.RoadEdges.EdgesEntry\x1a\x35\n\x08RoadEdge\x12\x13\n\x0bleft_points\x18\x01 \x03(\x02\x12\x14\n\x0cright_points\x18\x02 \x03(\x02\x1aS\n\nEdgesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x34\n\x05value\x18\x02 \x01(\x0b\x32%.DataResponse.Data.RoadEdges.RoadEdge:\x02\x38\x01\x1a\x18\n\x05\x45rror\x12\x0f\n\x07message\x18\x01 \x01(\tB\x06\n\x04\x64\x61ta\x1a?\n\tDataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12!\n\x05value\x18\x02 \x01(\x0b\x32\x12.DataResponse.Data:\x02\x38\x01\"\x91\x02\n\x07\x43ontrol\x12\'\n\tavCommand\x18\x01 \x01(\x0b\x32\x12.Control.AvCommandH\x00\x12)\n\nsimCommand\x18\x02 \x01(\x0b\x32\x13.Control.SimCommandH\x00\x1a=\n\tAvCommand\x12\x12\n\naccelerate\x18\x01 \x01(\x01\x12\r\n\x05steer\x18\x02 \x01(\x01\x12\r\n\x05\x62rake\x18\x03 \x01(\x01\x1ah\n\nSimCommand\x12,\n\x07\x63ommand\x18\x01 \x01(\x0e\x32\x1b.Control.SimCommand.Command\",\n\x07\x43ommand\x12\x0b\n\x07SUCCEED\x10\x00\x12\x08\n\x04\x46\x41IL\x10\x01\x12\n\n\x06\x43\x41NCEL\x10\x02\x42\t\n\x07\x63ommand\"L\n\x12VerificationResult\x12\x14\n\x0cprecondition\x18\x01 \x01(\t\x12\x0f\n\x07\x66\x61ilure\x18\x02 \x01(\t\x12\x0f\n\x07success\x18\x03 \x01(\t\"\x18\n\tVehicleID\x12\x0b\n\x03vid\x18\x01 \x01(\t\"\x1a\n\nVehicleIDs\x12\x0c\n\x04vids\x18\x01 \x03(\t\"\x1b\n\x0cSimulationID\x12\x0b\n\x03sid\x18\x01 \x01(\t\"\x1d\n\rSimulationIDs\x12\x0c\n\x04sids\x18\x01 \x03(\t\"\x88\x02\n\x10SubmissionResult\x12/\n\x06result\x18\x01 \x01(\x0b\x32\x1d.SubmissionResult.SubmissionsH\x00\x12\x18\n\x07message\x18\x02 \x01(\x0b\x32\x05.VoidH\x00\x1a\x95\x01\n\x0bSubmissions\x12\x43\n\x0bsubmissions\x18\x01 \x03(\x0b\x32..SubmissionResult.Submissions.SubmissionsEntry\x1a\x41\n\x10SubmissionsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x1c\n\x05value\x18\x02 \x01(\x0b\x32\r.SimulationID:\x02\x38\x01\x42\x11\n\x0fmay_submissions\" \n\x10SimulationNodeID\x12\x0c\n\x04snid\x18\x01 \x01(\t\"\x12\n\x03Num\x12\x0b\n\x03num\x18\x01 \x01(\x05\"\x15\n\x04\x42ool\x12\r\n\x05value\x18\x01 \x01(\x08\"\x99\x01\n\x10SimStateResponse\x12)\n\x05state\x18\x01 \x01(\x0e\x32\x1a.SimStateResponse.SimState\"Z\n\x08SimState\x12\x0b\n\x07\x44\x45\x46\x41ULT\x10\x00\x12\x0b\n\x07RUNNING\x10\x01\x12\x0c\n\x08\x46INISHED\x10\x02\x12\x0c\n\x08\x43\x41NCELED\x10\x03\x12\x0b\n\x07TIMEOUT\x10\x04\x12\x0b\n\x07UNKNOWN\x10\x05\"|\n\nTestResult\x12\"\n\x06result\x18\x01 \x01(\x0e\x32\x12.TestResult.Result\"J\n\x06Result\x12\x0b\n\x07\x44\x45\x46\x41ULT\x10\x00\x12\r\n\tSUCCEEDED\x10\x01\x12\n\n\x06\x46\x41ILED\x10\x02\x12\x0b\n\x07SKIPPED\x10\x03\x12\x0b\n\x07UNKNOWN\x10\x04\"\x17\n\x04Void\x12\x0f\n\x07message\x18\x01 \x01(\t\"*\n\x04User\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\tB\x03\x90\x01\x00\x62\x06proto3')
+  serialized_pb=_b('\n\x18\x61iExchangeMessages.proto\"\"\n\x0b\x44\x61taRequest\x12\x13\n\x0brequest_ids\x18\x01 \x03(\t\"\xb9\x0b\n\x0c\x44\x61taResponse\x12%\n\x04\x64\x61ta\x18\x01 \x03(\x0b\x32\x17.DataResponse.DataEntry\x1a\xc0\n\n\x04\x44\x61ta\x12/\n\x08position\x18\x01 \x01(\x0b\x32\x1b.DataResponse.Data.PositionH\x00\x12)\n\x05speed\x18\x02 \x01(\x0b\x32\x18.DataResponse.Data.SpeedH\x00\x12\x31\n\x05\x61ngle\x18\x03 \x01(\x0b\x32 .DataResponse.Data.SteeringAngleH\x00\x12)\n\x05lidar\x18\x04 \x01(\x0b\x32\x18.DataResponse.Data.LidarH\x00\x12+\n\x06\x63\x61mera\x18\x05 \x01(\x0b\x32\x19.DataResponse.Data.CameraH\x00\x12+\n\x06\x64\x61mage\x18\x06 \x01(\x0b\x32\x19.DataResponse.Data.DamageH\x00\x12\x45\n\x14road_center_distance\x18\x07 \x01(\x0b\x32%.DataResponse.Data.RoadCenterDistanceH\x00\x12>\n\x11\x63\x61r_to_lane_angle\x18\x08 \x01(\x0b\x32!.DataResponse.Data.CarToLaneAngleH\x00\x12\x36\n\x0c\x62ounding_box\x18\t \x01(\x0b\x32\x1e.DataResponse.Data.BoundingBoxH\x00\x12\x32\n\nroad_edges\x18\n \x01(\x0b\x32\x1c.DataResponse.Data.RoadEdgesH\x00\x12)\n\x05\x65rror\x18\x0b \x01(\x0b\x32\x18.DataResponse.Data.ErrorH\x00\x1a \n\x08Position\x12\t\n\x01x\x18\x01 \x01(\x01\x12\t\n\x01y\x18\x02 \x01(\x01\x1a\x16\n\x05Speed\x12\r\n\x05speed\x18\x01 \x01(\x01\x1a\x1e\n\rSteeringAngle\x12\r\n\x05\x61ngle\x18\x01 \x01(\x01\x1a\x17\n\x05Lidar\x12\x0e\n\x06points\x18\x01 \x03(\x01\x1a\xf6\x01\n\x06\x43\x61mera\x12\r\n\x05\x63olor\x18\x01 \x01(\x0c\x12\x11\n\tannotated\x18\x02 \x01(\x0c\x12\r\n\x05\x64\x65pth\x18\x03 \x01(\x0c\x12\x34\n\x08\x65ncoding\x18\x04 \x01(\x0e\x32\".DataResponse.Data.Camera.Encoding\x12\r\n\x05width\x18\x05 \x01(\r\x12\x0e\n\x06height\x18\x06 \x01(\r\x12\x12\n\ncolor_mode\x18\x07 \x01(\t\x12\x16\n\x0e\x61nnotated_mode\x18\x08 \x01(\t\x12\x12\n\ndepth_mode\x18\t \x01(\t\"&\n\x08\x45ncoding\x12\x07\n\x03PNG\x10\x00\x12\x07\n\x03RAW\x10\x01\x12\x08\n\x04JPEG\x10\x02\x1a\x1c\n\x06\x44\x61mage\x12\x12\n\nis_damaged\x18\x01 \x01(\x08\x1a\x37\n\x12RoadCenterDistance\x12\x0f\n\x07road_id\x18\x01 \x01(\t\x12\x10\n\x08\x64istance\x18\x02 \x01(\x02\x1a\x30\n\x0e\x43\x61rToLaneAngle\x12\x0f\n\x07lane_id\x18\x01 \x01(\t\x12\r\n\x05\x61ngle\x18\x02 \x01(\x02\x1a\x1d\n\x0b\x42oundingBox\x12\x0e\n\x06points\x18\x01 \x03(\x02\x1a\xcf\x01\n\tRoadEdges\x12\x36\n\x05\x65\x64ges\x18\x01 \x03(\x0b\x32\'.DataResponse.Data.RoadEdges.EdgesEntry\x1a\x35\n\x08RoadEdge\x12\x13\n\x0bleft_points\x18\x01 \x03(\x02\x12\x14\n\x0cright_points\x18\x02 \x03(\x02\x1aS\n\nEdgesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x34\n\x05value\x18\x02 \x01(\x0b\x32%.DataResponse.Data.RoadEdges.RoadEdge:\x02\x38\x01\x1a\x18\n\x05\x45rror\x12\x0f\n\x07message\x18\x01 \x01(\tB\x06\n\x04\x64\x61ta\x1a?\n\tDataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12!\n\x05value\x18\x02 \x01(\x0b\x32\x12.DataResponse.Data:\x02\x38\x01\"\x91\x02\n\x07\x43ontrol\x12\'\n\tavCommand\x18\x01 \x01(\x0b\x32\x12.Control.AvCommandH\x00\x12)\n\nsimCommand\x18\x02 \x01(\x0b\x32\x13.Control.SimCommandH\x00\x1a=\n\tAvCommand\x12\x12\n\naccelerate\x18\x01 \x01(\x01\x12\r\n\x05steer\x18\x02 \x01(\x01\x12\r\n\x05\x62rake\x18\x03 \x01(\x01\x1ah\n\nSimCommand\x12,\n\x07\x63ommand\x18\x01 \x01(\x0e\x32\x1b.Control.SimCommand.Command\",\n\x07\x43ommand\x12\x0b\n\x07SUCCEED\x10\x00\x12\x08\n\x04\x46\x41IL\x10\x01\x12\n\n\x06\x43\x41NCEL\x10\x02\x42\t\n\x07\x63ommand\"L\n\x12VerificationResult\x12\x14\n\x0cprecondition\x18\x01 \x01(\t\x12\x0f\n\x07\x66\x61ilure\x18\x02 \x01(\t\x12\x0f\n\x07success\x18\x03 \x01(\t\"\x18\n\tVehicleID\x12\x0b\n\x03vid\x18\x01 \x01(\t\"\x1a\n\nVehicleIDs\x12\x0c\n\x04vids\x18\x01 \x03(\t\"\x1b\n\x0cSimulationID\x12\x0b\n\x03sid\x18\x01 \x01(\t\"\x1d\n\rSimulationIDs\x12\x0c\n\x04sids\x18\x01 \x03(\t\"\x88\x02\n\x10SubmissionResult\x12/\n\x06result\x18\x01 \x01(\x0b\x32\x1d.SubmissionResult.SubmissionsH\x00\x12\x18\n\x07message\x18\x02 \x01(\x0b\x32\x05.VoidH\x00\x1a\x95\x01\n\x0bSubmissions\x12\x43\n\x0bsubmissions\x18\x01 \x03(\x0b\x32..SubmissionResult.Submissions.SubmissionsEntry\x1a\x41\n\x10SubmissionsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x1c\n\x05value\x18\x02 \x01(\x0b\x32\r.SimulationID:\x02\x38\x01\x42\x11\n\x0fmay_submissions\" \n\x10SimulationNodeID\x12\x0c\n\x04snid\x18\x01 \x01(\t\"\x12\n\x03Num\x12\x0b\n\x03num\x18\x01 \x01(\x05\"\x15\n\x04\x42ool\x12\r\n\x05value\x18\x01 \x01(\x08\"\x99\x01\n\x10SimStateResponse\x12)\n\x05state\x18\x01 \x01(\x0e\x32\x1a.SimStateResponse.SimState\"Z\n\x08SimState\x12\x0b\n\x07\x44\x45\x46\x41ULT\x10\x00\x12\x0b\n\x07RUNNING\x10\x01\x12\x0c\n\x08\x46INISHED\x10\x02\x12\x0c\n\x08\x43\x41NCELED\x10\x03\x12\x0b\n\x07TIMEOUT\x10\x04\x12\x0b\n\x07UNKNOWN\x10\x05\"V\n\x0cStepResponse\x12)\n\x05state\x18\x01 \x01(\x0e\x32\x1a.SimStateResponse.SimState\x12\x1b\n\x04\x64\x61ta\x18\x02 \x01(\x0b\x32\r.DataResponse\"\x96\x01\n\x0b\x43ycleTiming\x12\x12\n\nstarted_ns\x18\x01 \x01(\x03\x12\x13\n\x0b\x64uration_ns\x18\x02 \x01(\x03\x12-\n\tphases_ns\x18\x03 \x03(\x0b\x32\x1a.CycleTiming.PhasesNsEntry\x1a/\n\rPhasesNsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x03:\x02\x38\x01\"|\n\nTestResult\x12\"\n\x06result\x18\x01 \x01(\x0e\x32\x12.TestResult.Result\"J\n\x06Result\x12\x0b\n\x07\x44\x45\x46\x41ULT\x10\x00\x12\r\n\tSUCCEEDED\x10\x01\x12\n\n\x06\x46\x41ILED\x10\x02\x12\x0b\n\x07SKIPPED\x10\x03\x12\x0b\n\x07UNKNOWN\x10\x04\"\x17\n\x04Void\x12\x0f\n\x07message\x18\x01 \x01(\t\"*\n\x04User\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\tB\x03\x90\x01\x00\x62\x06proto3')
 )
 
 
 
+_DATARESPONSE_DATA_CAMERA_ENCODING = _descriptor.EnumDescriptor(
+  name='Encoding',
+  full_name='DataResponse.Data.Camera.Encoding',
+  filename=None,
+  file=DESCRIPTOR,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='PNG', index=0, number=0,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='RAW', index=1, number=1,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='JPEG', index=2, number=2,
+      serialized_options=None,
+      type=None),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=1015,
+  serialized_end=1053,
+)
+_sym_db.RegisterEnumDescriptor(_DATARESPONSE_DATA_CAMERA_ENCODING)
+
 _CONTROL_SIMCOMMAND_COMMAND = _descriptor.EnumDescriptor(
   name='Command',
   full_name='Control.SimCommand.Command',
@@ -45,8 +71,8 @@ _CONTROL_SIMCOMMAND_COMMAND = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   serialized_options=None,
-  serialized_start=1561,
-  serialized_end=1605,
+  serialized_start=1751,
+  serialized_end=1795,
 )
 _sym_db.RegisterEnumDescriptor(_CONTROL_SIMCOMMAND_COMMAND)
 
@@ -83,8 +109,8 @@ _SIMSTATERESPONSE_SIMSTATE = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   serialized_options=None,
-  serialized_start=2218,
-  serialized_end=2308,
+  serialized_start=2408,
+  serialized_end=2498,
 )
 _sym_db.RegisterEnumDescriptor(_SIMSTATERESPONSE_SIMSTATE)
 
@@ -117,8 +143,8 @@ _TESTRESULT_RESULT = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   serialized_options=None,
-  serialized_start=2360,
-  serialized_end=2434,
+  serialized_start=2791,
+  serialized_end=2865,
 )
 _sym_db.RegisterEnumDescriptor(_TESTRESULT_RESULT)
 
@@ -309,11 +335,54 @@ _DATARESPONSE_DATA_CAMERA = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='encoding', full_name='DataResponse.Data.Camera.encoding', index=3,
+      number=4, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='width', full_name='DataResponse.Data.Camera.width', index=4,
+      number=5, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='height', full_name='DataResponse.Data.Camera.height', index=5,
+      number=6, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='color_mode', full_name='DataResponse.Data.Camera.color_mode', index=6,
+      number=7, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='annotated_mode', full_name='DataResponse.Data.Camera.annotated_mode', index=7,
+      number=8, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='depth_mode', full_name='DataResponse.Data.Camera.depth_mode', index=8,
+      number=9, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
+    _DATARESPONSE_DATA_CAMERA_ENCODING,
   ],
   serialized_options=None,
   is_extendable=False,
@@ -321,8 +390,8 @@ _DATARESPONSE_DATA_CAMERA = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=806,
-  serialized_end=863,
+  serialized_start=807,
+  serialized_end=1053,
 )
 
 _DATARESPONSE_DATA_DAMAGE = _descriptor.Descriptor(
@@ -351,8 +420,8 @@ _DATARESPONSE_DATA_DAMAGE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=865,
-  serialized_end=893,
+  serialized_start=1055,
+  serialized_end=1083,
 )
 
 _DATARESPONSE_DATA_ROADCENTERDISTANCE = _descriptor.Descriptor(
@@ -388,8 +457,8 @@ _DATARESPONSE_DATA_ROADCENTERDISTANCE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=895,
-  serialized_end=950,
+  serialized_start=1085,
+  serialized_end=1140,
 )
 
 _DATARESPONSE_DATA_CARTOLANEANGLE = _descriptor.Descriptor(
@@ -425,8 +494,8 @@ _DATARESPONSE_DATA_CARTOLANEANGLE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=952,
-  serialized_end=1000,
+  serialized_start=1142,
+  serialized_end=1190,
 )
 
 _DATARESPONSE_DATA_BOUNDINGBOX = _descriptor.Descriptor(
@@ -455,8 +524,8 @@ _DATARESPONSE_DATA_BOUNDINGBOX = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1002,
-  serialized_end=1031,
+  serialized_start=1192,
+  serialized_end=1221,
 )
 
 _DATARESPONSE_DATA_ROADEDGES_ROADEDGE = _descriptor.Descriptor(
@@ -492,8 +561,8 @@ _DATARESPONSE_DATA_ROADEDGES_ROADEDGE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1103,
-  serialized_end=1156,
+  serialized_start=1293,
+  serialized_end=1346,
 )
 
 _DATARESPONSE_DATA_ROADEDGES_EDGESENTRY = _descriptor.Descriptor(
@@ -529,8 +598,8 @@ _DATARESPONSE_DATA_ROADEDGES_EDGESENTRY = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1158,
-  serialized_end=1241,
+  serialized_start=1348,
+  serialized_end=1431,
 )
 
 _DATARESPONSE_DATA_ROADEDGES = _descriptor.Descriptor(
@@ -559,8 +628,8 @@ _DATARESPONSE_DATA_ROADEDGES = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1034,
-  serialized_end=1241,
+  serialized_start=1224,
+  serialized_end=1431,
 )
 
 _DATARESPONSE_DATA_ERROR = _descriptor.Descriptor(
@@ -589,8 +658,8 @@ _DATARESPONSE_DATA_ERROR = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1243,
-  serialized_end=1267,
+  serialized_start=1433,
+  serialized_end=1457,
 )
 
 _DATARESPONSE_DATA = _descriptor.Descriptor(
@@ -693,7 +762,7 @@ _DATARESPONSE_DATA = _descriptor.Descriptor(
       index=0, containing_type=None, fields=[]),
   ],
   serialized_start=121,
-  serialized_end=1275,
+  serialized_end=1465,
 )
 
 _DATARESPONSE_DATAENTRY = _descriptor.Descriptor(
@@ -729,8 +798,8 @@ _DATARESPONSE_DATAENTRY = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1277,
-  serialized_end=1340,
+  serialized_start=1467,
+  serialized_end=1530,
 )
 
 _DATARESPONSE = _descriptor.Descriptor(
@@ -760,7 +829,7 @@ _DATARESPONSE = _descriptor.Descriptor(
   oneofs=[
   ],
   serialized_start=65,
-  serialized_end=1340,
+  serialized_end=1530,
 )
 
 
@@ -804,8 +873,8 @@ _CONTROL_AVCOMMAND = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1438,
-  serialized_end=1499,
+  serialized_start=1628,
+  serialized_end=1689,
 )
 
 _CONTROL_SIMCOMMAND = _descriptor.Descriptor(
@@ -835,8 +904,8 @@ _CONTROL_SIMCOMMAND = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1501,
-  serialized_end=1605,
+  serialized_start=1691,
+  serialized_end=1795,
 )
 
 _CONTROL = _descriptor.Descriptor(
@@ -875,8 +944,8 @@ _CONTROL = _descriptor.Descriptor(
       name='command', full_name='Control.command',
       index=0, containing_type=None, fields=[]),
   ],
-  serialized_start=1343,
-  serialized_end=1616,
+  serialized_start=1533,
+  serialized_end=1806,
 )
 
 
@@ -920,8 +989,8 @@ _VERIFICATIONRESULT = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1618,
-  serialized_end=1694,
+  serialized_start=1808,
+  serialized_end=1884,
 )
 
 
@@ -951,8 +1020,8 @@ _VEHICLEID = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1696,
-  serialized_end=1720,
+  serialized_start=1886,
+  serialized_end=1910,
 )
 
 
@@ -982,8 +1051,8 @@ _VEHICLEIDS = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1722,
-  serialized_end=1748,
+  serialized_start=1912,
+  serialized_end=1938,
 )
 
 
@@ -1013,8 +1082,8 @@ _SIMULATIONID = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1750,
-  serialized_end=1777,
+  serialized_start=1940,
+  serialized_end=1967,
 )
 
 
@@ -1044,8 +1113,8 @@ _SIMULATIONIDS = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1779,
-  serialized_end=1808,
+  serialized_start=1969,
+  serialized_end=1998,
 )
 
 
@@ -1082,8 +1151,8 @@ _SUBMISSIONRESULT_SUBMISSIONS_SUBMISSIONSENTRY = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1991,
-  serialized_end=2056,
+  serialized_start=2181,
+  serialized_end=2246,
 )
 
 _SUBMISSIONRESULT_SUBMISSIONS = _descriptor.Descriptor(
@@ -1112,8 +1181,8 @@ _SUBMISSIONRESULT_SUBMISSIONS = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1907,
-  serialized_end=2056,
+  serialized_start=2097,
+  serialized_end=2246,
 )
 
 _SUBMISSIONRESULT = _descriptor.Descriptor(
@@ -1152,8 +1221,8 @@ _SUBMISSIONRESULT = _descriptor.Descriptor(
       name='may_submissions', full_name='SubmissionResult.may_submissions',
       index=0, containing_type=None, fields=[]),
   ],
-  serialized_start=1811,
-  serialized_end=2075,
+  serialized_start=2001,
+  serialized_end=2265,
 )
 
 
@@ -1183,8 +1252,8 @@ _SIMULATIONNODEID = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=2077,
-  serialized_end=2109,
+  serialized_start=2267,
+  serialized_end=2299,
 )
 
 
@@ -1214,8 +1283,8 @@ _NUM = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=2111,
-  serialized_end=2129,
+  serialized_start=2301,
+  serialized_end=2319,
 )
 
 
@@ -1245,8 +1314,8 @@ _BOOL = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=2131,
-  serialized_end=2152,
+  serialized_start=2321,
+  serialized_end=2342,
 )
 
 
@@ -1277,8 +1346,128 @@ _SIMSTATERESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=2155,
-  serialized_end=2308,
+  serialized_start=2345,
+  serialized_end=2498,
+)
+
+
+_STEPRESPONSE = _descriptor.Descriptor(
+  name='StepResponse',
+  full_name='StepResponse',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='state', full_name='StepResponse.state', index=0,
+      number=1, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='data', full_name='StepResponse.data', index=1,
+      number=2, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=2500,
+  serialized_end=2586,
+)
+
+
+_CYCLETIMING_PHASESNSENTRY = _descriptor.Descriptor(
+  name='PhasesNsEntry',
+  full_name='CycleTiming.PhasesNsEntry',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='key', full_name='CycleTiming.PhasesNsEntry.key', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='value', full_name='CycleTiming.PhasesNsEntry.value', index=1,
+      number=2, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=_b('8\001'),
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=2692,
+  serialized_end=2739,
+)
+
+_CYCLETIMING = _descriptor.Descriptor(
+  name='CycleTiming',
+  full_name='CycleTiming',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='started_ns', full_name='CycleTiming.started_ns', index=0,
+      number=1, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='duration_ns', full_name='CycleTiming.duration_ns', index=1,
+      number=2, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='phases_ns', full_name='CycleTiming.phases_ns', index=2,
+      number=3, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[_CYCLETIMING_PHASESNSENTRY, ],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=2589,
+  serialized_end=2739,
 )
 
 
@@ -1309,8 +1498,8 @@ _TESTRESULT = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=2310,
-  serialized_end=2434,
+  serialized_start=2741,
+  serialized_end=2865,
 )
 
 
@@ -1340,8 +1529,8 @@ _VOID = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=2436,
-  serialized_end=2459,
+  serialized_start=2867,
+  serialized_end=2890,
 )
 
 
@@ -1378,15 +1567,17 @@ _USER = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=2461,
-  serialized_end=2503,
+  serialized_start=2892,
+  serialized_end=2934,
 )
 
 _DATARESPONSE_DATA_POSITION.containing_type = _DATARESPONSE_DATA
 _DATARESPONSE_DATA_SPEED.containing_type = _DATARESPONSE_DATA
 _DATARESPONSE_DATA_STEERINGANGLE.containing_type = _DATARESPONSE_DATA
 _DATARESPONSE_DATA_LIDAR.containing_type = _DATARESPONSE_DATA
+_DATARESPONSE_DATA_CAMERA.fields_by_name['encoding'].enum_type = _DATARESPONSE_DATA_CAMERA_ENCODING
 _DATARESPONSE_DATA_CAMERA.containing_type = _DATARESPONSE_DATA
+_DATARESPONSE_DATA_CAMERA_ENCODING.containing_type = _DATARESPONSE_DATA_CAMERA
 _DATARESPONSE_DATA_DAMAGE.containing_type = _DATARESPONSE_DATA
 _DATARESPONSE_DATA_ROADCENTERDISTANCE.containing_type = _DATARESPONSE_DATA
 _DATARESPONSE_DATA_CARTOLANEANGLE.containing_type = _DATARESPONSE_DATA
@@ -1471,6 +1662,10 @@ _SUBMISSIONRESULT.oneofs_by_name['may_submissions'].fields.append(
 _SUBMISSIONRESULT.fields_by_name['message'].containing_oneof = _SUBMISSIONRESULT.oneofs_by_name['may_submissions']
 _SIMSTATERESPONSE.fields_by_name['state'].enum_type = _SIMSTATERESPONSE_SIMSTATE
 _SIMSTATERESPONSE_SIMSTATE.containing_type = _SIMSTATERESPONSE
+_STEPRESPONSE.fields_by_name['state'].enum_type = _SIMSTATERESPONSE_SIMSTATE
+_STEPRESPONSE.fields_by_name['data'].message_type = _DATARESPONSE
+_CYCLETIMING_PHASESNSENTRY.containing_type = _CYCLETIMING
+_CYCLETIMING.fields_by_name['phases_ns'].message_type = _CYCLETIMING_PHASESNSENTRY
 _TESTRESULT.fields_by_name['result'].enum_type = _TESTRESULT_RESULT
 _TESTRESULT_RESULT.containing_type = _TESTRESULT
 DESCRIPTOR.message_types_by_name['DataRequest'] = _DATAREQUEST
@@ -1486,6 +1681,8 @@ DESCRIPTOR.message_types_by_name['SimulationNodeID'] = _SIMULATIONNODEID
 DESCRIPTOR.message_types_by_name['Num'] = _NUM
 DESCRIPTOR.message_types_by_name['Bool'] = _BOOL
 DESCRIPTOR.message_types_by_name['SimStateResponse'] = _SIMSTATERESPONSE
+DESCRIPTOR.message_types_by_name['StepResponse'] = _STEPRESPONSE
+DESCRIPTOR.message_types_by_name['CycleTiming'] = _CYCLETIMING
 DESCRIPTOR.message_types_by_name['TestResult'] = _TESTRESULT
 DESCRIPTOR.message_types_by_name['Void'] = _VOID
 DESCRIPTOR.message_types_by_name['User'] = _USER
@@ -1734,6 +1931,28 @@ SimStateResponse = _reflection.GeneratedProtocolMessageType('SimStateResponse',
   ))
 _sym_db.RegisterMessage(SimStateResponse)
 
+StepResponse = _reflection.GeneratedProtocolMessageType('StepResponse', (_message.Message,), dict(
+  DESCRIPTOR = _STEPRESPONSE,
+  __module__ = 'aiExchangeMessages_pb2'
+  # @@protoc_insertion_point(class_scope:StepResponse)
+  ))
+_sym_db.RegisterMessage(StepResponse)
+
+CycleTiming = _reflection.GeneratedProtocolMessageType('CycleTiming', (_message.Message,), dict(
+
+  PhasesNsEntry = _reflection.GeneratedProtocolMessageType('PhasesNsEntry', (_message.Message,), dict(
+    DESCRIPTOR = _CYCLETIMING_PHASESNSENTRY,
+    __module__ = 'aiExchangeMessages_pb2'
+    # @@protoc_insertion_point(class_scope:CycleTiming.PhasesNsEntry)
+    ))
+  ,
+  DESCRIPTOR = _CYCLETIMING,
+  __module__ = 'aiExchangeMessages_pb2'
+  # @@protoc_insertion_point(class_scope:CycleTiming)
+  ))
+_sym_db.RegisterMessage(CycleTiming)
+_sym_db.RegisterMessage(CycleTiming.PhasesNsEntry)
+
 TestResult = _reflection.GeneratedProtocolMessageType('TestResult', (_message.Message,), dict(
   DESCRIPTOR = _TESTRESULT,
   __module__ = 'aiExchangeMessages_pb2'
@@ -1760,4 +1979,5 @@ DESCRIPTOR._options = None
 _DATARESPONSE_DATA_ROADEDGES_EDGESENTRY._options = None
 _DATARESPONSE_DATAENTRY._options = None
 _SUBMISSIONRESULT_SUBMISSIONS_SUBMISSIONSENTRY._options = None
+_CYCLETIMING_PHASESNSENTRY._options = None
 # @@protoc_insertion_point(module_scope)
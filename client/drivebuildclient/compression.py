@@ -0,0 +1,170 @@
+"""
+Codecs for compressing payloads exchanged between SimNodes, the MainApp and AI clients.
+zlib is always available. zstd and lz4 are available if the packages "zstandard" and "lz4" are installed.
+"""
+from logging import getLogger
+from typing import Callable, Iterable, Iterator, List, Optional
+
+# Payloads smaller than this number of bytes are sent uncompressed
+COMPRESSION_THRESHOLD: int = 1024
+_logger = getLogger("DriveBuild.Client.Compression")
+
+
+class Codec:
+    def __init__(self, name: str, codec_id: int, http_name: str, compress: Callable[[bytes], bytes],
+                 decompress: Callable[[bytes], bytes], create_compressor: Callable[[], object]):
+        """
+        :param name: The name identifying the codec when negotiating compression over sockets.
+        :param codec_id: The ID identifying the codec within the flags of binary frames (1-15).
+        :param http_name: The name identifying the codec in the HTTP headers Accept-Encoding and Content-Encoding.
+        :param create_compressor: Creates an object having methods compress(bytes) and flush() for compressing a
+        stream of data.
+        """
+        self.name = name
+        self.codec_id = codec_id
+        self.http_name = http_name
+        self.compress = compress
+        self.decompress = decompress
+        self.create_compressor = create_compressor
+
+
+class _LZ4StreamCompressor:
+    """
+    Adapts the LZ4FrameCompressor to the interface of the compressors of zlib and zstd.
+    """
+
+    def __init__(self):
+        from lz4.frame import LZ4FrameCompressor
+        self._compressor = LZ4FrameCompressor()
+        self._header = self._compressor.begin()
+
+    def compress(self, data: bytes) -> bytes:
+        compressed = self._header + self._compressor.compress(data)
+        self._header = b""
+        return compressed
+
+    def flush(self) -> bytes:
+        return self._header + self._compressor.flush()
+
+
+class _ZstdPerThread:
+    """
+    Keeps a ZstdCompressor and a ZstdDecompressor per thread since they must not be used by multiple threads
+    concurrently.
+    """
+
+    def __init__(self):
+        from threading import local
+        self._local = local()
+
+    def compress(self, data: bytes) -> bytes:
+        import zstandard
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor()
+        return compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        import zstandard
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = zstandard.ZstdDecompressor()
+        # NOTE A decompressobj does not require the content size to be written into the frame header
+        return decompressor.decompressobj().decompress(data)
+
+
+def _create_codecs() -> List[Codec]:
+    """
+    :return: The available codecs ordered by preference.
+    """
+    import zlib
+    codecs = []
+    try:
+        import zstandard
+        zstd = _ZstdPerThread()
+        codecs.append(Codec("zstd", 3, "zstd", zstd.compress, zstd.decompress,
+                            lambda: zstandard.ZstdCompressor().compressobj()))
+    except ImportError:
+        _logger.debug("zstd compression is not available.")
+    try:
+        import lz4.frame
+        codecs.append(Codec("lz4", 2, "lz4", lz4.frame.compress, lz4.frame.decompress, _LZ4StreamCompressor))
+    except ImportError:
+        _logger.debug("lz4 compression is not available.")
+    # NOTE The HTTP encoding "deflate" denotes the zlib format
+    codecs.append(Codec("zlib", 1, "deflate", lambda data: zlib.compress(data, 1), zlib.decompress,
+                        lambda: zlib.compressobj(1)))
+    return codecs
+
+
+_CODECS: List[Codec] = _create_codecs()
+
+
+def supported_codecs() -> List[str]:
+    """
+    :return: The names of all available codecs ordered by preference.
+    """
+    return [codec.name for codec in _CODECS]
+
+
+def get_codec(name: str) -> Optional[Codec]:
+    return next((codec for codec in _CODECS if codec.name == name), None)
+
+
+def get_codec_by_id(codec_id: int) -> Optional[Codec]:
+    return next((codec for codec in _CODECS if codec.codec_id == codec_id), None)
+
+
+def negotiate(offered: Iterable[str]) -> Optional[Codec]:
+    """
+    :param offered: The names of the codecs a peer supports.
+    :return: The most preferred codec supported by both sides. Returns None if there is no such codec.
+    """
+    offered = set(offered)
+    return next((codec for codec in _CODECS if codec.name in offered), None)
+
+
+def accept_encoding() -> str:
+    """
+    :return: The value of the HTTP header Accept-Encoding listing all available codecs.
+    """
+    return ", ".join([codec.http_name for codec in _CODECS])
+
+
+def negotiate_http(accept_encoding_header: Optional[str]) -> Optional[Codec]:
+    """
+    :param accept_encoding_header: The value of the HTTP header Accept-Encoding of a request.
+    :return: The most preferred codec accepted by the requester. Returns None if there is no such codec.
+    """
+    if not accept_encoding_header:
+        return None
+    accepted = set()
+    for encoding in accept_encoding_header.split(","):
+        name, _, parameters = encoding.strip().partition(";")
+        if parameters.replace(" ", "") not in ["q=0", "q=0.0", "q=0.00", "q=0.000"]:
+            accepted.add(name.strip().lower())
+    return next((codec for codec in _CODECS if codec.http_name in accepted), None)
+
+
+def decode_http(content: bytes, content_encoding: Optional[str]) -> bytes:
+    """
+    Decompresses the content of a HTTP message according to its header Content-Encoding.
+    """
+    if not content_encoding or content_encoding == "identity":
+        return content
+    codec = next((codec for codec in _CODECS if codec.http_name == content_encoding), None)
+    if not codec:
+        raise ValueError("The content encoding \"" + content_encoding + "\" is not supported.")
+    return codec.decompress(content)
+
+
+def compress_stream(codec: Codec, parts: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Compresses a stream of data part by part.
+    """
+    compressor = codec.create_compressor()
+    for part in parts:
+        compressed = compressor.compress(part)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -1,32 +1,177 @@
-from http.client import HTTPResponse
+from http.client import HTTPResponse, HTTPConnection
+from logging import getLogger
+from threading import Lock
 from typing import List, Callable, Union, Tuple, Any, Dict, AnyStr, Optional
 
 from flask import Response
 
+from drivebuildclient import static_vars
 from drivebuildclient.aiExchangeMessages_pb2 import SimulationID, VehicleID, SimulationNodeID
 
 AnyResponse = Union[Response, Tuple[Any, int]]
+# The maximum number of idle connections kept alive per host
+POOL_SIZE: int = 8
+# The number of seconds after which an idle connection is closed
+POOL_IDLE_TIMEOUT: float = 30
+# The methods of requests which may be retried although the host may already have handled them
+_IDEMPOTENT_METHODS: List[str] = ["GET", "HEAD"]
+_logger = getLogger("DriveBuild.Client.HttpUtil")
+
+
+class BufferedResponse:
+    """
+    The completely read response to a request. Its connection is already returned to the pool.
+    """
+
+    def __init__(self, response: HTTPResponse):
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self._content = response.read()
+
+    def getheader(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self.headers.get(name, default)
+
+    def read(self) -> bytes:
+        return self._content
+
+    def readlines(self) -> List[bytes]:
+        return self._content.splitlines(keepends=True)
+
+
+class ConnectionPool:
+    """
+    Keeps connections to a single host alive and reuses them for subsequent requests. The pool is thread-safe. The
+    number of concurrent requests is not limited but at most max_size idle connections are kept.
+    """
+
+    def __init__(self, host: str, port: int, max_size: int = POOL_SIZE, idle_timeout: float = POOL_IDLE_TIMEOUT):
+        """
+        :param max_size: The maximum number of idle connections to keep alive.
+        :param idle_timeout: The number of seconds after which idle connections are closed.
+        """
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle: List[Tuple[HTTPConnection, float]] = []  # NOTE The most recently used connection is last
+        self._lock = Lock()
+
+    def _evict_idle(self, now: float) -> None:
+        """
+        NOTE The caller has to hold the lock of the pool.
+        """
+        num_expired = 0
+        while num_expired < len(self._idle) and now - self._idle[num_expired][1] > self.idle_timeout:
+            self._idle[num_expired][0].close()
+            num_expired += 1
+        del self._idle[:num_expired]
+
+    def _acquire(self) -> Tuple[HTTPConnection, bool]:
+        """
+        :return: A connection and whether it is reused.
+        """
+        from time import monotonic
+        with self._lock:
+            self._evict_idle(monotonic())
+            if self._idle:
+                return self._idle.pop()[0], True
+        return HTTPConnection(host=self.host, port=self.port), False
+
+    def _release(self, connection: HTTPConnection) -> None:
+        from time import monotonic
+        with self._lock:
+            now = monotonic()
+            self._evict_idle(now)
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, now))
+                return
+        connection.close()
+
+    def request(self, method: str, url: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> BufferedResponse:
+        """
+        Sends a request over an idle connection or a new one if there is none. A request failing on a reused connection
+        which the host may have closed meanwhile is retried once on a new connection. Requests which are not idempotent
+        are only retried if sending them failed since otherwise the host may already have handled them.
+        """
+        from http.client import HTTPException
+        connection, reused = self._acquire()
+        while True:
+            sent = False
+            try:
+                connection.request(method, url, body=body, headers=headers or {})
+                sent = True
+                raw_response = connection.getresponse()
+                response = BufferedResponse(raw_response)
+                break
+            except (HTTPException, ConnectionError):
+                connection.close()
+                if not reused or (sent and method.upper() not in _IDEMPOTENT_METHODS):
+                    raise
+                _logger.debug("Retrying a request to " + self.host + ":" + str(self.port) + " on a new connection.")
+                connection, reused = HTTPConnection(host=self.host, port=self.port), False
+        if raw_response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            for connection, _ in self._idle:
+                connection.close()
+            self._idle.clear()
+
+
+@static_vars(pools={}, pools_lock=Lock())
+def get_pool(host: str, port: int, max_size: Optional[int] = None,
+             idle_timeout: Optional[float] = None) -> ConnectionPool:
+    """
+    Returns the connection pool shared by all requests to the given host.
+    :param max_size: If given, reconfigures the maximum number of idle connections of the pool.
+    :param idle_timeout: If given, reconfigures the number of seconds after which idle connections are closed.
+    """
+    with get_pool.pools_lock:
+        pool = get_pool.pools.get((host, port))
+        if not pool:
+            pool = get_pool.pools[(host, port)] = ConnectionPool(host, port)
+        if max_size is not None:
+            pool.max_size = max_size
+        if idle_timeout is not None:
+            pool.idle_timeout = idle_timeout
+        return pool
 
 
 # FIXME Merge methods into only two methods?
 
 
-def do_post_request(host: str, port: int, address: str, content: bytes) -> HTTPResponse:
-    from http.client import HTTPConnection
-    connection = HTTPConnection(host=host, port=port)
-    connection.request("POST", address, body=content, headers={"content-type": "application/x-protobuf"})
-    return connection.getresponse()
+def _request_headers() -> Dict[str, str]:
+    from drivebuildclient.compression import accept_encoding
+    return {
+        "content-type": "application/x-protobuf",
+        "accept-encoding": accept_encoding()
+    }
+
+
+def read_response(response: Union[HTTPResponse, BufferedResponse]) -> bytes:
+    """
+    Reads the whole content of the given response and decompresses it if needed.
+    """
+    from drivebuildclient.compression import decode_http
+    return decode_http(response.read(), response.getheader("content-encoding"))
+
+
+def do_post_request(host: str, port: int, address: str, content: bytes) -> BufferedResponse:
+    return get_pool(host, port).request("POST", address, body=content, headers=_request_headers())
 
 
-def do_get_request(host: str, port: int, address: str, params: Dict[str, AnyStr]) -> HTTPResponse:
+def do_get_request(host: str, port: int, address: str, params: Dict[str, AnyStr]) -> BufferedResponse:
     """
     :return: The response object of the request
     """
     from urllib.parse import urlencode
-    from http.client import HTTPConnection
-    connection = HTTPConnection(host=host, port=port)
-    connection.request("GET", address + "?" + urlencode(params), headers={"content-type": "application/x-protobuf"})
-    return connection.getresponse()
+    return get_pool(host, port).request("GET", address + "?" + urlencode(params), headers=_request_headers())
 
 
 def process_get_request(min_params: List[str], on_parameter_available: Callable[[], AnyResponse]) -> AnyResponse:
@@ -42,13 +187,11 @@ def process_get_request(min_params: List[str], on_parameter_available: Callable[
         return on_parameter_available()
 
 
-def do_mixed_request(host: str, port: int, address: str, params: Dict[str, AnyStr], content: bytes) -> HTTPResponse:
+def do_mixed_request(host: str, port: int, address: str, params: Dict[str, AnyStr],
+                     content: bytes) -> BufferedResponse:
     from urllib.parse import urlencode
-    from http.client import HTTPConnection
-    connection = HTTPConnection(host=host, port=port)
-    connection.request("POST", address + "?" + urlencode(params), body=content,
-                       headers={"content-type": "application/x-protobuf"})
-    return connection.getresponse()
+    return get_pool(host, port).request("POST", address + "?" + urlencode(params), body=content,
+                                        headers=_request_headers())
 
 
 def process_mixed_request(min_params: List[str], on_parameter_available: Callable[[], AnyResponse]) -> AnyResponse:
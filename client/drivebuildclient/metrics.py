@@ -0,0 +1,184 @@
+"""
+Latency histograms of the phases of simulations (e.g. polling sensors, verifying criteria, waiting for AIs).
+SimNodes record them per simulation and the MainApp aggregates the histograms of all SimNodes. The histograms of
+finished simulations are folded into a single histogram per phase.
+"""
+from contextlib import contextmanager
+from logging import getLogger
+from threading import Lock
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Set
+
+# The upper bounds of the buckets in seconds (0.1ms to about 52s). The last bucket contains all greater values.
+BUCKET_BOUNDS: List[float] = [0.0001 * 2 ** i for i in range(20)]
+_logger = getLogger("DriveBuild.Client.Metrics")
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+
+    def observe(self, seconds: float) -> None:
+        from bisect import bisect_left
+        self.counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.minimum = seconds if self.minimum is None else min(self.minimum, seconds)
+        self.maximum = seconds if self.maximum is None else max(self.maximum, seconds)
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        if other.minimum is not None:
+            self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        if other.maximum is not None:
+            self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        :return: The upper bound of the bucket containing the given quantile (0 <= q <= 1). The maximum if it is
+        contained in the last bucket. None if nothing was observed.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if count and cumulative >= rank:
+                return BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.maximum
+        return self.maximum
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "counts": self.counts,
+            "count": self.count,
+            "total": self.total,
+            "min": self.minimum,
+            "max": self.maximum,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99)
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "Histogram":
+        histogram = Histogram()
+        if len(data["counts"]) != len(histogram.counts):
+            raise ValueError("The histogram has " + str(len(data["counts"])) + " buckets instead of "
+                             + str(len(histogram.counts)) + ".")
+        histogram.counts = list(data["counts"])
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.minimum = data["min"]
+        histogram.maximum = data["max"]
+        return histogram
+
+
+class Metrics:
+    """
+    Holds a histogram per running simulation and phase as well as a histogram per phase over all finished simulations.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[str, Histogram]] = {}  # sid --> (phase --> histogram)
+        self._finished: Dict[str, Histogram] = {}  # phase --> histogram
+        self._finished_sids: Set[str] = set()
+        self._lock = Lock()
+
+    def observe(self, sid: str, phase: str, seconds: float) -> None:
+        with self._lock:
+            if sid in self._finished_sids:
+                phases = self._finished
+            else:
+                phases = self._histograms.setdefault(sid, {})
+            if phase not in phases:
+                phases[phase] = Histogram()
+            phases[phase].observe(seconds)
+
+    @contextmanager
+    def measure(self, sid: str, phase: str) -> Iterator[None]:
+        """
+        Observes the time it takes to execute the body of a with statement.
+        """
+        from time import perf_counter
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(sid, phase, perf_counter() - start)
+
+    def set_finished(self, sid: str, finished: bool) -> None:
+        """
+        Folds the histograms of a finished simulation into the histograms of all finished simulations. Observations of
+        a finished simulation which are made afterwards (e.g. by phases still measuring) are folded in directly.
+        :param sid: The simulation whose state changed.
+        :param finished: False only if the simulation (or a simulation reusing its ID) runs (again).
+        """
+        with self._lock:
+            if finished:
+                self._finished_sids.add(sid)
+                for phase, histogram in self._histograms.pop(sid, {}).items():
+                    self._finished.setdefault(phase, Histogram()).merge(histogram)
+            else:
+                self._finished_sids.discard(sid)
+
+    def to_dict(self, sid: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        :param sid: If given only the histograms of this simulation are contained. These are empty if the simulation
+        already finished.
+        :return: A dict containing the histograms per running simulation and phase ("simulations") and the histograms
+        per phase over all finished simulations ("finished").
+        """
+        with self._lock:
+            return {
+                "simulations": {s: {phase: histogram.to_dict() for phase, histogram in phases.items()}
+                                for s, phases in self._histograms.items() if sid is None or s == sid},
+                "finished": {phase: histogram.to_dict() for phase, histogram in self._finished.items()}
+                if sid is None else {}
+            }
+
+    def to_json(self, sid: Optional[str] = None) -> bytes:
+        from json import dumps
+        return dumps(self.to_dict(sid)).encode()
+
+
+def _parse_histogram(data: Dict[str, Any], description: str) -> Optional[Histogram]:
+    try:
+        return Histogram.from_dict(data)
+    except (KeyError, ValueError):
+        _logger.exception("Skipping a malformed histogram of " + description)
+        return None
+
+
+def aggregate(metrics: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Merges the histograms of multiple SimNodes (see Metrics.to_dict(...)).
+    :return: A dict containing the histograms per running simulation and phase ("simulations"), the histograms per
+    phase over all finished simulations ("finished") and the histograms per phase over all simulations ("total").
+    """
+    simulations: Dict[str, Dict[str, Histogram]] = {}
+    finished: Dict[str, Histogram] = {}
+    total: Dict[str, Histogram] = {}
+    for node_metrics in metrics:
+        for sid, phases in node_metrics.get("simulations", {}).items():
+            for phase, data in phases.items():
+                histogram = _parse_histogram(data, "phase " + phase + " of simulation " + sid)
+                if histogram is not None:
+                    simulations.setdefault(sid, {}).setdefault(phase, Histogram()).merge(histogram)
+                    total.setdefault(phase, Histogram()).merge(histogram)
+        for phase, data in node_metrics.get("finished", {}).items():
+            histogram = _parse_histogram(data, "phase " + phase + " of finished simulations")
+            if histogram is not None:
+                finished.setdefault(phase, Histogram()).merge(histogram)
+                total.setdefault(phase, Histogram()).merge(histogram)
+    return {
+        "simulations": {sid: {phase: histogram.to_dict() for phase, histogram in phases.items()}
+                        for sid, phases in simulations.items()},
+        "finished": {phase: histogram.to_dict() for phase, histogram in finished.items()},
+        "total": {phase: histogram.to_dict() for phase, histogram in total.items()}
+    }
@@ -22,6 +22,9 @@ setuptools.setup(
         "flask",
         "protobuf"
     ],
+    extras_require={
+        "compression": ["lz4", "zstandard"]
+    },
     classifiers=[
         "Operating System :: OS Independent",
         "Programming Language :: Python",
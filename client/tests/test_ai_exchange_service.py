@@ -0,0 +1,87 @@
+from threading import Thread
+from unittest import TestCase
+
+from flask import Flask, Response
+from werkzeug.serving import make_server
+
+from drivebuildclient.AIExchangeService import AIExchangeService
+from drivebuildclient.aiExchangeMessages_pb2 import SimulationID, VehicleID, DataRequest, Control, StepResponse, \
+    SimStateResponse
+
+
+def _create_app(received: list) -> Flask:
+    """
+    Mimics the step route of the MainApp and answers like a SimNode whose simulation runs until sid "finished".
+    """
+    app = Flask(__name__)
+
+    @app.route("/ai/step", methods=["POST"])
+    def step():
+        from flask import request
+        from drivebuildclient.httpUtil import process_mixed_request
+
+        def do() -> Response:
+            from drivebuildclient.httpUtil import extract_sid, extract_vid
+            _, sid = extract_sid()
+            _, vid = extract_vid()
+            data_request = DataRequest()
+            data_request.ParseFromString(request.args["request"].encode())
+            received.append((sid.sid, vid.vid, list(data_request.request_ids), request.data))
+            if sid.sid == "unknown":
+                return Response(response="Simulation node not found", status=400, mimetype="text/plain")
+            result = StepResponse()
+            if sid.sid == "finished":
+                result.state = SimStateResponse.SimState.FINISHED
+            else:
+                result.state = SimStateResponse.SimState.RUNNING
+                for rid in data_request.request_ids:
+                    result.data.data[rid].speed.speed = 42
+            return Response(response=result.SerializeToString(), status=200, mimetype="application/x-protobuf")
+
+        return process_mixed_request(["sid", "vid", "request"], do)
+
+    return app
+
+
+class StepTest(TestCase):
+    def setUp(self) -> None:
+        self.received = []
+        self.server = make_server("localhost", 0, _create_app(self.received), threaded=True)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.service = AIExchangeService("localhost", self.server.server_port)
+        self.vid = VehicleID()
+        self.vid.vid = "ego"
+        self.request = DataRequest()
+        self.request.request_ids.extend(["egoSpeed"])
+
+    def tearDown(self) -> None:
+        self.service.close()
+        self.server.shutdown()
+
+    @staticmethod
+    def _create_sid(sid: str) -> SimulationID:
+        result = SimulationID()
+        result.sid = sid
+        return result
+
+    def test_step_without_commands(self):
+        result = self.service.step(self._create_sid("1"), self.vid, self.request)
+        self.assertEqual(result.state, SimStateResponse.SimState.RUNNING)
+        self.assertEqual(result.data.data["egoSpeed"].speed.speed, 42)
+        self.assertEqual(self.received, [("1", "ego", ["egoSpeed"], b"")])
+
+    def test_step_with_commands(self):
+        control = Control()
+        control.avCommand.accelerate = 0.5
+        self.service.step(self._create_sid("1"), self.vid, self.request, control)
+        sent_control = Control()
+        sent_control.ParseFromString(self.received[0][3])
+        self.assertEqual(sent_control, control)
+
+    def test_step_after_simulation_finished(self):
+        result = self.service.step(self._create_sid("finished"), self.vid, self.request)
+        self.assertEqual(result.state, SimStateResponse.SimState.FINISHED)
+        self.assertFalse(result.HasField("data"))
+
+    def test_failing_step(self):
+        self.assertIsNone(self.service.step(self._create_sid("unknown"), self.vid, self.request))
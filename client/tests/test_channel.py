@@ -0,0 +1,67 @@
+from socket import socketpair
+from threading import Thread, Event
+from unittest import TestCase
+
+from drivebuildclient import RequestChannel, RequestFailedError, process_requests
+
+
+class RequestChannelTest(TestCase):
+    def _connect(self, handle_message) -> RequestChannel:
+        channel_socket, peer_socket = socketpair()
+        peer = Thread(target=process_requests, args=(peer_socket, handle_message))
+        peer.daemon = True
+        peer.start()
+        channel = RequestChannel(channel_socket, compress=False)
+        self.addCleanup(peer_socket.close)
+        self.addCleanup(channel.close)
+        return channel
+
+    def test_streamed_result(self):
+        channel = self._connect(lambda action, data: iter([b"first", b"second"]))
+        self.assertEqual([b"first", b"second"], [bytes(part) for part in channel.send_request_streamed(b"a", [])])
+        self.assertEqual(b"firstsecond", bytes(channel.send_request(b"a", [])))
+
+    def test_failing_stream_raises(self):
+        def _handle_message(action, data):
+            yield b"first"
+            raise RuntimeError("broken")
+
+        channel = self._connect(_handle_message)
+        parts = channel.send_request_streamed(b"a", [])
+        self.assertEqual(b"first", bytes(next(parts)))
+        with self.assertRaises(RequestFailedError):
+            next(parts)
+        with self.assertRaises(RequestFailedError):
+            channel.send_request(b"a", [])
+
+    def test_timeout_drops_late_result(self):
+        release = Event()
+
+        def _handle_message(action, data):
+            if action == b"slow":
+                release.wait(5)
+            return action
+
+        channel = self._connect(_handle_message)
+        with self.assertRaises(TimeoutError):
+            channel.send_request(b"slow", [], 0.05)
+        release.set()
+        # NOTE Other requests proceed while and after the slow one is pending
+        self.assertEqual(b"fast", bytes(channel.send_request(b"fast", [], 5)))
+        self.assertEqual({}, channel._pending)
+
+    def test_streamed_timeout_per_part(self):
+        release = Event()
+
+        def _handle_message(action, data):
+            yield b"first"
+            release.wait(5)
+            yield b"second"
+
+        channel = self._connect(_handle_message)
+        parts = channel.send_request_streamed(b"a", [], 0.05)
+        self.assertEqual(b"first", bytes(next(parts)))
+        with self.assertRaises(TimeoutError):
+            next(parts)
+        release.set()
+        self.assertEqual({}, channel._pending)
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, skipUnless
+
+from drivebuildclient.compression import supported_codecs, get_codec, get_codec_by_id, negotiate, negotiate_http, \
+    decode_http, compress_stream
+
+
+class CompressionTest(TestCase):
+    def test_zlib_is_always_supported(self):
+        self.assertIn("zlib", supported_codecs())
+        self.assertIs(get_codec("zlib"), get_codec_by_id(1))
+
+    def test_round_trip(self):
+        payload = bytes(range(256)) * 100
+        for name in supported_codecs():
+            codec = get_codec(name)
+            self.assertEqual(payload, codec.decompress(codec.compress(payload)), name)
+
+    def test_negotiate(self):
+        self.assertIs(get_codec("zlib"), negotiate(["unknown", "zlib"]))
+        self.assertIsNone(negotiate(["unknown"]))
+        self.assertIsNone(negotiate([]))
+
+    def test_negotiate_http(self):
+        self.assertIs(get_codec("zlib"), negotiate_http("gzip, deflate"))
+        self.assertIsNone(negotiate_http("deflate;q=0"))
+        self.assertIsNone(negotiate_http(None))
+
+    def test_decode_http(self):
+        codec = get_codec("zlib")
+        self.assertEqual(b"content", decode_http(codec.compress(b"content"), "deflate"))
+        self.assertEqual(b"content", decode_http(b"content", "identity"))
+        with self.assertRaises(ValueError):
+            decode_http(b"content", "unknown")
+
+    def test_compress_stream(self):
+        parts = [bytes([i]) * 1000 for i in range(10)]
+        for name in supported_codecs():
+            codec = get_codec(name)
+            self.assertEqual(b"".join(parts), codec.decompress(b"".join(compress_stream(codec, iter(parts)))), name)
+
+    @skipUnless("zstd" in supported_codecs(), "zstd is not available")
+    def test_zstd_concurrently(self):
+        codec = get_codec("zstd")
+        payloads = [bytes([i % 7]) * 50000 + bytes(range(256)) for i in range(64)]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(lambda payload: codec.decompress(codec.compress(payload)), payloads))
+        self.assertEqual(payloads, results)
@@ -0,0 +1,171 @@
+from socket import socketpair
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import patch
+
+import drivebuildclient
+from drivebuildclient import _send_frame, _recv_frame, _recv_exactly, _pack_request, _unpack_request, \
+    _is_binary_frame_pending, _send_message, send_request, _send_result, _FRAME_HEADER, _FRAME_KIND_REQUEST, \
+    _FRAME_KIND_RESPONSE, _FRAME_FLAG_MORE, _FRAME_FLAG_ERROR, _FRAME_CODEC_SHIFT, FRAME_MAGIC, FRAME_VERSION, \
+    WireFormat, RequestFailedError
+from drivebuildclient.compression import COMPRESSION_THRESHOLD, get_codec
+
+
+class FrameTest(TestCase):
+    def setUp(self) -> None:
+        self.sender, self.receiver = socketpair()
+
+    def tearDown(self) -> None:
+        _send_frame.codecs.pop(self.sender, None)
+        self.sender.close()
+        self.receiver.close()
+
+    def _recv_raw_frame(self):
+        magic, version, kind, flags, correlation_id, payload_length \
+            = _FRAME_HEADER.unpack(_recv_exactly(self.receiver, _FRAME_HEADER.size))
+        return magic, version, kind, flags, correlation_id, _recv_exactly(self.receiver, payload_length)
+
+    def test_header(self):
+        _send_frame(self.sender, _FRAME_KIND_RESPONSE, 42, b"payload")
+        magic, version, kind, flags, correlation_id, payload = self._recv_raw_frame()
+        self.assertEqual(FRAME_MAGIC, magic)
+        self.assertEqual(FRAME_VERSION, version)
+        self.assertEqual(_FRAME_KIND_RESPONSE, kind)
+        self.assertEqual(0, flags)
+        self.assertEqual(42, correlation_id)
+        self.assertEqual(b"payload", payload)
+
+    def test_round_trip(self):
+        for payload in [b"", b"x", bytes(range(256)) * 10]:
+            _send_frame(self.sender, _FRAME_KIND_REQUEST, 7, payload)
+            kind, correlation_id, flags, received = _recv_frame(self.receiver)
+            self.assertEqual((_FRAME_KIND_REQUEST, 7, 0, payload), (kind, correlation_id, flags, bytes(received)))
+
+    def test_corrupted_magic(self):
+        self.sender.sendall(_FRAME_HEADER.pack(0x00, FRAME_VERSION, _FRAME_KIND_REQUEST, 0, 1, 0))
+        with self.assertRaises(ValueError):
+            _recv_frame(self.receiver)
+
+    def test_unsupported_version(self):
+        self.sender.sendall(_FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION + 1, _FRAME_KIND_REQUEST, 0, 1, 0))
+        with self.assertRaises(ValueError):
+            _recv_frame(self.receiver)
+
+    def test_detect_wire_format(self):
+        _send_frame(self.sender, _FRAME_KIND_REQUEST, 1, b"")
+        self.assertTrue(_is_binary_frame_pending(self.receiver))
+        _recv_frame(self.receiver)
+        _send_message(self.sender, b"legacy")
+        self.assertFalse(_is_binary_frame_pending(self.receiver))
+
+    def test_pack_request(self):
+        action, data = _unpack_request(bytearray(_pack_request(b"action", [b"", b"first", bytes(1000)])))
+        self.assertEqual(b"action", action)
+        self.assertEqual([b"", b"first", bytes(1000)], [bytes(d) for d in data])
+
+    def test_send_request_discards_other_responses(self):
+        def _respond() -> None:
+            _, correlation_id, _, _ = _recv_frame(self.receiver)
+            # NOTE A late response to another request arrives first
+            _send_frame(self.receiver, _FRAME_KIND_RESPONSE, correlation_id + 1000, b"other")
+            _send_frame(self.receiver, _FRAME_KIND_RESPONSE, correlation_id, b"own")
+
+        responder = Thread(target=_respond)
+        responder.start()
+        self.assertEqual(b"own", bytes(send_request(self.sender, b"action", [], WireFormat.BINARY)))
+        responder.join()
+
+    def test_frame_size_limit(self):
+        self.sender.sendall(_FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, _FRAME_KIND_REQUEST, 0, 1,
+                                               drivebuildclient.CONTENT_LENGTH_LIMIT + 1))
+        with self.assertRaises(ValueError):
+            _recv_frame(self.receiver)
+
+    @patch("drivebuildclient.CONTENT_LENGTH_LIMIT", 4)
+    def test_chunking(self):
+        _send_frame(self.sender, _FRAME_KIND_RESPONSE, 3, b"0123456789")
+        chunks = [self._recv_raw_frame() for _ in range(3)]
+        self.assertEqual([b"0123", b"4567", b"89"], [bytes(chunk[5]) for chunk in chunks])
+        self.assertEqual([_FRAME_FLAG_MORE, _FRAME_FLAG_MORE, 0], [chunk[3] for chunk in chunks])
+        self.assertEqual([3, 3, 3], [chunk[4] for chunk in chunks])
+
+    @patch("drivebuildclient.CONTENT_LENGTH_LIMIT", 4)
+    def test_chunk_of_exact_limit(self):
+        _send_frame(self.sender, _FRAME_KIND_RESPONSE, 3, b"0123")
+        self.assertEqual(0, self._recv_raw_frame()[3])
+
+    def test_streamed_result(self):
+        _send_result(self.sender, _FRAME_KIND_RESPONSE, 5, iter([b"first", b"second"]))
+        frames = [_recv_frame(self.receiver) for _ in range(3)]
+        self.assertEqual([b"first", b"second", b""], [bytes(frame[3]) for frame in frames])
+        self.assertEqual([_FRAME_FLAG_MORE, _FRAME_FLAG_MORE, 0], [frame[2] & _FRAME_FLAG_MORE for frame in frames])
+
+    @patch("drivebuildclient.CONTENT_LENGTH_LIMIT", 4)
+    def test_send_request_joins_chunks(self):
+        def _respond() -> None:
+            flags = _FRAME_FLAG_MORE
+            while flags & _FRAME_FLAG_MORE:  # NOTE The request itself exceeds the limit
+                _, correlation_id, flags, _ = _recv_frame(self.receiver)
+            _send_frame(self.receiver, _FRAME_KIND_RESPONSE, correlation_id, b"0123456789")
+
+        responder = Thread(target=_respond)
+        responder.start()
+        self.assertEqual(b"0123456789", bytes(send_request(self.sender, b"a", [], WireFormat.BINARY)))
+        responder.join()
+
+    def test_compressed_frame(self):
+        codec = get_codec("zlib")
+        _send_frame.codecs[self.sender] = codec
+        payload = b"a" * COMPRESSION_THRESHOLD * 4
+        _send_frame(self.sender, _FRAME_KIND_RESPONSE, 9, payload)
+        _, _, _, flags, _, compressed = self._recv_raw_frame()
+        self.assertEqual(codec.codec_id, flags >> _FRAME_CODEC_SHIFT)
+        self.assertLess(len(compressed), len(payload))
+        _send_frame(self.sender, _FRAME_KIND_RESPONSE, 9, payload)
+        _, _, flags, received = _recv_frame(self.receiver)
+        self.assertEqual(payload, bytes(received))
+        self.assertEqual(0, flags & _FRAME_FLAG_MORE)
+
+    def test_small_frame_is_not_compressed(self):
+        _send_frame.codecs[self.sender] = get_codec("zlib")
+        _send_frame(self.sender, _FRAME_KIND_RESPONSE, 9, b"a" * (COMPRESSION_THRESHOLD - 1))
+        self.assertEqual(0, self._recv_raw_frame()[3])
+
+    @patch("drivebuildclient.CONTENT_LENGTH_LIMIT", COMPRESSION_THRESHOLD)
+    def test_compressed_chunks(self):
+        _send_frame.codecs[self.sender] = get_codec("zlib")
+        payload = b"a" * COMPRESSION_THRESHOLD * 2 + b"b" * COMPRESSION_THRESHOLD
+        _send_frame(self.sender, _FRAME_KIND_RESPONSE, 9, payload)
+        frames = [_recv_frame(self.receiver) for _ in range(3)]
+        self.assertEqual(payload, b"".join([bytes(frame[3]) for frame in frames]))
+        self.assertEqual([_FRAME_FLAG_MORE, _FRAME_FLAG_MORE, 0], [frame[2] & _FRAME_FLAG_MORE for frame in frames])
+
+    def test_unknown_codec(self):
+        self.sender.sendall(_FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, _FRAME_KIND_REQUEST,
+                                               15 << _FRAME_CODEC_SHIFT, 1, 1) + b"x")
+        with self.assertRaises(ValueError):
+            _recv_frame(self.receiver)
+
+    def test_failing_stream_ends_with_error_frame(self):
+        def _parts():
+            yield b"first"
+            raise RuntimeError("broken")
+
+        _send_result(self.sender, _FRAME_KIND_RESPONSE, 5, _parts())
+        first = _recv_frame(self.receiver)
+        last = _recv_frame(self.receiver)
+        self.assertEqual((_FRAME_FLAG_MORE, b"first"), (first[2], bytes(first[3])))
+        self.assertEqual(_FRAME_FLAG_ERROR, last[2])
+        self.assertIn(b"broken", bytes(last[3]))
+
+    def test_send_request_raises_on_failed_stream(self):
+        def _respond() -> None:
+            _, correlation_id, _, _ = _recv_frame(self.receiver)
+            _send_frame(self.receiver, _FRAME_KIND_RESPONSE, correlation_id, b"first", True)
+            _send_frame(self.receiver, _FRAME_KIND_RESPONSE, correlation_id, b"broken", error=True)
+
+        responder = Thread(target=_respond)
+        responder.start()
+        with self.assertRaises(RequestFailedError):
+            send_request(self.sender, b"a", [], WireFormat.BINARY)
+        responder.join()
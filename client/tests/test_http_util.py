@@ -0,0 +1,72 @@
+from http.client import HTTPException
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from unittest import TestCase
+
+from drivebuildclient.httpUtil import ConnectionPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self) -> None:
+        length = int(self.headers.get("content-length", 0))
+        if length:
+            self.rfile.read(length)
+        self.server.received.append((self.command, self.path))
+        if self.server.num_dropped_responses:
+            # NOTE Behaves like a host closing an idle connection while the request is on its way
+            self.server.num_dropped_responses -= 1
+            self.close_connection = True
+            return
+        self.send_response(200)
+        self.send_header("content-length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class ConnectionPoolTest(TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("localhost", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.received = []
+        self.server.num_dropped_responses = 0
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.pool = ConnectionPool("localhost", self.server.server_address[1])
+
+    def tearDown(self) -> None:
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuses_connections(self):
+        self.assertEqual(self.pool.request("GET", "/first").read(), b"ok")
+        connection = self.pool._idle[-1][0]
+        self.assertEqual(self.pool.request("GET", "/second").read(), b"ok")
+        self.assertIs(self.pool._idle[-1][0], connection)
+        self.assertEqual(len(self.pool._idle), 1)
+
+    def test_retries_idempotent_request_on_stale_connection(self):
+        self.pool.request("GET", "/warmup")
+        self.server.num_dropped_responses = 1
+        self.assertEqual(self.pool.request("GET", "/stale").status, 200)
+        self.assertEqual(self.server.received, [("GET", "/warmup"), ("GET", "/stale"), ("GET", "/stale")])
+
+    def test_does_not_retry_sent_post_request(self):
+        self.pool.request("GET", "/warmup")
+        self.server.num_dropped_responses = 1
+        with self.assertRaises((HTTPException, ConnectionError)):
+            self.pool.request("POST", "/submit", body=b"payload")
+        self.assertEqual(self.server.received, [("GET", "/warmup"), ("POST", "/submit")])
+
+    def test_evicts_expired_connections(self):
+        self.pool.idle_timeout = -1
+        self.pool.request("GET", "/first")
+        self.pool.request("GET", "/second")
+        self.assertEqual(len(self.pool._idle), 1)
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from drivebuildclient.metrics import Metrics, Histogram, aggregate
+
+
+class MetricsTest(TestCase):
+    def test_finished_simulations_are_folded(self):
+        metrics = Metrics()
+        metrics.observe("a", "steps", 0.001)
+        metrics.observe("a", "verify", 0.002)
+        metrics.observe("b", "steps", 0.003)
+        metrics.set_finished("a", True)
+        data = metrics.to_dict()
+        self.assertEqual(list(data["simulations"].keys()), ["b"])
+        self.assertEqual(data["finished"]["steps"]["count"], 1)
+        self.assertEqual(data["finished"]["verify"]["count"], 1)
+        self.assertEqual(metrics.to_dict("a"), {"simulations": {}, "finished": {}})
+
+        # Observations after finishing do not recreate the histograms of the simulation
+        metrics.observe("a", "steps", 0.004)
+        data = metrics.to_dict()
+        self.assertNotIn("a", data["simulations"])
+        self.assertEqual(data["finished"]["steps"]["count"], 2)
+
+        # Reusing the simulation ID
+        metrics.set_finished("a", False)
+        metrics.observe("a", "steps", 0.005)
+        self.assertEqual(metrics.to_dict("a")["simulations"]["a"]["steps"]["count"], 1)
+
+    def test_aggregate(self):
+        first = Metrics()
+        first.observe("a", "steps", 0.001)
+        first.observe("b", "steps", 0.002)
+        first.set_finished("b", True)
+        second = Metrics()
+        second.observe("a", "steps", 0.003)
+        malformed = {"simulations": {"c": {"steps": {"counts": []}}}, "finished": {}}
+        result = aggregate([first.to_dict(), second.to_dict(), malformed])
+        self.assertEqual(list(result["simulations"].keys()), ["a"])
+        self.assertEqual(result["simulations"]["a"]["steps"]["count"], 2)
+        self.assertEqual(result["finished"]["steps"]["count"], 1)
+        self.assertEqual(result["total"]["steps"]["count"], 3)
+        self.assertEqual(result["total"]["steps"]["max"], 0.003)
+
+    def test_histogram_quantile(self):
+        histogram = Histogram()
+        self.assertIsNone(histogram.quantile(0.5))
+        for _ in range(99):
+            histogram.observe(0.00005)
+        histogram.observe(100)
+        self.assertEqual(histogram.quantile(0.5), 0.0001)
+        self.assertEqual(histogram.quantile(1), 100)
+        self.assertEqual(Histogram.from_dict(histogram.to_dict()).to_dict(), histogram.to_dict())
@@ -1,10 +1,8 @@
-from collections import defaultdict
 from logging import getLogger, basicConfig, INFO
 from socket import socket
-from threading import Lock
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union, Set, Iterator
 
-from drivebuildclient import static_vars
+from drivebuildclient import static_vars, RequestChannel, RequestFailedError
 from drivebuildclient.aiExchangeMessages_pb2 import SimulationID, User, SubmissionResult
 from drivebuildclient.db_handler import DBConnection
 from flask import Flask, Response
@@ -17,15 +15,15 @@ _logger = getLogger("DriveBuild.MainApp")
 basicConfig(format='%(asctime)s: %(levelname)s - %(message)s', level=INFO)
 
 # FIXME Handle unregister, check alive,...
-# snid --> (socket, sid --> (vid --> socket))
-_connected_sim_nodes: Dict[str, Tuple[socket, Dict[str, Dict[str, socket]]]] = {}
+# snid --> (channel, sids)
+# NOTE All requests to a SimNode are multiplexed over a single channel
+_connected_sim_nodes: Dict[str, Tuple[RequestChannel, Set[str]]] = {}
 
 
 def _find_sim_node(sid: SimulationID) -> Optional[str]:
-    for snid, (_, sid_entries) in _connected_sim_nodes.items():
-        for sid_keys in sid_entries.keys():
-            if sid.sid in sid_keys:
-                return snid
+    for snid, (_, sids) in _connected_sim_nodes.items():
+        if sid.sid in sids:
+            return snid
     return None
 
 
@@ -61,67 +59,56 @@ def test_launcher():
         return render_template("test_launcher.html")
 
 
-# Contains tuples of vehicles in simulations that requested a socket from a simulation node
-_requested_vehicle_sockets: Dict[str, Tuple[str, str]] = {}  # snid --> (sid, vid)
+# FIXME How to recover failures?
+def _send_message_to_sim_node(snid: str, action: bytes, data: List[bytes]) -> Optional[bytes]:
+    """
+    :return: The result of the request or None if the SimNode is not connected, failed to handle the request or did not
+    respond within SIM_NODE_REQUEST_TIMEOUT seconds.
+    """
+    _remove_dead_sockets()
+    if snid in _connected_sim_nodes:
+        channel, _ = _connected_sim_nodes[snid]
+        try:
+            return channel.send_request(action, data, app.config["SIM_NODE_REQUEST_TIMEOUT"])
+        except RequestFailedError:
+            _logger.exception("SimNode " + snid + " failed to handle the action \"" + action.decode() + "\".")
+            return None
+        except TimeoutError:
+            _logger.error("SimNode " + snid + " did not respond to the action \"" + action.decode() + "\".")
+            return None
+    else:
+        return None
 
 
-# FIXME How to recover failures?
-@static_vars(locks=defaultdict(lambda: Lock()), requestLock=Lock())
-def _send_message_to_sim_node(snid: str, action: bytes, data: List[bytes], sid: Optional[str] = None,
-                              vid: Optional[str] = None) -> Optional[bytes]:
-    from drivebuildclient import send_request
+def _stream_message_to_sim_node(snid: str, action: bytes, data: List[bytes]) -> Optional[Iterator[bytes]]:
+    """
+    Like _send_message_to_sim_node(...) but returns the parts of the result as soon as they arrive.
+    NOTE Iterating the parts raises a RequestFailedError if the SimNode fails to produce the whole result and a
+    TimeoutError if a part does not arrive within SIM_NODE_REQUEST_TIMEOUT seconds. Since the response is already being
+    sent the WSGI server then aborts it, so the client does not receive a truncated result which looks complete.
+    """
     _remove_dead_sockets()
     if snid in _connected_sim_nodes:
-        main_socket, sid_entries = _connected_sim_nodes[snid]
-        if sid and vid:
-            _send_message_to_sim_node.requestLock.acquire()
-            if sid not in sid_entries.keys():
-                sid_entries[sid] = {}
-            if vid not in sid_entries[sid].keys():
-                _requested_vehicle_sockets[snid] = (sid, vid)
-                send_request(main_socket, b"requestSocket", [])
-            try:
-                while not _connected_sim_nodes[snid] \
-                        or vid not in _connected_sim_nodes[snid][1][sid]:
-                    pass  # Wait for additional socket to be registered
-                sock = _connected_sim_nodes[snid][1][sid][vid]
-            except KeyError as ex:
-                _logger.exception("Sending a message to the SimNode failed.")
-            _send_message_to_sim_node.requestLock.release()
-        else:
-            sock = main_socket
-        lock = _send_message_to_sim_node.locks[sock]
-        lock.acquire()
-        result = send_request(sock, action, data)
-        lock.release()
-        return result
+        channel, _ = _connected_sim_nodes[snid]
+        # NOTE The WSGI server requires bytes
+        return (bytes(part)
+                for part in channel.send_request_streamed(action, data, app.config["SIM_NODE_REQUEST_TIMEOUT"]))
     else:
         return None
 
 
+def _to_response(snid: str, result: Optional[Union[bytes, Iterator[bytes]]]) -> Response:
+    """
+    Wraps the result of a request to a SimNode into a response. A missing result yields an error response.
+    """
+    if result is None:
+        return Response(response="Simulation node " + snid + " did not respond properly.", status=504,
+                        mimetype="text/plain")
+    return Response(response=result, status=200, mimetype="application/x-protobuf")
+
+
 def _remove_dead_sockets() -> None:
-    def _is_dead(sock: socket) -> bool:
-        try:
-            sock.send(b"")
-            return False
-        except (ConnectionResetError, BrokenPipeError):
-            return True
-
-    to_delete_snids = []
-    to_delete_vids = []
-    sim_node_keys = _connected_sim_nodes.keys()
-    for snid in sim_node_keys:
-        sock, sid_entries = _connected_sim_nodes[snid]
-        if _is_dead(sock):
-            to_delete_snids.append(snid)
-        else:
-            if sid_entries:
-                for sid, vid_entries in sid_entries.items():
-                    for vid, sock in vid_entries.items():
-                        if _is_dead(sock):
-                            to_delete_vids.append((snid, sid, vid))
-    for snid, sid, vid in to_delete_vids:
-        del _connected_sim_nodes[snid][1][sid][vid]
+    to_delete_snids = [snid for snid, (channel, _) in _connected_sim_nodes.items() if channel.is_closed()]
     for snid in to_delete_snids:
         del _connected_sim_nodes[snid]
 
@@ -141,7 +128,7 @@ def _login_correct(user: User) -> bool:
 
 def _get_running_tests(serialized_user: bytes) -> Union[SubmissionResult.Submissions, Response]:
     submissions = SubmissionResult.Submissions()
-    for snid, (sock, _) in _connected_sim_nodes.items():
+    for snid in list(_connected_sim_nodes.keys()):
         if snid:
             submission_result = SubmissionResult()
             try:
@@ -182,18 +169,17 @@ def run_tests():
             if isinstance(submissions, SubmissionResult.Submissions):
                 if len(submissions.submissions) < run_tests.sim_instance_quota:
                     selected_snid = None
-                    for snid, (sock, sid_entries) in _connected_sim_nodes.items():
-                        if selected_snid is None or len(sid_entries) < len(_connected_sim_nodes[selected_snid][1]):
+                    for snid, (_, sids) in _connected_sim_nodes.items():
+                        if selected_snid is None or len(sids) < len(_connected_sim_nodes[selected_snid][1]):
                             selected_snid = snid
                     if selected_snid:
-                        # FIXME Find appropriate timeout
                         response = _send_message_to_sim_node(
                             selected_snid, b"runTests", [request.data, serialized_user])
                         if response:
                             submission_result.ParseFromString(response)
                             if submission_result.HasField("result"):
                                 for _, sid in submission_result.result.submissions.items():
-                                    _connected_sim_nodes[selected_snid][1][sid.sid] = {}
+                                    _connected_sim_nodes[selected_snid][1].add(sid.sid)
                                 status = 200
                             else:
                                 status = 400
@@ -235,7 +221,7 @@ def stop():
         if snid:
             serialized_result = request.args["result"].encode()
             response = _send_message_to_sim_node(snid, b"stop", [serialized_sid, serialized_result])
-            return Response(response=response, status=200, mimetype="application/x-protobuf")
+            return _to_response(snid, response)
         else:
             return Response(response="Simulation node with ID " + sid.sid + " not found",
                             status=400, mimetype="text/plain")
@@ -256,9 +242,8 @@ def wait_for_simulator_request():
         serialized_sid, sid = extract_sid()
         snid = _find_sim_node(sid)
         if snid:
-            response = _send_message_to_sim_node(snid, b"waitForSimulatorRequest",
-                                                 [serialized_sid, serialized_vid], sid.sid, vid.vid)
-            return Response(response=response, status=200, mimetype="application/x-protobuf")
+            response = _send_message_to_sim_node(snid, b"waitForSimulatorRequest", [serialized_sid, serialized_vid])
+            return _to_response(snid, response)
         else:
             return Response(response="Simulation node with hosting simulation with ID " + sid.sid + " not found",
                             status=400, mimetype="text/plain")
@@ -278,9 +263,9 @@ def request_data():
         serialized_vid, vid = extract_vid()
         snid = _find_sim_node(sid)
         if snid:
-            response = _send_message_to_sim_node(snid, b"requestData",
-                                                 [serialized_sid, serialized_vid, serialized_request], sid.sid, vid.vid)
-            return Response(response=response, status=200, mimetype="application/x-protobuf")
+            response = _stream_message_to_sim_node(snid, b"requestData",
+                                                   [serialized_sid, serialized_vid, serialized_request])
+            return _to_response(snid, response)
         else:
             return Response(response="Simulation node with ID " + sid.sid + " not found",
                             status=400, mimetype="text/plain")
@@ -300,9 +285,8 @@ def control():
         serialized_control = request.data
         snid = _find_sim_node(sid)
         if snid:
-            response = _send_message_to_sim_node(snid, b"control", [serialized_sid, serialized_vid, serialized_control],
-                                                 sid.sid, vid.vid)
-            return Response(response=response, status=200, mimetype="application/x-protobuf")
+            response = _send_message_to_sim_node(snid, b"control", [serialized_sid, serialized_vid, serialized_control])
+            return _to_response(snid, response)
         else:
             return Response(response="Simulation node with ID " + sid.sid + " not found",
                             status=400, mimetype="text/plain")
@@ -310,6 +294,29 @@ def control():
     return process_mixed_request(["sid", "vid"], do)
 
 
+@app.route("/ai/step", methods=["POST"])
+def step():
+    from drivebuildclient.httpUtil import process_mixed_request
+
+    def do() -> Response:
+        from flask import request
+        from drivebuildclient.httpUtil import extract_vid, extract_sid
+        serialized_sid, sid = extract_sid()
+        serialized_vid, vid = extract_vid()
+        serialized_request = request.args["request"].encode()
+        serialized_control = request.data
+        snid = _find_sim_node(sid)
+        if snid:
+            response = _send_message_to_sim_node(snid, b"step", [serialized_sid, serialized_vid, serialized_request,
+                                                                serialized_control])
+            return _to_response(snid, response)
+        else:
+            return Response(response="Simulation node with ID " + sid.sid + " not found",
+                            status=400, mimetype="text/plain")
+
+    return process_mixed_request(["sid", "vid", "request"], do)
+
+
 @app.route("/stats/getRunningSids", methods=["GET"])
 def get_running_sids():
     from drivebuildclient.httpUtil import process_get_request
@@ -332,6 +339,45 @@ def get_running_sids():
     return process_get_request(["user"], do)
 
 
+@app.route("/stats/metrics", methods=["GET"])
+def get_metrics():
+    """
+    Aggregates the latency histograms of the phases of simulations recorded by all SimNodes. If the parameter "sid" is
+    given only the histograms of this simulation are aggregated.
+    """
+    from drivebuildclient.httpUtil import process_get_request
+
+    def do() -> Response:
+        from drivebuildclient.httpUtil import extract_sid
+        from drivebuildclient.metrics import aggregate
+        from json import loads, dumps
+        serialized_sid, sid = extract_sid()
+        if sid:
+            snid = _find_sim_node(sid)
+            if not snid:
+                return Response(response="Simulation node with ID " + sid.sid + " not found",
+                                status=400, mimetype="text/plain")
+            snids = [snid]
+        else:
+            serialized_sid = b""
+            _remove_dead_sockets()
+            snids = list(_connected_sim_nodes.keys())
+        node_metrics = []
+        for snid in snids:
+            try:
+                response = _send_message_to_sim_node(snid, b"metrics", [serialized_sid])
+                if response:
+                    node_metrics.append(loads(bytes(response).decode()))
+                else:
+                    _logger.warning("SimNode " + snid + " did not respond to metrics request.")
+            except OSError:
+                _logger.exception("Requesting the metrics of SimNode " + snid + " failed.")
+        return Response(response=dumps(aggregate(node_metrics)), status=200, mimetype="application/json")
+
+    # NOTE The parameter "sid" is optional
+    return process_get_request([], do)
+
+
 @app.route("/stats/<action>", methods=["GET"])
 def status(action: str):
     from drivebuildclient.httpUtil import process_get_request
@@ -400,6 +446,35 @@ def status(action: str):
     return process_get_request(["sid"], do)
 
 
+# The mimetypes of the protobuf payloads of the API (including the misspelled one used by getRunningSids)
+_COMPRESSED_MIMETYPES: List[str] = ["application/x-protobuf", "x-application/protobuf"]
+
+
+@app.after_request
+def compress_response(response: Response) -> Response:
+    """
+    Compresses protobuf responses using the most preferred codec the requester accepts. Small responses and all other
+    responses like pages and static files stay uncompressed.
+    """
+    from flask import request
+    from drivebuildclient.compression import negotiate_http, compress_stream, COMPRESSION_THRESHOLD
+    if response.mimetype not in _COMPRESSED_MIMETYPES or response.direct_passthrough:
+        return response
+    codec = negotiate_http(request.headers.get("Accept-Encoding"))
+    if codec and response.status_code == 200 and "Content-Encoding" not in response.headers:
+        if response.is_streamed:
+            response.response = compress_stream(codec, response.response)
+            response.headers.pop("Content-Length", None)
+        else:
+            content = response.get_data()
+            if len(content) < COMPRESSION_THRESHOLD:
+                return response
+            response.set_data(codec.compress(content))
+        response.headers["Content-Encoding"] = codec.http_name
+        response.vary.add("Accept-Encoding")
+    return response
+
+
 @app.errorhandler(404)
 def page_not_found(error):
     from flask import render_template
@@ -434,25 +509,14 @@ def _wait_for_sim_node_registers() -> None:
         return snid
 
     def on_register(conn: socket, addr: Tuple[str, int]) -> None:
+        # NOTE Each SimNode connects exactly once since all requests to it are multiplexed over this connection
         _remove_dead_sockets()
-        snid = None
-        for cur_snid, (main_sock, _) in _connected_sim_nodes.items():
-            if main_sock.getpeername()[0] == addr[0]:
-                snid = cur_snid
-                break
-        if snid:
-            if snid in _requested_vehicle_sockets.keys():
-                sid, vid = _requested_vehicle_sockets[snid]
-                del _requested_vehicle_sockets[snid]
-                _connected_sim_nodes[snid][1][sid][vid] = conn
-            else:
-                _logger.debug("Got superfluous socket for " + str(addr))
-        else:
-            snid = generate_snid()
-            _connected_sim_nodes[snid] = (conn, {})
-            snid_obj = SimulationNodeID()
-            snid_obj.snid = snid
-            conn.send(snid_obj.SerializeToString())
+        snid = generate_snid()
+        _logger.debug("Registered SimNode " + snid + " at " + str(addr))
+        snid_obj = SimulationNodeID()
+        snid_obj.snid = snid
+        conn.send(snid_obj.SerializeToString())
+        _connected_sim_nodes[snid] = (RequestChannel(conn), set())
 
     sim_node_register_thread = Thread(target=accept_at_server, args=(create_server(5001), on_register))
     sim_node_register_thread.start()
@@ -460,4 +524,7 @@ def _wait_for_sim_node_registers() -> None:
 
 _wait_for_sim_node_registers()
 if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=app.config["PORT"])
+    from werkzeug.serving import WSGIRequestHandler
+    # NOTE HTTP/1.1 keeps the connections of clients alive between requests
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    app.run(host="0.0.0.0", port=app.config["PORT"], threaded=True)
@@ -13,6 +13,15 @@ DBMS_PASSWORD = "drivebuild"
 SIM_NODE_PORT = 5002
 FIRST_SIM_PORT = 40000
 TIMEOUT = 600  # In seconds
+IMAGE_ENCODING_WORKERS = 4  # The number of threads encoding camera images
+MOVEMENT_MODE_POLL_INTERVAL = 0.05  # In seconds
+IN_PROCESS_CONTROL = True  # Whether control loops of simulations call their SimNode directly instead of using sockets
+TRACE_MAX_PENDING_ROWS = 256  # The number of rows of traces which may wait for being stored before simulations block
+TRACE_MAX_BATCH_BYTES = 64000000  # The maximum number of bytes of traces stored by a single query
+FAST_FORWARD = False  # Whether to step in larger batches while no participant is controlled by an AI
+FAST_FORWARD_RESOLUTION = 60  # The maximum number of ticks between evaluations of criteria while fast-forwarding
+FAST_FORWARD_MIN_SPEED = 5  # In m/s. The speed assumed at least when estimating when participants reach waypoints
+BATCH_STATE_CONDITIONS = True  # Whether to evaluate position, speed, distance and area conditions all at once
 
 # BeamNG
 BEAMNG_INSTALL_FOLDER = "E:\\gitrepos\\beamng-research_unlimited\\trunk"
@@ -1,11 +1,16 @@
 from dataclasses import dataclass
 from datetime import datetime
-from threading import Thread
+from enum import Enum
+from logging import getLogger
+from threading import Thread, Condition
+from typing import Optional, Any, Dict, List, Callable
 
 from beamngpy import Scenario
 from drivebuildclient.aiExchangeMessages_pb2 import TestResult, User, SimulationID
 from lxml.etree import _ElementTree
 
+_logger = getLogger("DriveBuild.SimNode.DBTypes")
+
 
 class ExtThread:
     """
@@ -46,6 +51,60 @@ class ExtThread:
         self._status = status
 
 
+class Rendezvous:
+    """
+    Synchronizes a simulation with the AI controlling one of its vehicles. Both sides arrive once per tick and wait
+    until the other side arrived at the same tick as well.
+    """
+
+    def __init__(self):
+        self._condition = Condition()
+        self._num_sim_arrivals = 0
+        self._num_ai_arrivals = 0
+        self._cancelled = False
+
+    def _arrive(self, is_simulation: bool, timeout: Optional[float]) -> bool:
+        with self._condition:
+            if is_simulation:
+                self._num_sim_arrivals += 1
+                tick = self._num_sim_arrivals
+            else:
+                self._num_ai_arrivals += 1
+                tick = self._num_ai_arrivals
+            self._condition.notify_all()
+
+            def _other_arrived() -> bool:
+                return (self._num_ai_arrivals if is_simulation else self._num_sim_arrivals) >= tick
+
+            self._condition.wait_for(lambda: self._cancelled or _other_arrived(), timeout)
+            return _other_arrived()
+
+    def arrive_simulation(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the AI arrives at the current tick, the timeout passes or the rendezvous is cancelled.
+        :return: True only if the AI arrived.
+        """
+        return self._arrive(True, timeout)
+
+    def arrive_ai(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the simulation arrives at the current tick, the timeout passes or the rendezvous is cancelled.
+        :return: True only if the simulation arrived.
+        """
+        return self._arrive(False, timeout)
+
+    def cancel(self) -> None:
+        """
+        Wakes up all current and future waiters e.g. since the simulation ended.
+        """
+        with self._condition:
+            self._cancelled = True
+            self._condition.notify_all()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+
 @dataclass
 class SimulationData:
     scenario: Scenario
@@ -56,3 +115,197 @@ class SimulationData:
     start_time: datetime = None
     end_time: datetime = None
     user: User = None
+    criteria_evaluator: Any = None  # CriteriaEvaluator (Built when verifying the first time)
+
+
+class SimulationState(Enum):
+    RUNNING = "RUNNING"
+    FINISHED = "FINISHED"
+
+
+@dataclass
+class SimulationEntry:
+    simulation: Any  # Simulation
+    data: SimulationData
+    state: SimulationState = SimulationState.RUNNING
+
+
+class SimulationRegistry:
+    """
+    Keeps track of all simulations of a SimNode indexed by their IDs. The registry is thread-safe.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, SimulationEntry] = {}
+        self._condition = Condition()
+        self._listeners: List[Callable[[SimulationEntry], None]] = []
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self._entries
+
+    def register(self, simulation: Any, data: SimulationData) -> SimulationEntry:  # simulation: Simulation
+        """
+        Registers a new running simulation. A simulation with the same ID is replaced.
+        """
+        entry = SimulationEntry(simulation, data)
+        with self._condition:
+            self._entries[simulation.sid.sid] = entry
+            self._condition.notify_all()
+        self._notify(entry)
+        return entry
+
+    def get(self, sid: str) -> Optional[SimulationEntry]:
+        return self._entries.get(sid)
+
+    def wait_for(self, sid: str, timeout: Optional[float] = None) -> Optional[SimulationEntry]:
+        """
+        Blocks until a simulation with the given ID is registered.
+        :return: The entry of the simulation or None if it was not registered within the given number of seconds.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: sid in self._entries, timeout)
+            return self._entries.get(sid)
+
+    def entries(self) -> List[SimulationEntry]:
+        with self._condition:
+            return list(self._entries.values())
+
+    def set_state(self, sid: str, state: SimulationState) -> None:
+        with self._condition:
+            entry = self._entries.get(sid)
+            if not entry or entry.state is state:
+                return
+            entry.state = state
+        self._notify(entry)
+
+    def add_listener(self, listener: Callable[[SimulationEntry], None]) -> None:
+        """
+        Adds a listener which is called whenever a simulation is registered or changes its state.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, entry: SimulationEntry) -> None:
+        for listener in self._listeners:
+            try:
+                listener(entry)
+            except Exception:
+                _logger.exception("A listener of the simulation registry failed.")
+
+
+class TraceWriter:
+    """
+    Inserts rows into a table of the database within a background thread. Rows which are pending at the same time are
+    inserted by a single query as long as their payloads do not exceed max_batch_bytes. If more than max_pending rows
+    are pending adding further rows blocks until the writer caught up. If inserting a batch fails its rows are inserted
+    one by one so a single bad row does not drop the whole batch.
+    """
+
+    def __init__(self, db_connection: Any, table: str, columns: List[str], max_pending: int, max_batch_bytes: int,
+                 on_written: Optional[Callable[[List[Dict[str, Any]], float], None]] = None):  # DBConnection
+        """
+        :param max_batch_bytes: The maximum number of bytes of the str and bytes values of the rows inserted by a single
+        query. A single row exceeding this limit is inserted on its own.
+        :param on_written: If given it is called with the rows written by a query and the duration of the query in
+        seconds.
+        """
+        from queue import Queue
+        self._db_connection = db_connection
+        self._table = table
+        self._columns = columns
+        self._max_pending = max_pending
+        self._max_batch_bytes = max_batch_bytes
+        self._on_written = on_written
+        self._rows = Queue(max_pending)
+        self._condition = Condition()
+        self._num_added = 0
+        self._num_processed = 0
+        self.num_dropped = 0  # The number of rows which could not be inserted
+        writer = Thread(target=self._write)
+        writer.daemon = True
+        writer.start()
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """
+        Schedules the insertion of the given row. Blocks while the writer falls behind.
+        :param row: Maps all columns to their values.
+        """
+        self._rows.put(row)
+        with self._condition:
+            self._num_added += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until all rows added before calling this method are processed. Rows which could not be inserted are
+        logged and counted by num_dropped.
+        :return: False only if the rows were not processed within the given number of seconds.
+        """
+        with self._condition:
+            num_added = self._num_added
+            return self._condition.wait_for(lambda: self._num_processed >= num_added, timeout)
+
+    @staticmethod
+    def _get_size(row: Dict[str, Any]) -> int:
+        return sum([len(value) for value in row.values() if isinstance(value, (str, bytes, bytearray, memoryview))])
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Inserts the given rows by a single query.
+        :return: Whether the rows were inserted.
+        """
+        from time import perf_counter
+        values = []
+        args = {}
+        for index, row in enumerate(rows):
+            values.append("(" + ", ".join([":" + column + "_" + str(index) for column in self._columns]) + ")")
+            for column in self._columns:
+                args[column + "_" + str(index)] = row[column]
+        start = perf_counter()
+        # NOTE DBConnection logs failing queries itself and returns None
+        # NOTE The columns are named explicitly since their order may differ in tables migrated by ALTER TABLE
+        result = self._db_connection.run_query("INSERT INTO " + self._table + " (" + ", ".join(self._columns)
+                                               + ") VALUES " + ", ".join(values) + ";", args)
+        if result is None:
+            return False
+        if self._on_written:
+            try:
+                self._on_written(rows, perf_counter() - start)
+            except Exception:
+                _logger.exception("Handling written rows of table " + self._table + " failed.")
+        return True
+
+    def _write(self) -> None:
+        from queue import Empty
+        next_row = None
+        while True:
+            rows = [next_row if next_row else self._rows.get()]
+            next_row = None
+            batch_bytes = TraceWriter._get_size(rows[0])
+            while len(rows) < self._max_pending:
+                try:
+                    row = self._rows.get_nowait()
+                except Empty:
+                    break
+                row_bytes = TraceWriter._get_size(row)
+                if batch_bytes + row_bytes > self._max_batch_bytes:
+                    next_row = row  # NOTE The row starts the next batch
+                    break
+                rows.append(row)
+                batch_bytes += row_bytes
+            try:
+                if self._insert(rows):
+                    failed_rows = []
+                elif len(rows) > 1:
+                    _logger.warning("Inserting " + str(len(rows)) + " rows into table " + self._table
+                                    + " at once failed. Inserting them one by one.")
+                    failed_rows = [row for row in rows if not self._insert([row])]
+                else:
+                    failed_rows = rows
+            except Exception:
+                _logger.exception("Inserting rows into table " + self._table + " failed.")
+                failed_rows = rows
+            if failed_rows:
+                _logger.error("Dropped " + str(len(failed_rows)) + " rows of table " + self._table + ".")
+            with self._condition:
+                self.num_dropped += len(failed_rows)
+                self._num_processed += len(rows)
+                self._condition.notify_all()
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Dict, Any
 
 from beamngpy import Vehicle, Scenario
 from logging import getLogger
@@ -6,6 +6,18 @@ from logging import getLogger
 _logger = getLogger("DriveBuild.SimNode.DBTypes.BeamNG")
 
 
+class VehicleSnapshot:
+    """
+    The data derived from the sensor cache of a vehicle after its sensors were polled. Until the sensors are polled
+    again the criteria, the data requests of AIs and the trace of a simulation share it.
+    """
+
+    def __init__(self, tick: Optional[int]):
+        self.tick = tick
+        self.values: Dict[str, Any] = {}  # rid --> data returned by AiRequest::read_sensor_cache_of
+        self.serialized: Dict[str, bytes] = {}  # rid --> serialized DataResponse containing only the data of rid
+
+
 class DBVehicle(Vehicle):
     from requests import AiRequest
     from typing import Any
@@ -15,6 +27,8 @@ class DBVehicle(Vehicle):
         super().__init__(vid, **options)
         self.requests = {}
         self._vehicle_lock = Lock()
+        self.snapshot = VehicleSnapshot(None)
+        self.polled_tick = None
 
     def poll_sensors(self, requests):
         _logger.debug(self.vid + ": Try acquire lock for polling sensors")
@@ -25,6 +39,19 @@ class DBVehicle(Vehicle):
         self._vehicle_lock.release()
         return result
 
+    def attach_sensor(self, name, sensor):
+        super().attach_sensor(name, sensor)
+        # NOTE Make sure the new sensor is polled even if the sensors were already polled in the current tick
+        self.polled_tick = None
+
+    def update_snapshot(self, tick: int) -> None:
+        """
+        Discards all data derived from the previous sensor cache. Has to be called after the sensors were polled.
+        :param tick: The tick at which the sensors were polled.
+        """
+        self.snapshot = VehicleSnapshot(tick)
+        self.polled_tick = tick
+
     def control(self, **options):
         _logger.debug(self.vid + ": Try acquire lock for controlling")
         self._vehicle_lock.acquire()
@@ -55,6 +82,15 @@ class DBVehicle(Vehicle):
         The return type depends on the return type of the appropriate AIRequest.
         """
         if rid in self.requests:
-            return self.requests[rid].read_sensor_cache_of(self, scenario)
+            return self.read_request(self.requests[rid], scenario)
         else:
             _logger.warning("The vehicle " + self.vid + " has no request called " + rid + " attached.")
+
+    def read_request(self, request: AiRequest, scenario: Scenario) -> Optional[Any]:
+        """
+        Reads the data of the given request from the sensor cache only once per polling of the sensors.
+        """
+        snapshot = self.snapshot
+        if request.rid not in snapshot.values:
+            snapshot.values[request.rid] = request.read_sensor_cache_of(self, scenario)
+        return snapshot.values[request.rid]
@@ -2,10 +2,12 @@ from logging import getLogger
 from os.path import join
 from queue import Queue
 from threading import Lock
+from typing import List, Any, Optional
 
 from beamngpy import BeamNGpy
 
 from config import BEAMNG_USER_PATH, BEAMNG_INSTALL_FOLDER
+from dbtypes.roads import RoadGeometry
 
 _logger = getLogger("DriveBuild.SimNode.DBTypes.BeamNGpy")
 
@@ -25,6 +27,8 @@ class DBBeamNGpy(BeamNGpy):
         super().__init__(host, port, BEAMNG_INSTALL_FOLDER, user_path)
         self.current_tick = 0
         self._sim_lock = Lock()
+        self._road_geometry = None
+        self._road_geometry_lock = Lock()
 
     def step(self, count, wait=True):
         self._sim_lock.acquire()
@@ -33,9 +37,17 @@ class DBBeamNGpy(BeamNGpy):
         self.current_tick += count
 
     def poll_sensors(self, vehicle):
+        """
+        Polls the sensors of the given vehicle at most once per tick.
+        NOTE Engine sensors (e.g. cameras) are requested via the socket of this instance which is shared by all vehicles.
+        """
         if self.skt:
+            if vehicle.polled_tick == self.current_tick:
+                return
             try:
-                super().poll_sensors(vehicle)
+                with self._sim_lock:
+                    super().poll_sensors(vehicle)
+                vehicle.update_snapshot(self.current_tick)
             except Exception:
                 _logger.exception("Polling sensors failed")
 
@@ -50,13 +62,23 @@ class DBBeamNGpy(BeamNGpy):
 
     def get_road_edges(self, road):
         try:
-            self._sim_lock.acquire()
-            result = super().get_road_edges(road)
-            self._sim_lock.release()
-            return result
+            with self._sim_lock:
+                return super().get_road_edges(road)
         except Exception:
             _logger.exception("Requesting road edges failed")
 
+    def get_road_geometry(self, roads: List[Any]) -> Optional[RoadGeometry]:  # roads: List[Road]
+        """
+        Returns the geometry of the given roads. Since roads do not change after a scenario is loaded their edges are
+        requested only once.
+        :param roads: All roads of the scenario which is loaded by this instance.
+        :return: The geometry of the roads or None if their edges could not be requested.
+        """
+        with self._road_geometry_lock:
+            if self._road_geometry is None:
+                self._road_geometry = RoadGeometry.fetch(self, roads)
+            return self._road_geometry
+
     def get_vehicle_bbox(self, vehicle):
         try:
             self._sim_lock.acquire()
@@ -2,9 +2,11 @@ from abc import ABC
 from dataclasses import dataclass
 from enum import Enum
 from logging import getLogger
-from typing import List, Tuple, Callable
+from math import inf
+from typing import List, Tuple, Callable, Mapping, Optional, Dict, Hashable
 
 from beamngpy import Scenario
+from numpy import ndarray
 
 _logger = getLogger("DriveBuild.SimNode.DBTypes.Criteria")
 
@@ -40,24 +42,112 @@ class KPValue(Enum):
         return self.UNKNOWN
 
 
+class EvaluationContext:
+    """
+    Caches the results of all criteria evaluated within the same tick. Criteria having the same structural key share a
+    single result.
+    """
+
+    def __init__(self, tick: Optional[int] = None, observe: Optional[Callable[[str, float], None]] = None):
+        """
+        :param observe: If given it is called with the type and the duration in seconds of each evaluation of a state
+        condition.
+        """
+        self.tick = tick
+        self.observe = observe
+        self._results: Dict[Hashable, KPValue] = {}
+
+    def lookup(self, evaluable: "Evaluable") -> KPValue:
+        """
+        :return: The cached result of the given criterion. Evaluates the criterion if there is no cached result yet.
+        """
+        key = evaluable.key()
+        result = self._results.get(key)
+        if result is None:
+            if self.observe and isinstance(evaluable, StateCondition):
+                from time import perf_counter
+                start = perf_counter()
+                result = evaluable._eval(self)
+                self.observe(type(evaluable).__name__, perf_counter() - start)
+            else:
+                result = evaluable._eval(self)
+            self._results[key] = result
+        return result
+
+
 class Evaluable(ABC):
     from abc import abstractmethod
-    @abstractmethod
-    def eval(self) -> KPValue:
+
+    # A rough estimate of how expensive an evaluation is. Connectives evaluate cheap criteria first.
+    cost: int = 1
+    # The first and the last tick in which the result of this criterion may matter (see VCTime)
+    window: Tuple[float, float] = (0, inf)
+
+    def eval(self, context: Optional[EvaluationContext] = None) -> KPValue:
         """
         Evaluates to KPValue.TRUE only if the condition got triggered.
+        :param context: If given results are cached within this context and criteria are skipped outside their windows.
         """
+        if context is None:
+            return self._eval(context)
+        if not self.is_active(context.tick):
+            # NOTE Outside its window the result of a criterion is ignored by the enclosing VCTime anyway
+            return KPValue.UNKNOWN
+        return context.lookup(self)
+
+    def is_active(self, tick: Optional[int]) -> bool:
+        return tick is None or self.window[0] <= tick <= self.window[1]
+
+    def restrict_window(self, first: float, last: float) -> None:
+        """
+        Restricts the window of this criterion and all its inner criteria to the given ticks (both inclusive).
+        """
+        self.window = (max(self.window[0], first), min(self.window[1], last))
+        for child in self.children():
+            child.restrict_window(*self._inner_window())
+
+    def _inner_window(self) -> Tuple[float, float]:
+        """
+        :return: The window of the inner criteria.
+        """
+        return self.window
+
+    def children(self) -> List["Evaluable"]:
+        """
+        :return: The criteria directly contained in this criterion.
+        """
+        return []
+
+    @abstractmethod
+    def _eval(self, context: Optional[EvaluationContext]) -> KPValue:
         pass
 
+    def key(self) -> Hashable:
+        """
+        :return: A key which is equal for criteria having the same structure and parameters.
+        """
+        if not hasattr(self, "_key"):
+            self._key = self._create_key()
+        return self._key
+
+    def _create_key(self) -> Hashable:
+        return type(self).__name__, id(self)
+
+    def get_cost(self) -> int:
+        return self.cost
+
 
 class UnknownEvaluable(Evaluable):
     """
     A class that can be used for representing an "empty" evaluable e.g. representing an empty precondition criterion.
     """
 
-    def eval(self) -> KPValue:
+    def _eval(self, _: Optional[EvaluationContext]) -> KPValue:
         return KPValue.UNKNOWN
 
+    def _create_key(self) -> Hashable:
+        return type(self).__name__,
+
 
 class Criterion(Evaluable, ABC):
     def __init__(self, scenario: Scenario) -> None:
@@ -80,6 +170,8 @@ class StateCondition(Criterion, ABC):
         super().__init__(scenario)
         # TODO Check existence of participant id
         self.participant = participant
+        # NOTE If set the condition evaluates to this value instead of polling its own data (see StateConditionBatch)
+        self.batched_value: Optional[KPValue] = None
         self.requests = self._create_requests()
         for request in self.requests:
             vehicle = self._get_vehicle()
@@ -94,7 +186,7 @@ class StateCondition(Criterion, ABC):
     def _poll_request_data(self) -> List[Any]:
         request_data = []
         for request in self.requests:
-            request_data.append(request.read_sensor_cache_of(self._get_vehicle(), self.scenario))
+            request_data.append(self._get_vehicle().read_request(request, self.scenario))
         return request_data
 
     @static_vars(prefix="criterion_", counter=0)
@@ -110,12 +202,23 @@ class StateCondition(Criterion, ABC):
     def _is_simulation_running(self) -> bool:
         return self.scenario.bng is not None
 
-    def eval(self) -> KPValue:
+    def _eval(self, _: Optional[EvaluationContext]) -> KPValue:
+        if self.batched_value is not None:
+            return self.batched_value
         if self._is_simulation_running():
             return self._eval_impl()
         else:
             return KPValue.UNKNOWN
 
+    def _create_key(self) -> Hashable:
+        return (type(self).__name__, self.participant) + self._key_args()
+
+    def _key_args(self) -> Tuple:
+        """
+        :return: The parameters of this condition besides its participant.
+        """
+        return ()
+
     @abstractmethod
     def _eval_impl(self) -> KPValue:
         pass
@@ -136,6 +239,9 @@ class SCPosition(StateCondition):
         self.y = y
         self.tolerance = tolerance
 
+    def _key_args(self) -> Tuple:
+        return self.x, self.y, self.tolerance
+
     def _create_requests(self) -> List[AiRequest]:
         from requests import PositionRequest
         return [PositionRequest(self._generate_rid())]
@@ -154,11 +260,16 @@ class SCPosition(StateCondition):
 class SCArea(StateCondition):
     from requests import AiRequest
 
+    cost = 2
+
     def __init__(self, scenario: Scenario, participant: str, points: List[Tuple[float, float]]):
         from shapely.geometry import Polygon
         super().__init__(scenario, participant)
         self.polygon = Polygon(points)
 
+    def _key_args(self) -> Tuple:
+        return tuple(self.polygon.exterior.coords)
+
     def _create_requests(self) -> List[AiRequest]:
         from requests import PositionRequest
         return [PositionRequest(self._generate_rid())]
@@ -176,40 +287,31 @@ class SCArea(StateCondition):
 class SCLane(StateCondition):
     from requests import AiRequest
 
+    cost = 10
+
     def __init__(self, scenario: Scenario, participant: str, lane: str):
         super().__init__(scenario, participant)
         # TODO Check existence of lane id
         self.lane = lane
 
+    def _key_args(self) -> Tuple:
+        return self.lane,
+
     def _create_requests(self) -> List[AiRequest]:
         from requests import BoundingBoxRequest
         return [BoundingBoxRequest(self._generate_rid())]
 
     def _eval_impl(self) -> KPValue:
-        from typing import Dict
-        from shapely.geometry import Polygon
         bbox = self._poll_request_data()[0]
-
-        def _to_polygon(road_edges: List[Dict[str, float]]) -> Polygon:
-            points = [p["left"][0:2] for p in road_edges]
-            right_edge_points = [p["right"][0:2] for p in road_edges]
-            right_edge_points.reverse()
-            points.extend(right_edge_points)
-            return Polygon(shell=points)
-
         if bbox:
-            check_offroad = self.lane == "offroad"
-            for road in self.scenario.roads:
-                if road.rid and self.lane in ["offroad", road.rid]:
-                    edges = self.scenario.bng.get_road_edges(road.rid)
-                    polygon = _to_polygon(edges)
-                    if polygon.intersects(bbox):
-                        condition_fulfilled = not check_offroad
-                        break
+            road_geometry = self.scenario.bng.get_road_geometry(self.scenario.roads)
+            if road_geometry is None:
+                return KPValue.UNKNOWN
+            if self.lane == "offroad":
+                condition_fulfilled = not road_geometry.intersecting_roads(bbox)
             else:
-                condition_fulfilled = check_offroad
-            assert condition_fulfilled is not None, "SCLane has an execution path which did not validate the condition"
-            return condition_fulfilled
+                condition_fulfilled = road_geometry.intersects(self.lane, bbox)
+            return KPValue.TRUE if condition_fulfilled else KPValue.FALSE
         else:
             return KPValue.UNKNOWN
 
@@ -223,6 +325,9 @@ class SCSpeed(StateCondition):
             raise ValueError("Speed limits must be non negative.")
         self.speed_limit = speed_limit
 
+    def _key_args(self) -> Tuple:
+        return self.speed_limit,
+
     def _create_requests(self) -> List[AiRequest]:
         from requests import SpeedRequest
         return [SpeedRequest(self._generate_rid())]
@@ -264,6 +369,9 @@ class SCDistance(StateCondition):
         self.other_participant = other_participant
         self.max_distance = max_distance
 
+    def _key_args(self) -> Tuple:
+        return self.other_participant, self.max_distance
+
     def _create_requests(self) -> List[AiRequest]:
         from requests import PositionRequest
         return [PositionRequest(self._generate_rid())]
@@ -291,6 +399,9 @@ class SCLight(StateCondition):
         super().__init__(scenario, participant)
         self.light = light
 
+    def _key_args(self) -> Tuple:
+        return self.light,
+
     def _create_requests(self) -> List[AiRequest]:
         from requests import LightRequest
         return [LightRequest(self._generate_rid())]
@@ -309,6 +420,9 @@ class SCWaypoint(StateCondition):
         # TODO Check whether waypoint id exists
         self.waypoint = waypoint
 
+    def _key_args(self) -> Tuple:
+        return self.waypoint,
+
     def _create_requests(self) -> List[AiRequest]:
         return []
 
@@ -325,12 +439,21 @@ class ValidationConstraint(Criterion, ABC):
         super().__init__(scenario)
         self.inner = inner
 
-    def eval(self) -> KPValue:
+    def _eval(self, context: Optional[EvaluationContext]) -> KPValue:
         # FIXME How to distinguish VCs that got ignored from ones that could not be determined?
-        return self.inner.eval() if self.eval_cond() == KPValue.TRUE else KPValue.UNKNOWN
+        return self.inner.eval(context) if self.eval_cond(context) == KPValue.TRUE else KPValue.UNKNOWN
+
+    def _create_key(self) -> Hashable:
+        return type(self).__name__, self.inner.key()
+
+    def children(self) -> List[Evaluable]:
+        return [self.inner]
+
+    def get_cost(self) -> int:
+        return self.cost + self.inner.get_cost()
 
     @abstractmethod
-    def eval_cond(self) -> KPValue:
+    def eval_cond(self, context: Optional[EvaluationContext] = None) -> KPValue:
         pass
 
 
@@ -339,8 +462,17 @@ class ValidationConstraintSC(ValidationConstraint, ABC):
         super().__init__(scenario, inner)
         self.sc = sc
 
-    def eval_cond(self) -> KPValue:
-        return self.sc.eval()
+    def eval_cond(self, context: Optional[EvaluationContext] = None) -> KPValue:
+        return self.sc.eval(context)
+
+    def _create_key(self) -> Hashable:
+        return type(self).__name__, self.sc.key(), self.inner.key()
+
+    def children(self) -> List[Evaluable]:
+        return [self.sc, self.inner]
+
+    def get_cost(self) -> int:
+        return self.sc.get_cost() + self.inner.get_cost()
 
 
 class VCPosition(ValidationConstraintSC):
@@ -375,7 +507,13 @@ class VCTime(ValidationConstraint):
         self.from_tick = from_tick
         self.to_tick = to_tick
 
-    def eval_cond(self) -> KPValue:
+    def _create_key(self) -> Hashable:
+        return type(self).__name__, self.from_tick, self.to_tick, self.inner.key()
+
+    def _inner_window(self) -> Tuple[float, float]:
+        return max(self.window[0], self.from_tick), min(self.window[1], self.to_tick)
+
+    def eval_cond(self, _: Optional[EvaluationContext] = None) -> KPValue:
         from dbtypes.beamngpy import DBBeamNGpy
         from warnings import warn
         bng = self.scenario.bng
@@ -397,7 +535,7 @@ class VCTTC(ValidationConstraint):
     def __init__(self, scenario: Scenario, inner: Evaluable):
         super().__init__(scenario, inner)
 
-    def eval_cond(self) -> KPValue:
+    def eval_cond(self, _: Optional[EvaluationContext] = None) -> KPValue:
         # TODO Determine collision to which participant/obstacle
         # FIXME Position is in center of car vs crash when colliding with its bounding box
         return KPValue.UNKNOWN
@@ -423,29 +561,265 @@ class Connective(Evaluable, ABC):
 class BinaryConnective(Connective, ABC):
     def __init__(self, evaluables: List[Evaluable]) -> None:
         self.evaluables = evaluables
+        self._ordered_evaluables = None
+
+    def _get_ordered_evaluables(self) -> List[Evaluable]:
+        """
+        :return: The inner criteria ordered from cheap to expensive ones.
+        """
+        if self._ordered_evaluables is None:
+            self._ordered_evaluables = sorted(self.evaluables, key=lambda e: e.get_cost())
+        return self._ordered_evaluables
+
+    def _short_circuit(self, context: Optional[EvaluationContext], dominant: KPValue, neutral: KPValue) -> KPValue:
+        """
+        Evaluates the inner criteria until one evaluates to the dominant value.
+        :param dominant: The value determining the result on its own (KPValue.FALSE for And, KPValue.TRUE for Or).
+        :param neutral: The result if all inner criteria evaluate to this value.
+        """
+        result = neutral
+        for evaluable in self._get_ordered_evaluables():
+            value = evaluable.eval(context)
+            if value is dominant:
+                return dominant
+            if value is KPValue.UNKNOWN:
+                result = KPValue.UNKNOWN
+        return result
+
+    def _create_key(self) -> Hashable:
+        return type(self).__name__, tuple(e.key() for e in self.evaluables)
+
+    def children(self) -> List[Evaluable]:
+        return self.evaluables
+
+    def get_cost(self) -> int:
+        return sum(e.get_cost() for e in self.evaluables)
 
 
 class And(BinaryConnective):
-    def eval(self) -> KPValue:
-        return KPValue.TRUE if all(map(lambda e: e.eval() is KPValue.TRUE, self.evaluables)) else KPValue.FALSE
+    def _eval(self, context: Optional[EvaluationContext]) -> KPValue:
+        return self._short_circuit(context, KPValue.FALSE, KPValue.TRUE)
 
 
 class Or(BinaryConnective):
-    def eval(self) -> KPValue:
-        return KPValue.TRUE if any(map(lambda e: e.eval() is KPValue.TRUE, self.evaluables)) else KPValue.FALSE
+    def _eval(self, context: Optional[EvaluationContext]) -> KPValue:
+        return self._short_circuit(context, KPValue.TRUE, KPValue.FALSE)
 
 
 class Not(Connective):
     def __init__(self, evaluable: Evaluable) -> None:
         self.evaluable = evaluable
 
-    def eval(self) -> KPValue:
-        return self.evaluable.eval().__neg__()
+    def _eval(self, context: Optional[EvaluationContext]) -> KPValue:
+        return self.evaluable.eval(context).__neg__()
+
+    def _create_key(self) -> Hashable:
+        return type(self).__name__, self.evaluable.key()
+
+    def children(self) -> List[Evaluable]:
+        return [self.evaluable]
+
+    def get_cost(self) -> int:
+        return self.evaluable.get_cost()
 
 
 CriteriaFunction = Callable[[Scenario], Evaluable]
 
 
+def _collect(evaluable: Evaluable) -> List[Evaluable]:
+    """
+    :return: The given criterion and all criteria contained in it.
+    """
+    evaluables = [evaluable]
+    for child in evaluable.children():
+        evaluables.extend(_collect(child))
+    return evaluables
+
+
+class StateConditionBatch:
+    """
+    Evaluates all position, speed, distance and area conditions at once. Each tick a single snapshot of the positions
+    and speeds of all involved participants is taken and every kind of condition is evaluated by a single vectorized
+    pass over these arrays. The results are stored as batched values of the conditions.
+    """
+
+    def __init__(self, scenario: Scenario, conditions: List[StateCondition]):
+        from numpy import array, zeros
+        self.scenario = scenario
+        self.participants: List[str] = []
+        indices: Dict[str, int] = {}
+
+        def _index_of(participant: str) -> int:
+            if participant not in indices:
+                indices[participant] = len(self.participants)
+                self.participants.append(participant)
+            return indices[participant]
+
+        self.positions = [c for c in conditions if type(c) is SCPosition]
+        self.position_indices = array([_index_of(c.participant) for c in self.positions], dtype=int)
+        self.position_targets = array([(c.x, c.y) for c in self.positions], dtype=float).reshape(-1, 2)
+        self.position_tolerances = array([c.tolerance for c in self.positions], dtype=float)
+
+        self.speeds = [c for c in conditions if type(c) is SCSpeed]
+        self.speed_indices = array([_index_of(c.participant) for c in self.speeds], dtype=int)
+        self.speed_limits = array([c.speed_limit for c in self.speeds], dtype=float)
+
+        self.distances = [c for c in conditions if type(c) is SCDistance]
+        self.distance_indices = array([_index_of(c.participant) for c in self.distances], dtype=int)
+        self.distance_other_indices = array([_index_of(c.other_participant) for c in self.distances], dtype=int)
+        self.distance_limits = array([c.max_distance for c in self.distances], dtype=float)
+
+        self.areas = [c for c in conditions if type(c) is SCArea]
+        self.area_indices = array([_index_of(c.participant) for c in self.areas], dtype=int)
+        self.area_polygons = array([c.polygon for c in self.areas], dtype=object)
+
+        self.conditions = self.positions + self.speeds + self.distances + self.areas
+        self.windows = array([c.window for c in self.conditions], dtype=float).reshape(-1, 2)
+        # NOTE uses[i, j] denotes whether the i-th condition requires the state of the j-th participant
+        self.uses = zeros((len(self.conditions), len(self.participants)), dtype=bool)
+        for index, condition in enumerate(self.conditions):
+            self.uses[index, indices[condition.participant]] = True
+            if type(condition) is SCDistance:
+                self.uses[index, indices[condition.other_participant]] = True
+
+    def __len__(self) -> int:
+        return len(self.conditions)
+
+    def _take_snapshot(self, required: ndarray) -> Tuple[ndarray, ndarray]:
+        """
+        :param required: Denotes for each participant whether its state is required.
+        :return: The x and y coordinates (n, 2) and the speeds (n) of all involved participants. Unknown values and
+        values of participants which are not required are NaN.
+        """
+        from numpy import full, nan, flatnonzero
+        from numpy.linalg import norm
+        positions = full((len(self.participants), 2), nan)
+        speeds = full(len(self.participants), nan)
+        for index in flatnonzero(required):
+            vehicle = self.scenario.get_vehicle(self.participants[index])
+            if vehicle and vehicle.state:
+                positions[index] = vehicle.state["pos"][0:2]
+                speeds[index] = norm(vehicle.state["vel"])
+        return positions, speeds
+
+    @staticmethod
+    def _assign(conditions: List[StateCondition], known: ndarray, fulfilled: ndarray) -> None:
+        for condition, is_known, is_fulfilled in zip(conditions, known, fulfilled):
+            if is_known:
+                condition.batched_value = KPValue.TRUE if is_fulfilled else KPValue.FALSE
+            else:
+                condition.batched_value = KPValue.UNKNOWN
+
+    def eval(self, tick: Optional[int] = None) -> None:
+        """
+        Evaluates all conditions of this batch against the current state of the participants. Conditions whose windows
+        do not contain the given tick evaluate to KPValue.UNKNOWN and the states of participants only they require are
+        not read.
+        """
+        from numpy import isnan, hypot, zeros, ones, flatnonzero
+        if self.scenario.bng is None:
+            for condition in self.conditions:
+                condition.batched_value = KPValue.UNKNOWN
+            return
+        if tick is None:
+            active = ones(len(self.conditions), dtype=bool)
+        else:
+            active = (self.windows[:, 0] <= tick) & (tick <= self.windows[:, 1])
+        positions, speeds = self._take_snapshot(self.uses[active].any(axis=0))
+        known_positions = ~isnan(positions[:, 0])
+
+        if self.positions:
+            offsets = positions[self.position_indices] - self.position_targets
+            StateConditionBatch._assign(self.positions, known_positions[self.position_indices],
+                                        hypot(offsets[:, 0], offsets[:, 1]) <= self.position_tolerances)
+
+        if self.speeds:
+            selected_speeds = speeds[self.speed_indices]
+            # NOTE Like SCSpeed a speed of zero is considered unknown
+            StateConditionBatch._assign(self.speeds, ~isnan(selected_speeds) & (selected_speeds != 0),
+                                        selected_speeds > self.speed_limits)
+
+        if self.distances:
+            offsets = positions[self.distance_indices] - positions[self.distance_other_indices]
+            StateConditionBatch._assign(
+                self.distances,
+                known_positions[self.distance_indices] & known_positions[self.distance_other_indices],
+                hypot(offsets[:, 0], offsets[:, 1]) <= self.distance_limits)
+
+        if self.areas:
+            import shapely
+            selected_positions = positions[self.area_indices]
+            known = known_positions[self.area_indices]
+            if hasattr(shapely, "contains_xy"):
+                contained = zeros(len(self.areas), dtype=bool)
+                contained[known] = shapely.contains_xy(self.area_polygons[known], selected_positions[known, 0],
+                                                       selected_positions[known, 1])
+            else:  # NOTE Shapely 1 does not provide vectorized predicates
+                from shapely.geometry import Point
+                contained = [is_known and polygon.contains(Point(x, y))
+                             for polygon, is_known, (x, y) in zip(self.area_polygons, known, selected_positions)]
+            StateConditionBatch._assign(self.areas, known, contained)
+
+        for index in flatnonzero(~active):
+            self.conditions[index].batched_value = KPValue.UNKNOWN
+
+
+class CriteriaEvaluator:
+    """
+    Builds the criteria of a simulation only once and evaluates them against the current data of each tick.
+    NOTE Building criteria attaches sensors to vehicles. Hence the simulation has to be running.
+    """
+
+    def __init__(self, scenario: Scenario, precondition_fct: CriteriaFunction, failure_fct: CriteriaFunction,
+                 success_fct: CriteriaFunction, batched: bool = False,
+                 observe: Optional[Callable[[str, float], None]] = None):
+        """
+        :param batched: Whether to evaluate the position, speed, distance and area conditions of all criteria at once
+        (see StateConditionBatch).
+        :param observe: If given it is called with the type and the duration in seconds of each evaluation of a state
+        condition or a batch of them.
+        """
+        self.scenario = scenario
+        self.observe = observe
+        self.precondition = precondition_fct(scenario)
+        self.failure = failure_fct(scenario)
+        self.success = success_fct(scenario)
+        evaluables = []
+        for criterion in [self.precondition, self.failure, self.success]:
+            criterion.restrict_window(0, inf)
+            evaluables.extend(_collect(criterion))
+        # NOTE The ticks at which any criterion enters or leaves its window
+        self.window_changes = sorted({tick for e in evaluables for tick in [e.window[0], e.window[1] + 1]
+                                      if tick not in [0, inf]})
+        if batched:
+            self.batch = StateConditionBatch(scenario, [e for e in evaluables if isinstance(e, StateCondition)])
+        else:
+            self.batch = None
+
+    def eval(self) -> Tuple[KPValue, KPValue, KPValue]:
+        """
+        :return: The evaluation of the precondition, the failure and the success criteria.
+        """
+        bng = self.scenario.bng
+        context = EvaluationContext(getattr(bng, "current_tick", None), self.observe)
+        if self.batch:
+            from time import perf_counter
+            start = perf_counter()
+            self.batch.eval(context.tick)
+            if self.observe:
+                self.observe(type(self.batch).__name__, perf_counter() - start)
+        return self.precondition.eval(context), self.failure.eval(context), self.success.eval(context)
+
+    def next_window_change(self, tick: int) -> Optional[int]:
+        """
+        :return: The first tick after the given one at which any criterion enters or leaves its window. Returns None if
+        there is no such tick.
+        """
+        from bisect import bisect_right
+        index = bisect_right(self.window_changes, tick)
+        return int(self.window_changes[index]) if index < len(self.window_changes) else None
+
+
 # Test case type
 @dataclass
 class TestCase:
@@ -458,3 +832,28 @@ class TestCase:
     stepsPerSecond: int
     aiFrequency: int
     authors: List[str]
+
+
+@dataclass(frozen=True)
+class TestCaseView:
+    """
+    An immutable view on the parts of a test case a running simulation accesses repeatedly.
+    """
+    from dbtypes.scheme import Participant, MovementMode
+    name: str
+    participants: Mapping[str, Participant]  # pid --> participant
+    initial_modes: Mapping[str, MovementMode]  # pid --> movement mode of the initial state
+    precondition_fct: CriteriaFunction
+    success_fct: CriteriaFunction
+    failure_fct: CriteriaFunction
+    steps_per_second: int
+    ai_frequency: int
+
+    @staticmethod
+    def of(test_case: TestCase) -> "TestCaseView":
+        from types import MappingProxyType
+        participants = {p.id: p for p in test_case.scenario.participants}
+        return TestCaseView(test_case.name, MappingProxyType(participants),
+                            MappingProxyType({pid: p.initial_state.mode for pid, p in participants.items()}),
+                            test_case.precondition_fct, test_case.success_fct, test_case.failure_fct,
+                            test_case.stepsPerSecond, test_case.aiFrequency)
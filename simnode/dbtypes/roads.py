@@ -0,0 +1,132 @@
+from logging import getLogger
+from typing import Dict, List, Tuple, Any, Optional
+
+from numpy import ndarray
+from shapely.geometry import Polygon
+from shapely.geometry.base import BaseGeometry
+
+_logger = getLogger("DriveBuild.SimNode.DBTypes.Roads")
+
+
+class RoadGeometry:
+    """
+    The static geometry of all roads of a scenario. The edges of all roads are fetched once and turned into prepared
+    polygons which are indexed by a STRtree.
+    """
+
+    def __init__(self, edges: Dict[str, Tuple[ndarray, ndarray]]):
+        """
+        :param edges: Maps road IDs to the x and y coordinates of the left and the right edge of a road. Each edge is an
+        array of shape (n, 2).
+        """
+        from shapely.prepared import prep
+        from shapely.strtree import STRtree
+        self.edges = edges
+        self.rids = list(edges.keys())
+        self._positions = {rid: index for index, rid in enumerate(self.rids)}
+        self.polygons = [RoadGeometry._to_polygon(left, right) for left, right in edges.values()]
+        self._prepared = [prep(polygon) for polygon in self.polygons]
+        self._indices = {id(polygon): index for index, polygon in enumerate(self.polygons)}
+        self._tree = STRtree(self.polygons) if self.polygons else None
+
+    @staticmethod
+    def _to_polygon(left: ndarray, right: ndarray) -> Polygon:
+        from numpy import concatenate
+        return Polygon(shell=concatenate((left, right[::-1])))
+
+    @staticmethod
+    def fetch(bng: Any, roads: List[Any]) -> Optional["RoadGeometry"]:  # bng: DBBeamNGpy, roads: List[Road]
+        """
+        Requests the edges of all given roads from BeamNG.
+        :return: The geometry of the roads or None if the edges of any road could not be requested.
+        """
+        from numpy import array
+        edges = {}
+        for road in roads:
+            if road.rid:
+                road_edges = bng.get_road_edges(road.rid)
+                if road_edges is None:
+                    _logger.warning("Could not request the edges of road \"" + road.rid + "\".")
+                    return None
+                edges[road.rid] = (array([p["left"][0:2] for p in road_edges], dtype=float),
+                                   array([p["right"][0:2] for p in road_edges], dtype=float))
+        return RoadGeometry(edges)
+
+    def _query(self, geometry: BaseGeometry) -> List[int]:
+        """
+        :return: The indices of all polygons whose bounding boxes intersect the bounding box of the given geometry.
+        """
+        if self._tree is None:
+            return []
+        candidates = self._tree.query(geometry)
+        # NOTE Shapely 2 returns indices whereas shapely 1 returns the geometries themselves
+        return [int(c) if hasattr(c, "__index__") else self._indices[id(c)] for c in candidates]
+
+    def intersecting_roads(self, geometry: BaseGeometry) -> List[str]:
+        """
+        :return: The IDs of all roads intersecting the given geometry.
+        """
+        return [self.rids[index] for index in sorted(self._query(geometry))
+                if self._prepared[index].intersects(geometry)]
+
+    def intersects(self, rid: str, geometry: BaseGeometry) -> bool:
+        """
+        :return: Whether the road with the given ID intersects the given geometry.
+        """
+        if rid not in self._positions:
+            return False
+        return self._prepared[self._positions[rid]].intersects(geometry)
+
+
+class RoadSegments:
+    """
+    A table of all segments of the center lines of roads which allows to find the segment nearest to a point within a
+    single vectorized pass.
+    """
+
+    def __init__(self, roads: List[Any]):  # roads: List[Road]
+        """
+        :param roads: The roads whose center lines are defined by the positions of their nodes. Roads with less than two
+        nodes are ignored.
+        """
+        from numpy import array, concatenate, full, arctan2, rad2deg, einsum, empty
+        self.rids = []
+        starts = []
+        ends = []
+        road_indices = []
+        for road in roads:
+            if len(road.nodes) < 2:
+                _logger.warning("Road \"" + str(road.rid) + "\" has less than two nodes and is ignored.")
+                continue
+            positions = array([node.position[0:2] for node in road.nodes], dtype=float)
+            starts.append(positions[:-1])
+            ends.append(positions[1:])
+            road_indices.append(full(len(positions) - 1, len(self.rids)))
+            self.rids.append(road.rid)
+        if self.rids:
+            self.starts = concatenate(starts)
+            self.ends = concatenate(ends)
+            self.road_indices = concatenate(road_indices)
+        else:
+            self.starts = empty((0, 2))
+            self.ends = empty((0, 2))
+            self.road_indices = empty(0, dtype=int)
+        self.directions = self.ends - self.starts
+        self.squared_lengths = einsum("ij,ij->i", self.directions, self.directions)
+        self.headings = rad2deg(arctan2(self.directions[:, 1], self.directions[:, 0]))
+
+    def nearest(self, x: float, y: float) -> Optional[Tuple[str, float, float]]:
+        """
+        :return: The ID of the road having the segment nearest to the given point, the distance to this segment and the
+        heading of this segment in degrees. Returns None if there are no segments.
+        """
+        from numpy import einsum, clip, divide, zeros_like, argmin, sqrt
+        if not self.rids:
+            return None
+        offsets = (x, y) - self.starts
+        projections = divide(einsum("ij,ij->i", offsets, self.directions), self.squared_lengths,
+                             out=zeros_like(self.squared_lengths), where=self.squared_lengths > 0)
+        differences = offsets - clip(projections, 0, 1)[:, None] * self.directions
+        squared_distances = einsum("ij,ij->i", differences, differences)
+        index = argmin(squared_distances)
+        return self.rids[self.road_indices[index]], float(sqrt(squared_distances[index])), float(self.headings[index])
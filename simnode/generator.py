@@ -273,7 +273,9 @@ def generate_scenario(env: _ElementTree, participants_node: _Element) -> Scenari
         Cylinder, Cone, Bump, Stopsign, TrafficLightSingle, TrafficLightDouble
     from util.xml import xpath, get_tag_name
     from requests import PositionRequest, SpeedRequest, SteeringAngleRequest, CameraRequest, CameraDirection, \
-        LidarRequest, RoadCenterDistanceRequest, CarToLaneAngleRequest, BoundingBoxRequest, RoadEdgesRequest
+        CameraEncoding, LidarRequest, RoadCenterDistanceRequest, CarToLaneAngleRequest, BoundingBoxRequest, \
+        RoadEdgesRequest
+    from dbtypes.roads import RoadSegments
 
     roads: List[Road] = list()
 
@@ -365,6 +367,8 @@ def generate_scenario(env: _ElementTree, participants_node: _Element) -> Scenari
                None if speed_limit is None else float(speed_limit) / 3.6, \
                None if target_speed is None else float(target_speed) / 3.6
 
+    # NOTE The segments of the roads are shared by all requests which need the road nearest to a participant
+    road_segments: Optional[RoadSegments] = None
     participants = list()
     participant_nodes = xpath(participants_node, "db:participant")
     for node in participant_nodes:
@@ -395,14 +399,22 @@ def generate_scenario(env: _ElementTree, participants_node: _Element) -> Scenari
                 height = int(req_node.get("height"))
                 fov = int(req_node.get("fov"))
                 direction = CameraDirection[req_node.get("direction")]
-                ai_requests.append(CameraRequest(rid, width, height, fov, direction))
+                encoding = CameraEncoding[req_node.get("encoding", CameraEncoding.PNG.value)]
+                png_compression = int(req_node.get("pngCompression", 6))
+                jpeg_quality = int(req_node.get("jpegQuality", 75))
+                ai_requests.append(CameraRequest(rid, width, height, fov, direction, encoding, png_compression,
+                                                 jpeg_quality))
             elif tag == "lidar":
                 radius = int(req_node.get("radius"))
                 ai_requests.append(LidarRequest(rid, radius))
             elif tag == "roadCenterDistance":
-                ai_requests.append(RoadCenterDistanceRequest(rid, roads))
+                if road_segments is None:
+                    road_segments = RoadSegments(roads)
+                ai_requests.append(RoadCenterDistanceRequest(rid, road_segments))
             elif tag == "carToLaneAngle":
-                ai_requests.append(CarToLaneAngleRequest(rid, roads))
+                if road_segments is None:
+                    road_segments = RoadSegments(roads)
+                ai_requests.append(CarToLaneAngleRequest(rid, road_segments))
             elif tag == "boundingBox":
                 ai_requests.append(BoundingBoxRequest(rid))
             elif tag == "roadEdges":
@@ -73,13 +73,10 @@ class RoadEdgesRequest(AiRequest):
 
     def read_sensor_cache_of(self, vehicle: Vehicle, scenario: Scenario) \
             -> Optional[Dict[str, Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]]]:
-        road_edges = {}
-        for road in scenario.roads:
-            edges = scenario.bng.get_road_edges(road.rid)
-            left_points = [p["left"][0:2] for p in edges]
-            right_points = [p["right"][0:2] for p in edges]
-            road_edges[road.rid] = (left_points, right_points)
-        return road_edges
+        road_geometry = scenario.bng.get_road_geometry(scenario.roads)
+        if road_geometry is None:
+            return None
+        return {rid: (left.tolist(), right.tolist()) for rid, (left, right) in road_geometry.edges.items()}
 
 
 class DamageRequest(AiRequest):
@@ -149,17 +146,31 @@ class CameraDirection(Enum):
     DASH = "DASH"
 
 
+class CameraEncoding(Enum):
+    RAW = "RAW"
+    PNG = "PNG"
+    JPEG = "JPEG"
+
+
 class CameraRequest(AiRequest):
     from beamngpy import Vehicle
     from typing import Tuple
     from PIL.Image import Image
 
-    def __init__(self, rid: str, width: int, height: int, fov: int, direction: CameraDirection):
+    def __init__(self, rid: str, width: int, height: int, fov: int, direction: CameraDirection,
+                 encoding: CameraEncoding = CameraEncoding.PNG, png_compression: int = 6, jpeg_quality: int = 75):
+        """
+        :param png_compression: The compression level (0-9) to use if encoding images as PNG.
+        :param jpeg_quality: The quality (1-95) to use if encoding images as JPEG.
+        """
         super().__init__(rid)
         self.width = width
         self.height = height
         self.fov = fov
         self.direction = direction
+        self.encoding = encoding
+        self.png_compression = png_compression
+        self.jpeg_quality = jpeg_quality
 
     def add_sensor_to(self, vehicle: Vehicle) -> None:
         from beamngpy.sensors import Camera
@@ -218,6 +229,22 @@ class CameraRequest(AiRequest):
         data = vehicle.sensor_cache[self.rid]
         return data["colour"], data["annotation"], data["depth"]
 
+    def encode(self, image: Image) -> bytes:
+        """
+        Encodes a single image captured by this camera as requested.
+        """
+        from io import BytesIO
+        if self.encoding is CameraEncoding.RAW:
+            return image.tobytes()
+        bytes_arr = BytesIO()
+        if self.encoding is CameraEncoding.JPEG:
+            if image.mode not in ["RGB", "L"]:  # NOTE JPEG does not support e.g. alpha channels
+                image = image.convert("RGB")
+            image.save(bytes_arr, format="JPEG", quality=self.jpeg_quality)
+        else:
+            image.save(bytes_arr, format="PNG", compress_level=self.png_compression)
+        return bytes_arr.getvalue()
+
 
 class LightRequest(AiRequest):
     from beamngpy import Vehicle
@@ -237,30 +264,25 @@ class RoadCenterDistanceRequest(AiRequest):
     from typing import Tuple, List, Optional, Any
     # from dbtypes.scheme import Lane  # FIXME Cannot import Lane
 
-    def __init__(self, rid: str, roads: List[Any]):  # roads: List[Road]
-        from shapely.geometry import LineString, Point
+    def __init__(self, rid: str, road_segments: Any):  # road_segments: RoadSegments
+        """
+        :param road_segments: The segments of all roads of the scenario. These are shared by all requests of a scenario.
+        """
         super().__init__(rid)
-        self.road_lines = {}
-        for road in roads:
-            road_line = LineString([Point(node.position[0], node.position[1]) for node in road.nodes])
-            self.road_lines[road.rid] = road_line
+        self.road_segments = road_segments
 
     def add_sensor_to(self, vehicle: Vehicle) -> None:
         pass
 
     def read_sensor_cache_of(self, vehicle: Vehicle, _: Scenario) -> Optional[Tuple[str, float]]:
-        from shapely.geometry import Point
         if vehicle.state:
             x, y, _ = vehicle.state["pos"]
-            car_pos = Point(x, y)
-            road_id = None
-            min_dist = None
-            for cur_road_id, cur_road in self.road_lines.items():
-                cur_dist = cur_road.distance(car_pos)
-                if not min_dist or cur_dist < min_dist:
-                    road_id = cur_road_id
-                    min_dist = cur_dist
-            return road_id, min_dist
+            nearest = self.road_segments.nearest(x, y)
+            if nearest:
+                road_id, min_dist, _ = nearest
+                return road_id, min_dist
+            else:
+                return None, None
         else:
             return None
 
@@ -270,41 +292,27 @@ class CarToLaneAngleRequest(AiRequest):
     from typing import Tuple, Any, List
     # from dbtypes.scheme import Lane  # FIXME Can not import Lane
 
-    def __init__(self, rid: str, roads: List[Any]):  # roads: List[Road]
-        from shapely.geometry import LineString, Point
+    def __init__(self, rid: str, road_segments: Any):  # road_segments: RoadSegments
+        """
+        :param road_segments: The segments of all roads of the scenario. These are shared by all requests of a scenario.
+        """
         super().__init__(rid)
-        self.road_lines = {}
-        for road in roads:
-            road_line = LineString([Point(node.position[0], node.position[1]) for node in road.nodes])
-            self.road_lines[road.rid] = road_line
+        self.road_segments = road_segments
 
     def add_sensor_to(self, vehicle: Vehicle) -> None:
         pass
 
     def read_sensor_cache_of(self, vehicle: Vehicle, _: Scenario) -> Optional[Tuple[str, float]]:
-        from shapely.geometry import Point, LineString
-        from numpy import rad2deg, arctan2, array
+        from numpy import rad2deg, arctan2
         if vehicle.state:
             x, y, _ = vehicle.state["pos"]
-            car_pos = Point(x, y)
             x_dir, y_dir, _ = vehicle.state["dir"]
             car_angle = rad2deg(arctan2(y_dir, x_dir))
-            min_dist = None
-            angle_diff = None
-            road_id = None
-            for cur_road_id, cur_road in self.road_lines.items():
-                cur_coord = cur_road.coords[0]
-                for i in range(1, len(cur_road.coords)):
-                    next_coord = cur_road.coords[i]
-                    cur_line = LineString([cur_coord, next_coord])
-                    cur_dist = cur_line.distance(car_pos)
-                    if not min_dist or cur_dist < min_dist:
-                        min_dist = cur_dist
-                        diff = array(next_coord) - array(cur_coord)
-                        cur_angle = rad2deg(arctan2(diff[1], diff[0]))
-                        angle_diff = car_angle - cur_angle
-                        road_id = cur_road_id
-                    cur_coord = next_coord
-            return road_id, angle_diff
+            nearest = self.road_segments.nearest(x, y)
+            if nearest:
+                road_id, _, road_angle = nearest
+                return road_id, car_angle - road_angle
+            else:
+                return None, None
         else:
             return None
@@ -1,34 +1,278 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from logging import getLogger
 from socket import socket
-from threading import Lock
-from typing import List, Set, Optional, Tuple, Callable
+from threading import Lock, Event
+from typing import List, Set, Optional, Tuple, Callable, Iterable, Dict, Iterator
 
 from beamngpy import Scenario
 from drivebuildclient import static_vars
-from drivebuildclient.aiExchangeMessages_pb2 import SimulationID
+from drivebuildclient.aiExchangeMessages_pb2 import SimulationID, TestResult, CycleTiming
 
 from dbtypes import ExtThread
 from dbtypes.beamngpy import DBBeamNGpy
-from dbtypes.criteria import TestCase, KPValue, CriteriaFunction
+from dbtypes.criteria import TestCase, KPValue, CriteriaFunction, TestCaseView
 from dbtypes.scheme import Participant, MovementMode
 
 _logger = getLogger("DriveBuild.SimNode.SimController")
 
 
+class MovementModeTracker:
+    """
+    Keeps the current movement modes of participants in memory. Lua triggers within BeamNG write the modes into a file
+    per participant. A background thread watches these files for changes.
+    NOTE BeamNG runs on Windows so there is no inotify. Instead the watcher compares the modification times of files.
+    """
+
+    def __init__(self, get_mode_file_path: Callable[[str], str], pids: Iterable[str]):
+        self._get_mode_file_path = get_mode_file_path
+        self._pids = list(pids)
+        self._modes: Dict[str, MovementMode] = {}
+        self._modification_times: Dict[str, int] = {}
+        self._lock = Lock()
+        self._stop_event = Event()
+        self._watcher = None
+
+    def start(self) -> None:
+        from threading import Thread
+        self._watcher = Thread(target=self._watch)
+        self._watcher.daemon = True
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def get(self, pid: str) -> Optional[MovementMode]:
+        """
+        Returns the current movement mode of the given participant or None if its mode file does not exist (yet).
+        NOTE The returned mode may be up to MOVEMENT_MODE_POLL_INTERVAL seconds stale. Hence a control loop may request
+        an AI once more or once less in the tick a participant switches its mode. The mode file is only read directly
+        if the watcher does not run or did not read a mode of the participant yet.
+        """
+        if self._watcher and self._watcher.is_alive():
+            mode = self._modes.get(pid)
+            if mode is not None:
+                return mode
+        return self._refresh(pid)
+
+    def _refresh(self, pid: str) -> Optional[MovementMode]:
+        import os
+        mode_file_path = self._get_mode_file_path(pid)
+        with self._lock:
+            try:
+                modification_time = os.stat(mode_file_path).st_mtime_ns
+            except FileNotFoundError:
+                return None
+            if self._modification_times.get(pid) != modification_time:
+                with open(mode_file_path, "r") as mode_file:
+                    serialized_mode = mode_file.readline()
+                if serialized_mode in MovementMode.__members__:
+                    self._modes[pid] = MovementMode[serialized_mode]
+                    self._modification_times[pid] = modification_time
+                else:  # NOTE Lua may not have finished writing the file
+                    _logger.debug("Could not read the movement mode of " + pid + " from \"" + serialized_mode + "\"")
+            return self._modes.get(pid)
+
+    def _watch(self) -> None:
+        from config import MOVEMENT_MODE_POLL_INTERVAL
+        while not self._stop_event.wait(MOVEMENT_MODE_POLL_INTERVAL):
+            for pid in self._pids:
+                try:
+                    self._refresh(pid)
+                except OSError:
+                    _logger.exception("Watching the movement mode of " + pid + " failed.")
+
+
+class SimNodeController(ABC):
+    """
+    The operations the control loop of a simulation requests from the simulation node managing the simulation.
+    """
+
+    @abstractmethod
+    def is_running(self) -> bool:
+        pass
+
+    @abstractmethod
+    def get_vids(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    def poll_sensors(self) -> None:
+        pass
+
+    @abstractmethod
+    def verify(self) -> Tuple[KPValue, KPValue, KPValue]:
+        """
+        :return: The evaluation of the precondition, the failure and the success criteria.
+        """
+        pass
+
+    @abstractmethod
+    def request_ai_for(self, vid: str) -> None:
+        """
+        Blocks until the AI of the given vehicle finished its current tick.
+        """
+        pass
+
+    @abstractmethod
+    def store_verification_cycle(self, timing: CycleTiming) -> None:
+        pass
+
+    @abstractmethod
+    def steps(self, steps: int) -> None:
+        pass
+
+    @abstractmethod
+    def get_fast_forward_bound(self) -> Optional[int]:
+        """
+        :return: The number of ticks the simulation may advance at once without missing a change of the windows of
+        criteria or a participant reaching a waypoint which changes its movement mode. None if there is no bound.
+        """
+        pass
+
+    @abstractmethod
+    def stop(self, result: TestResult.Result) -> None:
+        pass
+
+    def close(self) -> None:
+        """
+        Releases all resources of this controller.
+        """
+        pass
+
+
+@contextmanager
+def _measure_phase(timing: CycleTiming, phase: str) -> Iterator[None]:
+    """
+    Records the duration of the body of a with statement as the duration of the given phase of a cycle.
+    """
+    from time import monotonic_ns
+    start = monotonic_ns()
+    try:
+        yield
+    finally:
+        timing.phases_ns[phase] = monotonic_ns() - start
+
+
+class SocketSimNodeController(SimNodeController):
+    """
+    Sends the operations of the control loop to the server of a simulation which passes them to its simulation node.
+    NOTE This is only required if the control loop does not run within the process of the simulation node.
+    """
+
+    def __init__(self, sid: SimulationID, port: int):
+        self.serialized_sid = sid.SerializeToString()
+        self.sim_name = "drivebuild_" + sid.sid
+        self.port = port
+        self._sim_node_client_socket = None
+
+    def send_message_to_sim_node(self, action: bytes, data: List[bytes]) -> bytes:
+        from drivebuildclient import send_request, create_client
+        from time import sleep
+        while not self._sim_node_client_socket:
+            try:
+                self._sim_node_client_socket = create_client("localhost", self.port)
+            except ConnectionRefusedError:
+                retry_delay = 5
+                _logger.debug("Retry creating client connection in " + str(retry_delay) + " seconds.")
+                sleep(retry_delay)
+        result = send_request(self._sim_node_client_socket, action, data)
+        return result
+
+    def is_running(self) -> bool:
+        from drivebuildclient.aiExchangeMessages_pb2 import Bool
+        is_running = Bool()
+        is_running.ParseFromString(self.send_message_to_sim_node(b"isRunning", [self.serialized_sid]))
+        return is_running.value
+
+    def get_vids(self) -> List[str]:
+        from drivebuildclient.aiExchangeMessages_pb2 import VehicleIDs
+        vids = VehicleIDs()
+        vids.ParseFromString(self.send_message_to_sim_node(b"vids", [self.serialized_sid]))
+        return list(vids.vids)
+
+    def poll_sensors(self) -> None:
+        self.send_message_to_sim_node(b"pollSensors", [self.serialized_sid])
+
+    def verify(self) -> Tuple[KPValue, KPValue, KPValue]:
+        from drivebuildclient.aiExchangeMessages_pb2 import VerificationResult
+        # FIXME Determine appropriate timeout
+        response = self.send_message_to_sim_node(b"verify", [self.serialized_sid])
+        if response:
+            verification = VerificationResult()
+            verification.ParseFromString(response)
+            return KPValue[verification.precondition], KPValue[verification.failure], KPValue[verification.success]
+        else:
+            _logger.warning("Verification of criteria at simulation " + self.sim_name + " timed out.")
+            return KPValue.UNKNOWN, KPValue.UNKNOWN, KPValue.UNKNOWN
+
+    def request_ai_for(self, vid: str) -> None:
+        from drivebuildclient.aiExchangeMessages_pb2 import VehicleID
+        vehicle_id = VehicleID()
+        vehicle_id.vid = vid
+        message = self.send_message_to_sim_node(b"requestAiFor", [self.serialized_sid, vehicle_id.SerializeToString()])
+        _logger.debug(message)
+
+    def store_verification_cycle(self, timing: CycleTiming) -> None:
+        self.send_message_to_sim_node(b"storeVerificationCycle", [self.serialized_sid, timing.SerializeToString()])
+
+    def steps(self, steps: int) -> None:
+        from drivebuildclient.aiExchangeMessages_pb2 import Num
+        num = Num()
+        num.num = steps
+        self.send_message_to_sim_node(b"steps", [self.serialized_sid, num.SerializeToString()])
+
+    def get_fast_forward_bound(self) -> Optional[int]:
+        from drivebuildclient.aiExchangeMessages_pb2 import Num
+        bound = Num()
+        bound.ParseFromString(self.send_message_to_sim_node(b"fastForwardBound", [self.serialized_sid]))
+        return None if bound.num < 0 else bound.num
+
+    def stop(self, result: TestResult.Result) -> None:
+        test_result = TestResult()
+        test_result.result = result
+        self.send_message_to_sim_node(b"stop", [self.serialized_sid, test_result.SerializeToString()])
+
+    def close(self) -> None:
+        from socket import SHUT_RDWR
+        if self._sim_node_client_socket:
+            try:
+                self._sim_node_client_socket.shutdown(SHUT_RDWR)
+            except OSError:
+                pass  # The connection is already closed
+            self._sim_node_client_socket.close()
+            self._sim_node_client_socket = None
+
+
 class Simulation:
     def __init__(self, sid: SimulationID, pickled_test_case: bytes, port: int):
         import dill as pickle
         self.sid = sid
         self._sim_name = "drivebuild_" + sid.sid
         self.serialized_sid = sid.SerializeToString()
+        # NOTE Only use the pickled test case where it has to be passed to other processes
         self.pickled_test_case = pickled_test_case
-        test_case = pickle.loads(pickled_test_case)
-        self.test_name = test_case.name
+        self.test_case = TestCaseView.of(pickle.loads(pickled_test_case))
+        self.test_name = self.test_case.name
         self.port = port
+        self._movement_modes = MovementModeTracker(lambda pid: self._get_movement_mode_file_path(pid, False),
+                                                   self.test_case.participants.keys())
         self._sim_server_socket = None
-        self._sim_node_client_socket = None
+        self._controller = None
+        self._controller_set = Event()
+
+    def set_controller(self, controller: SimNodeController) -> None:
+        """
+        Sets the controller the control loop of this simulation uses for requesting its simulation node.
+        """
+        self._controller = controller
+        self._controller_set.set()
 
     def start_server(self, handle_simulation_message: Callable[[socket, Tuple[str, int]], None]) -> None:
+        """
+        Starts a server passing the requests of the control loop to the given handler. Use this only if the control
+        loop can not access its simulation node directly (see set_controller(...)).
+        """
         from threading import Thread
         from drivebuildclient import accept_at_server, create_server
         if self._sim_server_socket:
@@ -40,19 +284,7 @@ class Simulation:
                                                     args=(self._sim_server_socket, handle_simulation_message))
             simulation_sim_node_com_server.daemon = True
             simulation_sim_node_com_server.start()
-
-    def send_message_to_sim_node(self, action: bytes, data: List[bytes]) -> bytes:
-        from drivebuildclient import send_request, create_client
-        from time import sleep
-        while not self._sim_node_client_socket:
-            try:
-                self._sim_node_client_socket = create_client("localhost", self.port)
-            except ConnectionRefusedError:
-                retry_delay = 5
-                _logger.debug("Retry creating client connection in " + str(retry_delay) + " seconds.")
-                sleep(retry_delay)
-        result = send_request(self._sim_node_client_socket, action, data)
-        return result
+            self.set_controller(SocketSimNodeController(self.sid, self.port))
 
     def _get_movement_mode_file_path(self, pid: str, in_lua: bool) -> str:
         """
@@ -66,15 +298,7 @@ class Simulation:
         return os.path.join("" if in_lua else self.get_user_path(), pid + "_movementMode")
 
     def get_current_movement_mode(self, pid: str) -> Optional[MovementMode]:
-        import os
-        mode_file_path = self._get_movement_mode_file_path(pid, False)
-        if os.path.exists(mode_file_path):
-            mode_file = open(mode_file_path, "r")
-            mode = MovementMode[mode_file.readline()]
-            mode_file.close()
-            return mode
-        else:
-            return None
+        return self._movement_modes.get(pid)
 
     def _generate_lua_av_command(self, participant: Participant, idx: int, next_mode: MovementMode) -> List[str]:
         """
@@ -334,20 +558,24 @@ class Simulation:
         prefab_file.writelines(new_content)
         prefab_file.close()
 
+    def _get_movement_mode(self, pid: str) -> MovementMode:
+        mode = self.get_current_movement_mode(pid)
+        if not mode:  # If there is no movement mode file assume participant is still in mode of initial state
+            mode = self.test_case.initial_modes[pid]
+        return mode
+
+    def _is_any_ai_controlled(self, vids: List[str]) -> bool:
+        """
+        :return: Whether any of the given participants is controlled by an external AI.
+        """
+        return any(self._get_movement_mode(v) in [MovementMode.AUTONOMOUS, MovementMode.TRAINING] for v in vids)
+
     def _request_control_avs(self, vids: List[str]) -> None:
-        from drivebuildclient.aiExchangeMessages_pb2 import VehicleID
-        import dill as pickle
         for v in vids:
             # print(self.sid.sid + ": Request control for " + v)
-            mode = self.get_current_movement_mode(v)
-            if not mode:  # If there is no movement mode file assume participant is still in mode of initial state
-                test_case = pickle.loads(self.pickled_test_case)
-                mode = [p.initial_state.mode for p in test_case.scenario.participants if p.id == v][0]
+            mode = self._get_movement_mode(v)
             if mode in [MovementMode.AUTONOMOUS, MovementMode.TRAINING, MovementMode._BEAMNG]:
-                vid = VehicleID()
-                vid.vid = v
-                message = self.send_message_to_sim_node(b"requestAiFor", [self.serialized_sid, vid.SerializeToString()])
-                _logger.debug(message)
+                self._controller.request_ai_for(v)
             elif mode == MovementMode.MANUAL:
                 pass  # No AI to request
             else:
@@ -404,81 +632,79 @@ class Simulation:
         """
         Returns precondition, failure and success function.
         """
-        import dill as pickle
-        test_case: TestCase = pickle.loads(self.pickled_test_case)
-        return test_case.precondition_fct, test_case.failure_fct, test_case.success_fct
+        return self.test_case.precondition_fct, self.test_case.failure_fct, self.test_case.success_fct
 
     def _run_runtime_verification(self, ai_frequency: int) -> None:
-        from drivebuildclient.aiExchangeMessages_pb2 import TestResult, VehicleIDs, Num, Bool
-        from config import TIMEOUT
+        from config import TIMEOUT, FAST_FORWARD, FAST_FORWARD_RESOLUTION
         from datetime import datetime
         from threading import Thread
+        from time import time_ns, monotonic_ns
         from queue import Queue
 
-        def _get_verification() -> Tuple[KPValue, KPValue, KPValue]:
-            from drivebuildclient.aiExchangeMessages_pb2 import VerificationResult
-            # FIXME Determine appropriate timeout
-            response = self.send_message_to_sim_node(b"verify", [self.serialized_sid])
-            if response:
-                verification = VerificationResult()
-                verification.ParseFromString(response)
-                return KPValue[verification.precondition], KPValue[verification.failure], KPValue[verification.success]
-            else:
-                _logger.warning("Verification of criteria at simulation " + self._sim_name + " timed out.")
-                return KPValue.UNKNOWN, KPValue.UNKNOWN, KPValue.UNKNOWN
-
         def _run_verification_cycles(result_queue: Queue) -> None:
             test_case_result: TestResult.Result = TestResult.Result.UNKNOWN
             while test_case_result is TestResult.Result.UNKNOWN and (
                     datetime.now() - test_start_time).seconds < TIMEOUT:
-                is_running = Bool()
-                is_running.ParseFromString(self.send_message_to_sim_node(b"isRunning", [self.serialized_sid]))
-                if is_running.value:
-                    cycle_start_time = datetime.now()
-                    self.send_message_to_sim_node(b"pollSensors", [self.serialized_sid])
+                if controller.is_running():
+                    timing = CycleTiming()
+                    timing.started_ns = time_ns()
+                    cycle_start = monotonic_ns()
+                    with _measure_phase(timing, "pollSensors"):
+                        controller.poll_sensors()
                     # print(self.sid.sid + ": Polled sensors")
-                    precondition, failure, success = _get_verification()
+                    with _measure_phase(timing, "verify"):
+                        precondition, failure, success = controller.verify()
                     if precondition is KPValue.FALSE:
                         test_case_result = TestResult.Result.SKIPPED
                     elif failure is KPValue.TRUE:
                         test_case_result = TestResult.Result.FAILED
                     elif success is KPValue.TRUE:
                         test_case_result = TestResult.Result.SUCCEEDED
+                    elif FAST_FORWARD and not self._is_any_ai_controlled(vids):
+                        # NOTE There is no AI in the loop which has to be requested every ai_frequency ticks
+                        timing.duration_ns = monotonic_ns() - cycle_start
+                        controller.store_verification_cycle(timing)
+                        bound = controller.get_fast_forward_bound()
+                        steps = FAST_FORWARD_RESOLUTION if bound is None else min(FAST_FORWARD_RESOLUTION, bound)
+                        controller.steps(max(ai_frequency, steps))
                     else:
                         # TODO Measure AI time start here?
-                        self._request_control_avs(vids.vids)
-                        cycle_end_time = datetime.now()
-                        cycle_start_timestamp = Num()
-                        cycle_start_timestamp.num = int(datetime.timestamp(cycle_start_time))
-                        cycle_end_timestamp = Num()
-                        cycle_end_timestamp.num = int(datetime.timestamp(cycle_end_time))
-                        self.send_message_to_sim_node(b"storeVerificationCycle", [
-                            self.serialized_sid,
-                            cycle_start_timestamp.SerializeToString(),
-                            cycle_end_timestamp.SerializeToString()
-                        ])
-                        self.send_message_to_sim_node(b"steps", [self.serialized_sid, serialized_frequency])
+                        with _measure_phase(timing, "requestAis"):
+                            self._request_control_avs(vids)
+                        timing.duration_ns = monotonic_ns() - cycle_start
+                        controller.store_verification_cycle(timing)
+                        controller.steps(ai_frequency)
                 else:
                     break
             result_queue.put(test_case_result)
 
+        if not self._controller_set.wait(TIMEOUT):
+            _logger.error("The simulation " + self._sim_name + " got no controller within " + str(TIMEOUT) + " seconds.")
+            return
+        controller = self._controller
         # FIXME Wait for simulation to be registered at the simulation node?
         # FIXME Use is_simulation_running?
-        response = self.send_message_to_sim_node(b"vids", [self.serialized_sid])
-        vids = VehicleIDs()
-        vids.ParseFromString(response)
-        freq = Num()
-        freq.num = ai_frequency
-        serialized_frequency = freq.SerializeToString()
-        # print(self.sid.sid + ": vids: " + str(vids.vids))
+        vids = controller.get_vids()
+        # print(self.sid.sid + ": vids: " + str(vids))
         result_queue = Queue()
         cycles_thread = Thread(target=_run_verification_cycles, args=(result_queue,))
         test_start_time = datetime.now()
         cycles_thread.start()
         cycles_thread.join(TIMEOUT)
-        result = TestResult()
-        result.result = result_queue.get()
-        self.send_message_to_sim_node(b"stop", [self.serialized_sid, result.SerializeToString()])
+        controller.stop(result_queue.get())
+        self._movement_modes.stop()
+        self._stop_server()
+
+    def _stop_server(self) -> None:
+        """
+        Closes the connection of this simulation to its server and shuts down the server gracefully.
+        """
+        from drivebuildclient import shutdown_server
+        if self._controller:
+            self._controller.close()
+        if self._sim_server_socket:
+            shutdown_server(self._sim_server_socket, 5)
+            self._sim_server_socket = None
 
     @static_vars(port=60000, lock=Lock())
     def _start_simulation(self, test_case: TestCase) -> Tuple[Scenario, ExtThread]:
@@ -524,6 +750,7 @@ class Simulation:
             _logger.exception("Sending to or receiving from BeamNGpy failed and may corrupt the socket")
         Simulation._start_simulation.lock.release()
 
+        self._movement_modes.start()
         runtime_thread = Thread(target=Simulation._run_runtime_verification, args=(self, test_case.aiFrequency))
         runtime_thread.daemon = True
         runtime_thread.start()
@@ -533,7 +760,7 @@ class Simulation:
         return bng_scenario, ExtThread(runtime_thread.ident)
 
 
-@static_vars(counter=0)
+@static_vars(counter=0, lock=Lock())
 def run_test_case(test_case: TestCase) -> Tuple[Simulation, Scenario, ExtThread, SimulationID]:
     """
     This method starts the actual simulation in a separate thread.
@@ -546,8 +773,11 @@ def run_test_case(test_case: TestCase) -> Tuple[Simulation, Scenario, ExtThread,
     sid = SimulationID()
     response = send_request(create_client("localhost", SIM_NODE_PORT), b"generateSid", [])
     sid.ParseFromString(response)
-    sim = Simulation(sid, pickle.dumps(test_case), FIRST_SIM_PORT + run_test_case.counter)
-    run_test_case.counter += 1  # FIXME Add a lock?
+    # NOTE Multiple runTests requests may be handled concurrently
+    with run_test_case.lock:
+        port = FIRST_SIM_PORT + run_test_case.counter
+        run_test_case.counter += 1
+    sim = Simulation(sid, pickle.dumps(test_case), port)
     # Make sure there is no folder of previous tests having the same sid that got not propery removed
     bng_scenario, thread = sim._start_simulation(test_case)
 
@@ -2,20 +2,24 @@ import copyreg
 from datetime import datetime
 from logging import getLogger, basicConfig, INFO
 from socket import socket
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread, Lock
-from typing import Dict, Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List, Iterator, Set, Any
 
-from drivebuildclient import accept_at_server, create_server, create_client, process_requests
+from drivebuildclient import accept_at_server, create_server, create_client, process_requests, HandlerResult
 from drivebuildclient.aiExchangeMessages_pb2 import SimulationID, VehicleIDs, Void, VerificationResult, VehicleID, Num, \
-    TestResult, SubmissionResult, User, SimStateResponse, Control, DataResponse, DataRequest, SimulationNodeID
+    TestResult, SubmissionResult, User, SimStateResponse, Control, DataResponse, DataRequest, SimulationNodeID, \
+    StepResponse, CycleTiming
 from drivebuildclient.db_handler import DBConnection
+from drivebuildclient.metrics import Metrics
 from lxml.etree import _Element
 
 from config import SIM_NODE_PORT, MAIN_APP_HOST, MAIN_APP_PORT, DBMS_HOST, DBMS_PORT, DBMS_DBNAME, DBMS_USERNAME, \
-    DBMS_PASSWORD
-from dbtypes import SimulationData
+    DBMS_PASSWORD, IMAGE_ENCODING_WORKERS, TIMEOUT, IN_PROCESS_CONTROL, TRACE_MAX_PENDING_ROWS, FAST_FORWARD_MIN_SPEED, \
+    TRACE_MAX_BATCH_BYTES
+from dbtypes import SimulationData, Rendezvous, SimulationRegistry, SimulationEntry, SimulationState, TraceWriter
 from dbtypes.scheme import MovementMode
-from sim_controller import Simulation
+from sim_controller import Simulation, SimNodeController
 
 _DB_CONNECTION = DBConnection(DBMS_HOST, DBMS_PORT, DBMS_DBNAME, DBMS_USERNAME, DBMS_PASSWORD)
 _logger = getLogger("DriveBuild.SimNode.Start")
@@ -37,33 +41,47 @@ def element_pickler(element: _Element):
 copyreg.pickle(_Element, element_pickler, element_unpickler)
 
 if __name__ == "__main__":
-    _all_tasks: Dict[Simulation, SimulationData] = {}
-    # sid --> (vid --> (numSimReady, numAiReady))
-    _registered_ais: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    _simulations = SimulationRegistry()
+    # sid --> (vid --> rendezvous of simulation and AI)
+    _registered_ais: Dict[str, Dict[str, Rendezvous]] = {}
+    _finished_sids: Set[str] = set()
     _registered_ais_lock = Lock()
+    # NOTE The requests of the MainApp are handled concurrently (see process_requests(...)) but the objects of beamngpy
+    # are not thread-safe. Hence all handlers controlling or reading a vehicle are serialized per vehicle.
+    # (sid, vid) --> lock
+    _vehicle_locks: Dict[Tuple[str, str], Lock] = {}
+    _metrics = Metrics()
+
+
+    def _on_trace_written(rows: List[Dict[str, Any]], seconds: float) -> None:
+        for sid in {row["sid"] for row in rows}:
+            _metrics.observe(sid, "dbInsert", seconds)
+
+
+    _trace_writer = TraceWriter(_DB_CONNECTION, "verificationcycles",
+                                ["sid", "vid", "tick", "data", "started", "finished", "duration_ns", "timing"],
+                                TRACE_MAX_PENDING_ROWS, TRACE_MAX_BATCH_BYTES, _on_trace_written)
+    _image_encoders = ThreadPoolExecutor(max_workers=IMAGE_ENCODING_WORKERS, thread_name_prefix="ImageEncoder")
     basicConfig(format='%(asctime)s: %(levelname)s - %(message)s', level=INFO)
 
 
     def _get_simulation(sid: SimulationID) -> Optional[Simulation]:
-        for sim, _ in _all_tasks.items():
-            if sim.sid.sid == sid.sid:
-                return sim
-        return None
+        entry = _simulations.get(sid.sid)
+        return entry.simulation if entry else None
 
 
     def _get_data(sid: SimulationID) -> Optional[SimulationData]:
-        for sim, data in _all_tasks.items():
-            if sim.sid.sid == sid.sid:
-                return data
-        return None
+        entry = _simulations.get(sid.sid)
+        return entry.data if entry else None
 
 
     def _is_simulation_running(sid: SimulationID) -> bool:
-        while True:  # Pseudo "do-while"-loop
-            data = _get_data(sid)
-            if data:
-                break
-        return data.scenario.bng is not None
+        entry = _simulations.wait_for(sid.sid, TIMEOUT)
+        if entry:
+            return entry.state is SimulationState.RUNNING and entry.data.scenario.bng is not None
+        else:
+            _logger.warning("The simulation " + sid.sid + " was not registered within " + str(TIMEOUT) + " seconds.")
+            return False
 
 
     # Actions to be requested by the SimNode itself (not a simulation)
@@ -110,15 +128,16 @@ if __name__ == "__main__":
 
 
     def _time_to_string(time: datetime) -> str:
-        return time.strftime("%Y-%m-%d %H:%M:%S")
+        return time.strftime("%Y-%m-%d %H:%M:%S.%f")
 
 
     def _poll_sensors(sid: SimulationID) -> Void:
         vehicles = _get_data(sid).scenario.vehicles.keys()
         void = Void()
         if _is_simulation_running(sid):
-            for vehicle in vehicles:
-                _get_data(sid).scenario.bng.poll_sensors(vehicle)
+            with _metrics.measure(sid.sid, "pollSensors"):
+                for vehicle in vehicles:
+                    _get_data(sid).scenario.bng.poll_sensors(vehicle)
             void.message = "Polled all registered sensors of simulation " + sid.sid + "."
         else:
             void.message = "Skipped polling sensors since simulation " + sid.sid + " is not running anymore."
@@ -126,14 +145,19 @@ if __name__ == "__main__":
 
 
     def _verify(sid: SimulationID) -> VerificationResult:
-        from dbtypes.criteria import KPValue
+        from dbtypes.criteria import KPValue, CriteriaEvaluator
+        from config import BATCH_STATE_CONDITIONS
         verification = VerificationResult()
         if _is_simulation_running(sid):
-            precondition_fct, failure_fct, success_fct = _get_simulation(sid).get_verification()
-            scenario = _get_data(sid).scenario
-            precondition = precondition_fct(scenario).eval()
-            failure = failure_fct(scenario).eval()
-            success = success_fct(scenario).eval()
+            data = _get_data(sid)
+            # NOTE Only the verification loop of the simulation itself verifies its criteria
+            if not data.criteria_evaluator:
+                precondition_fct, failure_fct, success_fct = _get_simulation(sid).get_verification()
+                data.criteria_evaluator = CriteriaEvaluator(
+                    data.scenario, precondition_fct, failure_fct, success_fct, BATCH_STATE_CONDITIONS,
+                    lambda criterion, seconds: _metrics.observe(sid.sid, "verify." + criterion, seconds))
+            with _metrics.measure(sid.sid, "verify"):
+                precondition, failure, success = data.criteria_evaluator.eval()
             verification.precondition = precondition.name
             verification.failure = failure.name
             verification.success = success.name
@@ -142,62 +166,198 @@ if __name__ == "__main__":
         return verification
 
 
-    def _init_registered_ais(sid: SimulationID, vid: VehicleID) -> None:
-        if sid.sid not in _registered_ais:
-            _registered_ais[sid.sid] = {}
-        if vid.vid not in _registered_ais[sid.sid]:
-            _registered_ais[sid.sid][vid.vid] = (0, 0)
+    def _get_rendezvous(sid: SimulationID, vid: VehicleID) -> Rendezvous:
+        with _registered_ais_lock:
+            if sid.sid in _finished_sids:
+                rendezvous = Rendezvous()
+                rendezvous.cancel()
+                return rendezvous
+            if sid.sid not in _registered_ais:
+                _registered_ais[sid.sid] = {}
+            if vid.vid not in _registered_ais[sid.sid]:
+                _registered_ais[sid.sid][vid.vid] = Rendezvous()
+            return _registered_ais[sid.sid][vid.vid]
+
+
+    def _cancel_rendezvous(sid: SimulationID) -> None:
+        """
+        Wakes up the simulation and all AIs waiting for each other since the simulation ended.
+        """
+        with _registered_ais_lock:
+            _finished_sids.add(sid.sid)
+            for rendezvous in _registered_ais.pop(sid.sid, {}).values():
+                rendezvous.cancel()
+
+
+    def _get_vehicle_lock(sid: SimulationID, vid: VehicleID) -> Lock:
+        with _registered_ais_lock:
+            return _vehicle_locks.setdefault((sid.sid, vid.vid), Lock())
+
+
+    def _on_simulation_changed(entry: SimulationEntry) -> None:
+        _metrics.set_finished(entry.simulation.sid.sid, entry.state is SimulationState.FINISHED)
+        if entry.state is SimulationState.FINISHED:
+            _cancel_rendezvous(entry.simulation.sid)
+            with _registered_ais_lock:
+                for key in [key for key in _vehicle_locks if key[0] == entry.simulation.sid.sid]:
+                    del _vehicle_locks[key]
+        else:
+            with _registered_ais_lock:
+                _finished_sids.discard(entry.simulation.sid.sid)  # NOTE A simulation ID may be reused
+
+
+    _simulations.add_listener(_on_simulation_changed)
 
 
     def _request_ai_for(sid: SimulationID, vid: VehicleID) -> Void:
-        from time import sleep
         _logger.debug("sim_request_ai_for: enter for " + sid.sid + ":" + vid.vid)
-        _registered_ais_lock.acquire()
-        _init_registered_ais(sid, vid)
-        num_sim_ready, num_ai_ready = _registered_ais[sid.sid][vid.vid]
-        _registered_ais[sid.sid][vid.vid] = (num_sim_ready + 1, num_ai_ready)
-        _logger.debug(sid.sid + ":" + vid.vid + " after raf: " + str(_registered_ais[sid.sid][vid.vid]))
-        _registered_ais_lock.release()
-        while _registered_ais[sid.sid][vid.vid][1] < _registered_ais[sid.sid][vid.vid][0] \
-                and _is_simulation_running(sid):
-            _logger.debug(sid.sid + ":" + vid.vid + " wait for ai ready")
-            sleep(5)
-            pass  # Wait for all being ready
+        if _is_simulation_running(sid):
+            with _metrics.measure(sid.sid, "aiWait"):
+                arrived = _get_rendezvous(sid, vid).arrive_simulation(TIMEOUT)
+            if not arrived:
+                _logger.warning(sid.sid + ":" + vid.vid + " The AI did not arrive at the current tick.")
         _logger.debug("sim_request_ai_for: leave for " + sid.sid + ":" + vid.vid)
         void = Void()
         void.message = "Simulation " + sid.sid + " finished requesting vehicle " + vid.vid + "."
         return void
 
 
-    def _store_verification_cycle(sid: SimulationID, started: datetime, finished: datetime) -> Void:
+    def _store_verification_cycle(sid: SimulationID, timing: CycleTiming) -> Void:
         vehicles = _get_data(sid).scenario.vehicles.keys()
         void = Void()
         if _is_simulation_running(sid):
-            for vehicle in vehicles:
-                vid = VehicleID()
-                vid.vid = vehicle.vid
-                request = DataRequest()
-                request.request_ids.extend(vehicle.requests)
-                data = _request_data(sid, vid, request)
-                args = {
-                    "sid": sid.sid,
-                    "vid": vid.vid,
-                    "tick": _get_data(sid).scenario.bng.current_tick,
-                    "data": data.SerializeToString(),
-                    "started": _time_to_string(started),
-                    "finished": _time_to_string(finished)
-                }
-                _DB_CONNECTION.run_query("""
-                INSERT INTO verificationcycles VALUES
-                (:sid, :vid, :tick, :data, :started, :finished);
-                """, args)
-            void.message = "Stored data of the current runtime verification cycle of simulation " + sid.sid + "."
+            with _metrics.measure(sid.sid, "storeVerificationCycle"):
+                # NOTE Nanoseconds get lost when converting to datetime but are kept by duration_ns and timing
+                started = datetime.fromtimestamp(timing.started_ns / 1e9)
+                finished = datetime.fromtimestamp((timing.started_ns + timing.duration_ns) / 1e9)
+                serialized_timing = timing.SerializeToString()
+                for vehicle in vehicles:
+                    vid = VehicleID()
+                    vid.vid = vehicle.vid
+                    args = {
+                        "sid": sid.sid,
+                        "vid": vid.vid,
+                        "tick": _get_data(sid).scenario.bng.current_tick,
+                        "data": b"".join([_serialize_request_data(sid, vid, rid) for rid in vehicle.requests]),
+                        "started": _time_to_string(started),
+                        "finished": _time_to_string(finished),
+                        "duration_ns": timing.duration_ns,
+                        "timing": serialized_timing
+                    }
+                    # NOTE The data is already serialized such that the simulation can proceed while it is stored
+                    _trace_writer.add(args)
+            void.message = "Scheduled storing the data of the current runtime verification cycle of simulation " \
+                           + sid.sid + "."
         else:
             void.message = "Skipped storing the data of the current runtime verification cycle since simulation " \
                            + sid.sid + " does not run anymore."
         return void
 
 
+    def _steps(sid: SimulationID, steps: int) -> Void:
+        void = Void()
+        if _is_simulation_running(sid):
+            with _metrics.measure(sid.sid, "steps"):
+                _get_data(sid).scenario.bng.step(steps)
+            void.message = "Simulated " + str(steps) + " steps in simulation " + sid.sid + "."
+        else:
+            void.message = "Simulation " + sid.sid + " is not running anymore."
+        return void
+
+
+    def _estimate_ticks_until_waypoint(sid: SimulationID) -> Optional[int]:
+        """
+        Estimates the number of ticks until any participant reaches a waypoint which changes its movement mode. Assumes
+        that participants drive straight towards these waypoints with at least FAST_FORWARD_MIN_SPEED.
+        """
+        from math import hypot
+        from numpy.linalg import norm
+        scenario = _get_data(sid).scenario
+        test_case = _get_simulation(sid).test_case
+        estimation = None
+        for pid, participant in test_case.participants.items():
+            vehicle = scenario.get_vehicle(pid)
+            if vehicle and vehicle.state:
+                x, y, _ = vehicle.state["pos"]
+                speed = max(norm(vehicle.state["vel"]), FAST_FORWARD_MIN_SPEED)
+                for waypoint in participant.movement:
+                    if waypoint.mode is not None:
+                        distance = max(0, hypot(waypoint.position[0] - x, waypoint.position[1] - y)
+                                       - waypoint.tolerance)
+                        ticks = int(distance / speed * test_case.steps_per_second)
+                        estimation = ticks if estimation is None else min(estimation, ticks)
+        return estimation
+
+
+    def _get_fast_forward_bound(sid: SimulationID) -> Num:
+        """
+        :return: The number of ticks the given simulation may advance without missing a change of the windows of its
+        criteria or a participant reaching a waypoint which changes its movement mode. -1 if there is no bound.
+        """
+        bound = Num()
+        bound.num = -1
+        if _is_simulation_running(sid):
+            data = _get_data(sid)
+            bounds = []
+            if data.criteria_evaluator:
+                current_tick = data.scenario.bng.current_tick
+                window_change = data.criteria_evaluator.next_window_change(current_tick)
+                if window_change is not None:
+                    bounds.append(window_change - current_tick)
+            ticks_until_waypoint = _estimate_ticks_until_waypoint(sid)
+            if ticks_until_waypoint is not None:
+                bounds.append(ticks_until_waypoint)
+            if bounds:
+                bound.num = min(bounds)
+        return bound
+
+
+    class _InProcessSimNodeController(SimNodeController):
+        """
+        Performs the operations of the control loop of a simulation by calling the actions of this node directly.
+        """
+
+        def __init__(self, sid: SimulationID):
+            self.sid = sid
+
+        def is_running(self) -> bool:
+            return _is_simulation_running(self.sid)
+
+        def get_vids(self) -> List[str]:
+            if _simulations.wait_for(self.sid.sid, TIMEOUT):
+                return list(_get_vids(self.sid).vids)
+            else:
+                _logger.warning("The simulation " + self.sid.sid + " was not registered within " + str(TIMEOUT)
+                                + " seconds.")
+                return []
+
+        def poll_sensors(self) -> None:
+            _poll_sensors(self.sid)
+
+        def verify(self) -> Tuple[Any, Any, Any]:  # Tuple[KPValue, KPValue, KPValue]
+            from dbtypes.criteria import KPValue
+            verification = _verify(self.sid)
+            return KPValue[verification.precondition], KPValue[verification.failure], KPValue[verification.success]
+
+        def request_ai_for(self, vid: str) -> None:
+            vehicle_id = VehicleID()
+            vehicle_id.vid = vid
+            _logger.debug(_request_ai_for(self.sid, vehicle_id).message)
+
+        def store_verification_cycle(self, timing: CycleTiming) -> None:
+            _store_verification_cycle(self.sid, timing)
+
+        def steps(self, steps: int) -> None:
+            _steps(self.sid, steps)
+
+        def get_fast_forward_bound(self) -> Optional[int]:
+            bound = _get_fast_forward_bound(self.sid).num
+            return None if bound < 0 else bound
+
+        def stop(self, result: TestResult.Result) -> None:
+            _control_sim(self.sid, result, False)
+
+
     def _handle_simulation_message(conn: socket, _: Tuple[str, int]) -> None:
         from drivebuildclient import process_requests
         _logger.info("_handle_simulation_message --> " + str(conn.getsockname()))
@@ -230,23 +390,19 @@ if __name__ == "__main__":
             elif action == b"storeVerificationCycle":
                 sid = SimulationID()
                 sid.ParseFromString(data[0])
-                started = Num()
-                started.ParseFromString(data[1])
-                finished = Num()
-                finished.ParseFromString(data[2])
-                result = _store_verification_cycle(sid, datetime.fromtimestamp(started.num),
-                                                   datetime.fromtimestamp(finished.num))
+                timing = CycleTiming()
+                timing.ParseFromString(data[1])
+                result = _store_verification_cycle(sid, timing)
+            elif action == b"fastForwardBound":
+                sid = SimulationID()
+                sid.ParseFromString(data[0])
+                result = _get_fast_forward_bound(sid)
             elif action == b"steps":
                 sid = SimulationID()
                 sid.ParseFromString(data[0])
                 steps = Num()
                 steps.ParseFromString(data[1])
-                result = Void()
-                if _is_simulation_running(sid):
-                    _get_data(sid).scenario.bng.step(steps.num)
-                    result.message = "Simulated " + str(steps.num) + " steps in simulation " + sid.sid + "."
-                else:
-                    result.message = "Simulation " + sid.sid + " is not running anymore."
+                result = _steps(sid, steps.num)
             elif action == b"stop":
                 sid = SimulationID()
                 sid.ParseFromString(data[0])
@@ -334,13 +490,15 @@ if __name__ == "__main__":
             if isinstance(new_tasks, Dict):
                 if new_tasks:
                     for sim, data in new_tasks.items():
-                        if sim.sid.sid in [s.sid.sid for s in _all_tasks.keys()]:
+                        if sim.sid.sid in _simulations:
                             warn("The simulation ID " + sim.sid.sid + " already exists and is getting overwritten.")
-                            _all_tasks.pop(_get_simulation(sim.sid))
                         submission_result.result.submissions[sim.test_name].sid = sim.sid.sid
-                        sim.start_server(_handle_simulation_message)
+                        if IN_PROCESS_CONTROL:
+                            sim.set_controller(_InProcessSimNodeController(sim.sid))
+                        else:
+                            sim.start_server(_handle_simulation_message)
                         data.user = user
-                        _all_tasks[sim] = data
+                        _simulations.register(sim, data)
                         _update_test_data(data)
                 else:
                     submission_result.message.message = "There were no valid tests to run."
@@ -355,17 +513,9 @@ if __name__ == "__main__":
 
 
     def _wait_for_simulator_request(sid: SimulationID, vid: VehicleID) -> SimStateResponse:
-        from time import sleep
         _logger.info("_wait_for_simulator_request: enter for " + sid.sid + ":" + vid.vid)
-        _registered_ais_lock.acquire()
-        _init_registered_ais(sid, vid)
-        num_sim_ready, num_ai_ready = _registered_ais[sid.sid][vid.vid]
-        _registered_ais[sid.sid][vid.vid] = (num_sim_ready, num_ai_ready + 1)
-        _registered_ais_lock.release()
-        while _registered_ais[sid.sid][vid.vid][0] < _registered_ais[sid.sid][vid.vid][1] \
-                and _is_simulation_running(sid):
-            sleep(5)
-            pass  # Wait all being ready
+        if _is_simulation_running(sid) and not _get_rendezvous(sid, vid).arrive_ai(TIMEOUT):
+            _logger.info(sid.sid + ":" + vid.vid + " The simulation did not request the AI.")
         response = _status(sid)
         _logger.info("_wait_for_simulator_request: leave for " + sid.sid + ":" + vid.vid)
         return response
@@ -412,26 +562,32 @@ if __name__ == "__main__":
 
         if _is_simulation_running(sid):
             data.scenario.bng.close()
+        if not _trace_writer.flush(TIMEOUT):
+            _logger.warning("The trace of simulation " + sid.sid + " was not stored within " + str(TIMEOUT)
+                            + " seconds.")
         data.end_time = datetime.now()
+        _simulations.set_state(sid.sid, SimulationState.FINISHED)
         _update_test_data(data)
 
 
     def _control(sid: SimulationID, vid: VehicleID, control: Control) -> Void:
         _logger.info("ai_control: enter for " + vid.vid)
         result = Void()
-        if _is_simulation_running(sid):
-            command_type = control.WhichOneof("command")
-            if command_type == "simCommand":
-                _control_sim(sid, control.simCommand.command, True)
-            elif command_type == "avCommand":
-                sim = _get_simulation(sid)
-                if sim and sim.get_current_movement_mode(vid.vid) is MovementMode.AUTONOMOUS:
-                    _control_av(sid, vid, control.avCommand)
+        with _get_vehicle_lock(sid, vid):
+            if _is_simulation_running(sid):
+                command_type = control.WhichOneof("command")
+                if command_type == "simCommand":
+                    _control_sim(sid, control.simCommand.command, True)
+                elif command_type == "avCommand":
+                    sim = _get_simulation(sid)
+                    if sim and sim.get_current_movement_mode(vid.vid) is MovementMode.AUTONOMOUS:
+                        _control_av(sid, vid, control.avCommand)
+                else:
+                    raise NotImplementedError(
+                        "Interpreting commands of type " + command_type + " is not implemented, yet.")
+                result.message = "Controlled vehicle " + vid.vid + " in simulation " + sid.sid + "."
             else:
-                raise NotImplementedError("Interpreting commands of type " + command_type + " is not implemented, yet.")
-            result.message = "Controlled vehicle " + vid.vid + " in simulation " + sid.sid + "."
-        else:
-            result.message = "Simulation " + sid.sid + " does not run."
+                result.message = "Simulation " + sid.sid + " does not run."
         _logger.info("ai_control: leave for " + vid.vid)
         return result
 
@@ -439,8 +595,6 @@ if __name__ == "__main__":
     def _attach_request_data(data: DataResponse.Data, sid: SimulationID, vid: VehicleID, rid: str) -> None:
         from requests import PositionRequest, SpeedRequest, SteeringAngleRequest, LidarRequest, CameraRequest, \
             DamageRequest, RoadCenterDistanceRequest, CarToLaneAngleRequest, BoundingBoxRequest, RoadEdgesRequest
-        from PIL import Image
-        from io import BytesIO
         from shapely.geometry import mapping
         vehicle = _get_data(sid).scenario.get_vehicle(vid.vid)
         if rid in vehicle.requests:
@@ -457,15 +611,22 @@ if __name__ == "__main__":
                 elif request_type is LidarRequest:
                     data.lidar.points.extend(sensor_data)
                 elif request_type is CameraRequest:
-                    def _convert(image: Image) -> bytes:
-                        bytes_arr = BytesIO()
-                        image.save(bytes_arr, format="PNG")
-                        bytes_arr.seek(0)
-                        return bytes_arr.read()
-
-                    data.camera.color = _convert(sensor_data[0])
-                    data.camera.annotated = _convert(sensor_data[1])
-                    data.camera.depth = _convert(sensor_data[2])
+                    camera_request = vehicle.requests[rid]
+                    # NOTE The images are encoded concurrently
+                    encoded_images = [None if image is None else _image_encoders.submit(camera_request.encode, image)
+                                      for image in sensor_data]
+                    data.camera.encoding = DataResponse.Data.Camera.Encoding.Value(camera_request.encoding.value)
+                    data.camera.width = camera_request.width
+                    data.camera.height = camera_request.height
+                    if encoded_images[0] is not None:
+                        data.camera.color = encoded_images[0].result()
+                        data.camera.color_mode = sensor_data[0].mode
+                    if encoded_images[1] is not None:
+                        data.camera.annotated = encoded_images[1].result()
+                        data.camera.annotated_mode = sensor_data[1].mode
+                    if encoded_images[2] is not None:
+                        data.camera.depth = encoded_images[2].result()
+                        data.camera.depth_mode = sensor_data[2].mode
                 elif request_type is DamageRequest:
                     data.damage.is_damaged = sensor_data
                 elif request_type is RoadCenterDistanceRequest:
@@ -497,30 +658,82 @@ if __name__ == "__main__":
             raise ValueError("There is no request called \"" + rid + "\".")
 
 
+    def _serialize_request_data(sid: SimulationID, vid: VehicleID, rid: str) -> bytes:
+        """
+        :return: A serialized DataResponse containing only the data of the given request. The data is converted only
+        once per polling of the sensors and shared by the data requests of AIs and the trace of the simulation.
+        """
+        with _get_vehicle_lock(sid, vid):
+            if _is_simulation_running(sid):
+                snapshot = _get_data(sid).scenario.get_vehicle(vid.vid).snapshot
+                if rid in snapshot.serialized:
+                    return snapshot.serialized[rid]
+                data_response = DataResponse()
+                try:
+                    _attach_request_data(data_response.data[rid], sid, vid, rid)
+                    serialized = data_response.SerializeToString()
+                    snapshot.serialized[rid] = serialized
+                    return serialized
+                except ValueError:
+                    message = "There is no request with ID \"" + rid + "\"."
+            else:
+                message = "The simulation does not run anymore."
+        data_response = DataResponse()
+        data_response.data[rid].error.message = message
+        return data_response.SerializeToString()
+
+
     def _request_data(sid: SimulationID, vid: VehicleID, request: DataRequest) -> DataResponse:
         data_response = DataResponse()
-        for rid in request.request_ids:
-            try:
-                if _is_simulation_running(sid):
-                    _attach_request_data(data_response.data[rid], sid, vid, rid)
-                else:
-                    data_response.data[rid].error.message = "The simulation does not run anymore."
-            except ValueError:
-                data_response.data[rid].error.message = "There is no request with ID \"" + rid + "\"."
+        with _metrics.measure(sid.sid, "requestData"):
+            # NOTE The concatenation of serialized DataResponses parses as a single DataResponse containing all data
+            data_response.ParseFromString(
+                b"".join([_serialize_request_data(sid, vid, rid) for rid in request.request_ids]))
         return data_response
 
 
+    def _step(sid: SimulationID, vid: VehicleID, control: Optional[Control], request: DataRequest) -> StepResponse:
+        """
+        Applies the control of the AI for the current tick, waits for the simulation to request the AI again and
+        collects the requested data of the next tick.
+        :param control: The control to apply. None if there is nothing to control (e.g. before the first tick).
+        """
+        if control:
+            _control(sid, vid, control)
+        result = StepResponse()
+        result.state = _wait_for_simulator_request(sid, vid).state
+        if result.state is SimStateResponse.SimState.RUNNING:
+            result.data.CopyFrom(_request_data(sid, vid, request))
+        return result
+
+
+    def _stream_request_data(sid: SimulationID, vid: VehicleID, request: DataRequest) -> Iterator[bytes]:
+        """
+        Serializes the data of each request separately such that large data (e.g. images) can be sent while the data
+        of the remaining requests is collected.
+        NOTE The concatenation of the parts parses as a single DataResponse containing the data of all requests.
+        """
+        for rid in request.request_ids:
+            # NOTE Only measure the serialization but not the time the consumer of the stream takes
+            with _metrics.measure(sid.sid, "requestData"):
+                part = _serialize_request_data(sid, vid, rid)
+            yield part
+
+
     def _get_running_tests(user: User) -> SubmissionResult:
         submission_result = SubmissionResult()
-        for sim, data in _all_tasks.items():
-            if _is_simulation_running(sim.sid) and data.user.username == user.username:
+        for entry in _simulations.entries():
+            sim = entry.simulation
+            if _is_simulation_running(sim.sid) and entry.data.user.username == user.username:
                 submission_result.result.submissions[sim.test_name].sid = sim.sid.sid
         if not submission_result.result.submissions:  # Avoid an empty message
             submission_result.message.message = "No simulations running"
         return submission_result
 
 
-    def _handle_main_app_message(action: bytes, data: List[bytes]) -> bytes:
+    def _handle_main_app_message(action: bytes, data: List[bytes]) -> HandlerResult:
+        # NOTE The arguments are memoryviews on the received request (see process_requests(...)). Convert them using
+        # bytes(...) before logging them.
         from google.protobuf.message import DecodeError
         if action == b"runTests":
             user = User()
@@ -528,7 +741,8 @@ if __name__ == "__main__":
                 user.ParseFromString(data[1])
                 result = _run_tests(data[0], user)
             except DecodeError:
-                _logger.exception("Running a test failed since \"" + str(data[1]) + "\" can not be parsed to an User")
+                _logger.exception("Running a test failed since \"" + str(bytes(data[1]))
+                                  + "\" can not be parsed to an User")
                 result = SubmissionResult()
                 result.message.message = "The user parameter could not be parsed."
         elif action == b"waitForSimulatorRequest":
@@ -552,15 +766,25 @@ if __name__ == "__main__":
             vid.ParseFromString(data[1])
             request = DataRequest()
             request.ParseFromString(data[2])
-            result = _request_data(sid, vid, request)
-        elif action == b"requestSocket":
-            client = create_client(MAIN_APP_HOST, MAIN_APP_PORT)
-            client_thread = Thread(target=process_requests, args=(client, _handle_main_app_message))
-            client_thread.daemon = True
-            _logger.info("_handle_main_app_message --> " + str(client.getsockname()))
-            client_thread.start()
-            result = Void()
-            result.message = "Connected another client socket to the main app."
+            return _stream_request_data(sid, vid, request)
+        elif action == b"step":
+            sid = SimulationID()
+            sid.ParseFromString(data[0])
+            vid = VehicleID()
+            vid.ParseFromString(data[1])
+            request = DataRequest()
+            request.ParseFromString(data[2])
+            if data[3]:
+                control = Control()
+                control.ParseFromString(data[3])
+            else:
+                control = None
+            result = _step(sid, vid, control, request)
+        elif action == b"metrics":
+            # NOTE An empty sid requests the metrics of all simulations
+            sid = SimulationID()
+            sid.ParseFromString(data[0])
+            return _metrics.to_json(sid.sid if sid.sid else None)
         elif action == b"runningTests":
             user = User()
             user.ParseFromString(data[0])
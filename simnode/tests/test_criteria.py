@@ -0,0 +1,124 @@
+from itertools import product
+from math import inf
+from types import SimpleNamespace
+from typing import Hashable, Optional
+from unittest import TestCase
+
+from dbtypes.criteria import KPValue, Evaluable, EvaluationContext, And, Or, Not, VCTime, CriteriaEvaluator
+
+TRUE = KPValue.TRUE
+FALSE = KPValue.FALSE
+UNKNOWN = KPValue.UNKNOWN
+
+
+class _Constant(Evaluable):
+    """
+    A criterion always evaluating to the same value which counts its evaluations.
+    """
+
+    def __init__(self, value: KPValue, name: str = "", cost: int = 1):
+        self.value = value
+        self.name = name
+        self.cost = cost
+        self.num_evaluations = 0
+
+    def _eval(self, _: Optional[EvaluationContext]) -> KPValue:
+        self.num_evaluations += 1
+        return self.value
+
+    def _create_key(self) -> Hashable:
+        return type(self).__name__, self.value, self.name
+
+
+class KPValueTest(TestCase):
+    def test_and(self):
+        expected = {
+            (TRUE, TRUE): TRUE, (TRUE, FALSE): FALSE, (TRUE, UNKNOWN): UNKNOWN,
+            (FALSE, TRUE): FALSE, (FALSE, FALSE): FALSE, (FALSE, UNKNOWN): FALSE,
+            (UNKNOWN, TRUE): UNKNOWN, (UNKNOWN, FALSE): FALSE, (UNKNOWN, UNKNOWN): UNKNOWN
+        }
+        for (left, right), result in expected.items():
+            self.assertIs(result, left & right, (left, right))
+
+    def test_or(self):
+        expected = {
+            (TRUE, TRUE): TRUE, (TRUE, FALSE): TRUE, (TRUE, UNKNOWN): TRUE,
+            (FALSE, TRUE): TRUE, (FALSE, FALSE): FALSE, (FALSE, UNKNOWN): UNKNOWN,
+            (UNKNOWN, TRUE): TRUE, (UNKNOWN, FALSE): UNKNOWN, (UNKNOWN, UNKNOWN): UNKNOWN
+        }
+        for (left, right), result in expected.items():
+            self.assertIs(result, left | right, (left, right))
+
+    def test_not(self):
+        self.assertIs(FALSE, -TRUE)
+        self.assertIs(TRUE, -FALSE)
+        self.assertIs(UNKNOWN, -UNKNOWN)
+
+
+class ConnectiveTest(TestCase):
+    def test_connectives_match_truth_tables(self):
+        for values in product([TRUE, FALSE, UNKNOWN], repeat=3):
+            expected_and = values[0] & values[1] & values[2]
+            expected_or = values[0] | values[1] | values[2]
+            for context in [None, EvaluationContext(0)]:
+                constants = [_Constant(value, str(index)) for index, value in enumerate(values)]
+                self.assertIs(expected_and, And(constants).eval(context), values)
+                self.assertIs(expected_or, Or(constants).eval(context), values)
+                self.assertIs(-expected_and, Not(And(constants)).eval(context), values)
+
+    def test_empty_connectives(self):
+        self.assertIs(TRUE, And([]).eval())
+        self.assertIs(FALSE, Or([]).eval())
+
+    def test_short_circuit_evaluates_cheap_criteria_first(self):
+        expensive = _Constant(TRUE, "expensive", 10)
+        cheap = _Constant(FALSE, "cheap")
+        self.assertIs(FALSE, And([expensive, cheap]).eval(EvaluationContext(0)))
+        self.assertEqual(0, expensive.num_evaluations)
+        expensive = _Constant(FALSE, "expensive", 10)
+        cheap = _Constant(TRUE, "cheap")
+        self.assertIs(TRUE, Or([expensive, cheap]).eval(EvaluationContext(0)))
+        self.assertEqual(0, expensive.num_evaluations)
+
+    def test_unknown_does_not_short_circuit(self):
+        last = _Constant(FALSE, "last", 10)
+        self.assertIs(FALSE, And([_Constant(UNKNOWN), last]).eval())
+        self.assertEqual(1, last.num_evaluations)
+
+    def test_context_shares_results_of_equal_criteria(self):
+        first = _Constant(TRUE, "shared")
+        second = _Constant(TRUE, "shared")
+        context = EvaluationContext(0)
+        self.assertIs(TRUE, And([Or([first, _Constant(FALSE)]), Not(Not(second))]).eval(context))
+        self.assertEqual(1, first.num_evaluations + second.num_evaluations)
+        And([first, second]).eval(EvaluationContext(1))
+        self.assertEqual(2, first.num_evaluations + second.num_evaluations)
+
+
+class WindowTest(TestCase):
+    def test_vctime_restricts_inner_windows(self):
+        inner = _Constant(TRUE)
+        nested = _Constant(TRUE, "nested")
+        criterion = And([VCTime(None, Or([inner, VCTime(None, nested, 15, 40)]), 10, 20), _Constant(FALSE)])
+        criterion.restrict_window(0, inf)
+        self.assertEqual((0, inf), criterion.window)
+        self.assertEqual((10, 20), inner.window)
+        self.assertEqual((15, 20), nested.window)
+
+    def test_inactive_criteria_are_unknown_and_skipped(self):
+        inner = _Constant(TRUE)
+        inner.restrict_window(10, 20)
+        for tick, expected in [(9, UNKNOWN), (10, TRUE), (20, TRUE), (21, UNKNOWN)]:
+            self.assertIs(expected, inner.eval(EvaluationContext(tick)), tick)
+        self.assertEqual(2, inner.num_evaluations)
+        self.assertIs(TRUE, inner.eval())  # NOTE Without a context there is no tick to check
+
+    def test_next_window_change(self):
+        evaluator = CriteriaEvaluator(SimpleNamespace(bng=None), lambda _: _Constant(TRUE),
+                                      lambda _: VCTime(None, _Constant(TRUE, "failure"), 10, 20),
+                                      lambda _: VCTime(None, _Constant(TRUE, "success"), 15, 30))
+        self.assertEqual([10, 15, 21, 31], evaluator.window_changes)
+        self.assertEqual(10, evaluator.next_window_change(0))
+        self.assertEqual(15, evaluator.next_window_change(10))
+        self.assertEqual(31, evaluator.next_window_change(21))
+        self.assertIsNone(evaluator.next_window_change(31))
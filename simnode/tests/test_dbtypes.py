@@ -0,0 +1,159 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from time import monotonic
+from types import SimpleNamespace
+from unittest import TestCase
+
+from dbtypes import Rendezvous, SimulationRegistry, SimulationState, TraceWriter
+
+
+class RendezvousTest(TestCase):
+    def test_timeout_without_other_side(self):
+        rendezvous = Rendezvous()
+        self.assertFalse(rendezvous.arrive_simulation(0.05))
+        self.assertFalse(Rendezvous().arrive_ai(0.05))
+
+    def test_lockstep(self):
+        rendezvous = Rendezvous()
+        num_ticks = 20
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            ai_arrivals = executor.submit(lambda: [rendezvous.arrive_ai(5) for _ in range(num_ticks)])
+            sim_arrivals = [rendezvous.arrive_simulation(5) for _ in range(num_ticks)]
+            self.assertEqual([True] * num_ticks, sim_arrivals)
+            self.assertEqual([True] * num_ticks, ai_arrivals.result())
+
+    def test_late_arrival_matches_earlier_tick(self):
+        rendezvous = Rendezvous()
+        self.assertFalse(rendezvous.arrive_simulation(0.01))
+        # NOTE The simulation already arrived at the first tick so the AI does not have to wait
+        self.assertTrue(rendezvous.arrive_ai(0))
+        self.assertFalse(rendezvous.arrive_ai(0.01))
+
+    def test_cancel_wakes_up_waiters(self):
+        rendezvous = Rendezvous()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            arrival = executor.submit(rendezvous.arrive_simulation, 5)
+            rendezvous.cancel()
+            self.assertFalse(arrival.result(1))
+        self.assertTrue(rendezvous.is_cancelled())
+        start = monotonic()
+        self.assertFalse(rendezvous.arrive_simulation(5))
+        self.assertLess(monotonic() - start, 1)
+
+
+def _create_simulation(sid: str) -> SimpleNamespace:
+    return SimpleNamespace(sid=SimpleNamespace(sid=sid))
+
+
+class SimulationRegistryTest(TestCase):
+    def test_wait_for_registered_simulation(self):
+        registry = SimulationRegistry()
+        entry = registry.register(_create_simulation("sim"), None)
+        self.assertIs(entry, registry.wait_for("sim", 0))
+        self.assertIn("sim", registry)
+        self.assertIs(SimulationState.RUNNING, entry.state)
+
+    def test_wait_for_times_out(self):
+        registry = SimulationRegistry()
+        registry.register(_create_simulation("other"), None)
+        self.assertIsNone(registry.wait_for("sim", 0.05))
+        self.assertNotIn("sim", registry)
+
+    def test_wait_for_later_registration(self):
+        registry = SimulationRegistry()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            waiting = executor.submit(registry.wait_for, "sim", 5)
+            entry = registry.register(_create_simulation("sim"), None)
+            self.assertIs(entry, waiting.result(1))
+
+    def test_listeners(self):
+        registry = SimulationRegistry()
+        notified = []
+
+        def _failing_listener(_) -> None:
+            raise RuntimeError()
+
+        registry.add_listener(_failing_listener)
+        registry.add_listener(lambda entry: notified.append(entry.state))
+        registry.register(_create_simulation("sim"), None)
+        registry.set_state("sim", SimulationState.FINISHED)
+        registry.set_state("sim", SimulationState.FINISHED)
+        registry.set_state("unknown", SimulationState.FINISHED)
+        self.assertEqual([SimulationState.RUNNING, SimulationState.FINISHED], notified)
+
+
+class _FakeDBConnection:
+    """
+    Records the rows of INSERT queries. Like DBConnection it returns None if a query fails.
+    """
+
+    def __init__(self, is_failing=lambda rows: False):
+        self.is_failing = is_failing
+        self.batches = []
+        self.queries = []
+        self.proceed = Event()
+        self.proceed.set()
+
+    def run_query(self, query: str, args):
+        self.proceed.wait()
+        self.queries.append(query)
+        rows = [(args["a_" + str(index)], args["b_" + str(index)]) for index in range(query.count(":a_"))]
+        if self.is_failing(rows):
+            return None
+        self.batches.append(rows)
+        return SimpleNamespace(rowcount=len(rows))
+
+
+class TraceWriterTest(TestCase):
+    def test_flush_waits_for_all_rows(self):
+        connection = _FakeDBConnection()
+        connection.proceed.clear()
+        writer = TraceWriter(connection, "table", ["a", "b"], 100, 1000)
+        for index in range(10):
+            writer.add({"a": index, "b": b"data"})
+        self.assertFalse(writer.flush(0.05))
+        connection.proceed.set()
+        self.assertTrue(writer.flush(5))
+        written_rows = [row for batch in connection.batches for row in batch]
+        self.assertEqual([(index, b"data") for index in range(10)], written_rows)
+        self.assertEqual(0, writer.num_dropped)
+
+    def test_batches_are_limited_by_bytes(self):
+        connection = _FakeDBConnection()
+        connection.proceed.clear()
+        writer = TraceWriter(connection, "table", ["a", "b"], 100, 10)
+        for index in range(7):
+            writer.add({"a": index, "b": b"data"})
+        connection.proceed.set()
+        self.assertTrue(writer.flush(5))
+        self.assertTrue(all(len(batch) <= 2 for batch in connection.batches))
+        self.assertEqual(list(range(7)), [row[0] for batch in connection.batches for row in batch])
+
+    def test_failing_batch_is_inserted_row_by_row(self):
+        connection = _FakeDBConnection(lambda rows: len(rows) > 1 or rows[0][0] == 3)
+        connection.proceed.clear()
+        writer = TraceWriter(connection, "table", ["a", "b"], 100, 1000)
+        for index in range(6):
+            writer.add({"a": index, "b": b"data"})
+        connection.proceed.set()
+        self.assertTrue(writer.flush(5))
+        self.assertEqual([0, 1, 2, 4, 5], sorted([row[0] for batch in connection.batches for row in batch]))
+        self.assertEqual(1, writer.num_dropped)
+
+    def test_failing_callback_does_not_stop_writer(self):
+        def _on_written(rows, seconds) -> None:
+            raise RuntimeError()
+
+        connection = _FakeDBConnection()
+        writer = TraceWriter(connection, "table", ["a", "b"], 2, 1000, _on_written)
+        for index in range(10):
+            writer.add({"a": index, "b": b"data"})
+        self.assertTrue(writer.flush(5))
+        self.assertEqual(10, sum([len(batch) for batch in connection.batches]))
+
+    def test_insert_names_columns(self):
+        connection = _FakeDBConnection()
+        writer = TraceWriter(connection, "table", ["a", "b"], 2, 1000)
+        writer.add({"b": b"data", "a": 0})
+        self.assertTrue(writer.flush(5))
+        self.assertEqual("INSERT INTO table (a, b) VALUES (:a_0, :b_0);", connection.queries[0])
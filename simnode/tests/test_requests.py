@@ -0,0 +1,45 @@
+from io import BytesIO
+from unittest import TestCase
+
+from PIL import Image
+from drivebuildclient.aiExchangeMessages_pb2 import DataResponse
+
+from requests import CameraRequest, CameraDirection, CameraEncoding
+
+
+def _create_image(mode: str) -> Image.Image:
+    image = Image.new(mode, (4, 3))
+    for x in range(4):
+        for y in range(3):
+            image.putpixel((x, y), tuple([10 * x + y] * len(mode)) if len(mode) > 1 else 10 * x + y)
+    return image
+
+
+class CameraRequestTest(TestCase):
+    @staticmethod
+    def _create_request(encoding: CameraEncoding) -> CameraRequest:
+        return CameraRequest("camera", 4, 3, 60, CameraDirection.FRONT, encoding)
+
+    def test_raw_encoding(self):
+        request = self._create_request(CameraEncoding.RAW)
+        for mode in ["RGBA", "RGB", "L"]:
+            image = _create_image(mode)
+            encoded = request.encode(image)
+            self.assertEqual(len(encoded), 4 * 3 * len(mode))
+            self.assertEqual(list(Image.frombytes(mode, (4, 3), encoded).getdata()), list(image.getdata()))
+
+    def test_png_encoding(self):
+        image = _create_image("RGBA")
+        decoded = Image.open(BytesIO(self._create_request(CameraEncoding.PNG).encode(image)))
+        self.assertEqual(decoded.format, "PNG")
+        self.assertEqual(list(decoded.getdata()), list(image.getdata()))
+
+    def test_jpeg_encoding_drops_alpha_channel(self):
+        decoded = Image.open(BytesIO(self._create_request(CameraEncoding.JPEG).encode(_create_image("RGBA"))))
+        self.assertEqual(decoded.format, "JPEG")
+        self.assertEqual(decoded.mode, "RGB")
+
+    def test_encodings_match_messages(self):
+        for encoding in CameraEncoding:
+            self.assertEqual(DataResponse.Data.Camera.Encoding.Name(
+                DataResponse.Data.Camera.Encoding.Value(encoding.value)), encoding.value)
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+from unittest import TestCase
+
+from numpy.random import default_rng
+
+from dbtypes.roads import RoadSegments
+
+
+def _create_road(rid: str, positions):
+    return SimpleNamespace(rid=rid, nodes=[SimpleNamespace(position=(x, y, 0)) for x, y in positions])
+
+
+def _segment_distances(roads, x: float, y: float):
+    """
+    The loop over all segments of all roads RoadSegments replaces.
+    :return: The road ID, the distance and the heading of all segments ordered by their distances.
+    """
+    from shapely.geometry import LineString, Point
+    from numpy import rad2deg, arctan2
+    point = Point(x, y)
+    segments = []
+    for road in roads:
+        coords = [node.position[0:2] for node in road.nodes]
+        for start, end in zip(coords[:-1], coords[1:]):
+            segments.append((road.rid, LineString([start, end]).distance(point),
+                             rad2deg(arctan2(end[1] - start[1], end[0] - start[0]))))
+    return sorted(segments, key=lambda segment: segment[1])
+
+
+class RoadSegmentsTest(TestCase):
+    def test_matches_segment_loop(self):
+        rng = default_rng(0)
+        roads = [_create_road("road_" + str(i), rng.uniform(-100, 100, (rng.integers(2, 10), 2))) for i in range(5)]
+        segments = RoadSegments(roads)
+        for x, y in rng.uniform(-150, 150, (200, 2)):
+            nearest, second_nearest = _segment_distances(roads, x, y)[0:2]
+            rid, distance, heading = segments.nearest(x, y)
+            self.assertAlmostEqual(nearest[1], distance)
+            # NOTE If the point is nearest to a node the segments ending and starting at this node are equally near
+            if second_nearest[1] - nearest[1] > 1e-6:
+                self.assertEqual(nearest[0], rid)
+                self.assertAlmostEqual(nearest[2], heading)
+
+    def test_projection_is_clipped_to_segment(self):
+        segments = RoadSegments([_create_road("road", [(0, 0), (10, 0)])])
+        self.assertEqual(("road", 5.0, 0.0), segments.nearest(-3, 4))
+        self.assertEqual(("road", 2.0, 0.0), segments.nearest(5, -2))
+        self.assertEqual(("road", 5.0, 0.0), segments.nearest(13, 4))
+
+    def test_heading(self):
+        segments = RoadSegments([_create_road("road", [(0, 0), (0, 10), (-10, 10)])])
+        self.assertAlmostEqual(90, segments.nearest(1, 2)[2])
+        self.assertAlmostEqual(180, segments.nearest(-5, 11)[2])
+
+    def test_degenerated_segment(self):
+        segments = RoadSegments([_create_road("road", [(1, 1), (1, 1)])])
+        rid, distance, _ = segments.nearest(4, 5)
+        self.assertEqual("road", rid)
+        self.assertAlmostEqual(5, distance)
+
+    def test_no_segments(self):
+        self.assertIsNone(RoadSegments([]).nearest(0, 0))
+        self.assertIsNone(RoadSegments([_create_road("road", [(0, 0)])]).nearest(0, 0))
@@ -0,0 +1,148 @@
+import os
+from tempfile import TemporaryDirectory
+from threading import current_thread, Event
+from time import sleep, monotonic
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+from unittest import TestCase
+from unittest.mock import patch
+
+from drivebuildclient.aiExchangeMessages_pb2 import TestResult, CycleTiming
+
+from dbtypes.criteria import KPValue
+from dbtypes.scheme import MovementMode
+from sim_controller import MovementModeTracker, SimNodeController, Simulation
+
+
+class MovementModeTrackerTest(TestCase):
+    def setUp(self) -> None:
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.tracker = MovementModeTracker(self._get_mode_file_path, ["ego"])
+        self.addCleanup(self.tracker.stop)
+
+    def _get_mode_file_path(self, pid: str) -> str:
+        return os.path.join(self.directory, pid + "_movementMode")
+
+    def _write_mode(self, pid: str, mode: MovementMode, modification_time_ns: int) -> None:
+        with open(self._get_mode_file_path(pid), "w") as mode_file:
+            mode_file.write(mode.value)
+        # NOTE Ensure a distinct modification time although writes may happen within the resolution of the clock
+        os.utime(self._get_mode_file_path(pid), ns=(modification_time_ns, modification_time_ns))
+
+    def test_without_watcher(self):
+        self.assertIsNone(self.tracker.get("ego"))
+        self._write_mode("ego", MovementMode.AUTONOMOUS, 1000000000)
+        self.assertIs(MovementMode.AUTONOMOUS, self.tracker.get("ego"))
+        self._write_mode("ego", MovementMode.MANUAL, 2000000000)
+        self.assertIs(MovementMode.MANUAL, self.tracker.get("ego"))
+
+    def test_watcher_caches_modes(self):
+        self._write_mode("ego", MovementMode.AUTONOMOUS, 1000000000)
+        self.tracker.start()
+        # NOTE There is no cached mode yet so it is read synchronously
+        self.assertIs(MovementMode.AUTONOMOUS, self.tracker.get("ego"))
+        stat = os.stat
+        accessing_threads = []
+
+        def _record_stat(*args, **kwargs):
+            accessing_threads.append(current_thread())
+            return stat(*args, **kwargs)
+
+        with patch("os.stat", side_effect=_record_stat):
+            self.assertIs(MovementMode.AUTONOMOUS, self.tracker.get("ego"))
+        # NOTE Only the watcher may access the mode file
+        self.assertNotIn(current_thread(), accessing_threads)
+        self._write_mode("ego", MovementMode.MANUAL, 2000000000)
+        deadline = monotonic() + 5
+        while self.tracker.get("ego") is not MovementMode.MANUAL and monotonic() < deadline:
+            sleep(0.01)
+        self.assertIs(MovementMode.MANUAL, self.tracker.get("ego"))
+
+    def test_incomplete_mode_file(self):
+        with open(self._get_mode_file_path("ego"), "w") as mode_file:
+            mode_file.write("AUTO")
+        self.assertIsNone(self.tracker.get("ego"))
+
+
+class _FakeSimNodeController(SimNodeController):
+    """
+    Lets the success criterion hold as soon as the simulation advanced the given number of ticks.
+    """
+
+    def __init__(self, num_ticks: int, bounds: List[Optional[int]]):
+        self.num_ticks = num_ticks
+        self.bounds = bounds
+        self.tick = 0
+        self.steps_taken = []
+        self.requested_ais = []
+        self.result = None
+
+    def is_running(self) -> bool:
+        return True
+
+    def get_vids(self) -> List[str]:
+        return ["ego"]
+
+    def poll_sensors(self) -> None:
+        pass
+
+    def verify(self) -> Tuple[KPValue, KPValue, KPValue]:
+        return KPValue.TRUE, KPValue.FALSE, KPValue.TRUE if self.tick >= self.num_ticks else KPValue.UNKNOWN
+
+    def request_ai_for(self, vid: str) -> None:
+        self.requested_ais.append(vid)
+
+    def store_verification_cycle(self, timing: CycleTiming) -> None:
+        pass
+
+    def steps(self, steps: int) -> None:
+        self.steps_taken.append(steps)
+        self.tick += steps
+
+    def get_fast_forward_bound(self) -> Optional[int]:
+        return self.bounds.pop(0) if self.bounds else None
+
+    def stop(self, result: TestResult.Result) -> None:
+        self.result = result
+
+    def close(self) -> None:
+        pass
+
+
+class FastForwardTest(TestCase):
+    @staticmethod
+    def _run(mode: MovementMode, controller: _FakeSimNodeController, fast_forward: bool = True) -> None:
+        """
+        Runs the control loop of a simulation with a single participant which stays in the given movement mode.
+        """
+        simulation = Simulation.__new__(Simulation)
+        simulation._sim_name = "drivebuild_test"
+        simulation.test_case = SimpleNamespace(initial_modes={"ego": mode})
+        simulation._movement_modes = SimpleNamespace(get=lambda pid: None, stop=lambda: None)
+        simulation._sim_server_socket = None
+        simulation._controller = controller
+        simulation._controller_set = Event()
+        simulation._controller_set.set()
+        with patch("config.FAST_FORWARD", fast_forward), patch("config.FAST_FORWARD_RESOLUTION", 60):
+            simulation._run_runtime_verification(10)
+
+    def test_batches_steps_without_ai(self):
+        controller = _FakeSimNodeController(200, [25, 3])
+        self._run(MovementMode.MANUAL, controller)
+        # NOTE Batches are bounded by the bound and the resolution but never shorter than the AI frequency
+        self.assertEqual([25, 10, 60, 60, 60], controller.steps_taken)
+        self.assertEqual([], controller.requested_ais)
+        self.assertEqual(TestResult.Result.SUCCEEDED, controller.result)
+
+    def test_requests_ai_controlled_participants(self):
+        controller = _FakeSimNodeController(30, [])
+        self._run(MovementMode.AUTONOMOUS, controller)
+        self.assertEqual([10, 10, 10], controller.steps_taken)
+        self.assertEqual(["ego", "ego", "ego"], controller.requested_ais)
+
+    def test_disabled(self):
+        controller = _FakeSimNodeController(30, [])
+        self._run(MovementMode.MANUAL, controller, False)
+        self.assertEqual([10, 10, 10], controller.steps_taken)
@@ -24,6 +24,12 @@ CREATE TABLE IF NOT EXISTS VerificationCycles
     data     BYTEA     NOT NULL,
     started  TIMESTAMP NOT NULL,
     finished TIMESTAMP NOT NULL,
+    duration_ns BIGINT,
+    timing   BYTEA,
     PRIMARY KEY (sid, vid, tick)
 );
 
+-- NOTE Cycles stored before timing was recorded have no duration and no timing
+ALTER TABLE VerificationCycles ADD COLUMN IF NOT EXISTS duration_ns BIGINT;
+ALTER TABLE VerificationCycles ADD COLUMN IF NOT EXISTS timing BYTEA;
+